@@ -0,0 +1,343 @@
+"""
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+"""
+
+import os
+import time
+import datetime
+import numpy as np
+import h5py
+
+from pyLMT import H5LMT, defaultErrorHandler
+
+from _pylmt_exceptions import Error
+
+handleError = defaultErrorHandler
+
+class ArchiveError(Error):
+    """
+    Generic Error for problems with Archive objects.
+    """
+
+class ArchiveRangeError(ArchiveError):
+    """
+    A range of steps is [begin, end), so begin has to come before end.
+    """
+
+class ArchiveShapeError(ArchiveError):
+    """
+    The days being put together have to have the same rows (OSTs,
+    OSSs, or ops), dtype, and units in each data set.
+    """
+
+class ArchiveVirtualError(ArchiveError):
+    """
+    A virtual data set index needs h5py 2.9 or later, built against
+    HDF5 1.10 or later.
+    """
+
+# How many of the daily files to keep open at once. A year's worth
+# of days only ever needs one or two of them at a time.
+MAX_OPEN = 8
+
+#*******************************************************************************
+def dayOf(sie):
+    """
+    The day, in the local time zone as h5lmt_init.py has it, that the
+    step 'sie' belongs to.
+    """
+    return(time.strftime("%Y-%m-%d", time.localtime(sie)))
+
+def nextDay(day):
+    d = datetime.datetime.strptime(day, "%Y-%m-%d") + datetime.timedelta(days=1)
+    return(d.strftime("%Y-%m-%d"))
+
+def dayRange(firstDay, lastDay):
+    """
+    The days firstDay through lastDay, inclusive.
+    """
+    days = []
+    day = firstDay
+    while day <= lastDay:
+        days.append(day)
+        day = nextDay(day)
+    return(days)
+
+#*******************************************************************************
+# Begin class Archive
+class Archive(object):
+    """
+    A directory of daily h5lmt files, <dir>/<day>/<host>_<fs>.h5lmt as
+    h5lmt_init.py lays them out, seen as one continuous time axis. Each
+    file runs from its midnight through the next one, and that last
+    step is the first step of the next day's file as well. Here a day
+    supplies the steps up to, but not including, the next midnight, and
+    the closing midnight only comes from this day if there is no file
+    for the next day. Files are opened as a range first needs them, and
+    only the steps of the range are read from each. A day with no file
+    is just a gap in the Steps.
+    """
+    def __init__(self, dir, host, fs):
+        self.Debug = False
+        self.DebugMessages = None
+        self.ErrorMessages = None
+        self.dir = dir
+        self.host = host
+        self.fs = fs
+        # day -> H5LMT.H5LMT, or None if there's no file for the day
+        self.Days = {}
+        # the days with an open file, least recently used first
+        self.Open = []
+
+    def debug(self, module=None):
+        if (module is None) or (module == "Archive"):
+            self.Debug = not self.Debug
+        if self.Debug == True:
+            self.DebugMessages = ''
+        else:
+            self.DebugMessages = None
+
+    def path(self, day):
+        return("%s/%s/%s_%s.h5lmt" % (self.dir, day, self.host, self.fs))
+
+    def open(self, day):
+        """
+        The H5LMT reader for 'day', or None if it has no file.
+        """
+        if day in self.Open:
+            self.Open.remove(day)
+            self.Open.append(day)
+            return(self.Days[day])
+        if (day in self.Days) and (self.Days[day] is None):
+            return(None)
+        if not os.path.exists(self.path(day)):
+            self.Days[day] = None
+            return(None)
+        if len(self.Open) >= MAX_OPEN:
+            oldest = self.Open.pop(0)
+            self.Days[oldest].fsFile.close()
+            del self.Days[oldest]
+        if self.Debug == True:
+            self.DebugMessages += "Archive.open(): opening %s\n" % self.path(day)
+        self.Days[day] = H5LMT.H5LMT(h5py.File(self.path(day), 'r'))
+        self.Open.append(day)
+        return(self.Days[day])
+
+    def close(self):
+        for day in self.Open:
+            self.Days[day].fsFile.close()
+        self.Days = {}
+        self.Open = []
+
+    def ownSteps(self, day):
+        """
+        How many of the file's steps belong to 'day', ie. all but the
+        closing midnight unless there's no next day to supply it.
+        """
+        h5lmt = self.open(day)
+        if h5lmt is None:
+            return(0)
+        if os.path.exists(self.path(nextDay(day))):
+            return(max(len(h5lmt.Steps) - 1, 0))
+        return(len(h5lmt.Steps))
+
+    def segments(self, begin, end):
+        """
+        Generate (day, b, e) for the days with steps in [begin, end),
+        where b up to (but not including) e are the indices of those
+        steps in the day's file. Each day is opened as it comes up, so
+        its file is open while the caller deals with it.
+        """
+        if begin >= end:
+            handleError(self,
+                        ArchiveRangeError,
+                        "Archive.segments(): Error - %d is not before %d" % (begin, end))
+            # not reached
+        for day in dayRange(dayOf(begin), dayOf(end - 1)):
+            own = self.ownSteps(day)
+            if own == 0:
+                continue
+            Steps = self.Days[day].Steps[:own]
+            b = int(np.searchsorted(Steps, begin, side='left'))
+            e = int(np.searchsorted(Steps, end, side='left'))
+            if b < e:
+                yield (day, b, e)
+
+    def steps(self, begin, end):
+        """
+        The steps in [begin, end), from whichever days have them.
+        """
+        parts = [self.Days[day].Steps[b:e] for (day, b, e) in self.segments(begin, end)]
+        if len(parts) == 0:
+            return(np.array([], dtype=np.int32))
+        return(np.concatenate(parts))
+
+    def read(self, name, begin, end):
+        """
+        Data set 'name' for the steps in [begin, end), put together from
+        each day's slab along the step axis, or None if no day has any of
+        those steps.
+        """
+        parts = []
+        for (day, b, e) in self.segments(begin, end):
+            Values = self.Days[day].read(name, b, e)
+            if (len(parts) > 0) and (Values.shape[:-1] != parts[0].shape[:-1]):
+                handleError(self,
+                            ArchiveShapeError,
+                            "Archive.read(): Error - %s on %s has shape %s rather than %s" % (name, day, str(Values.shape[:-1]), str(parts[0].shape[:-1])))
+                # not reached
+            parts.append(Values)
+        if len(parts) == 0:
+            return(None)
+        return(np.concatenate(parts, axis=-1))
+
+    def reduce(self, how, name, begin, end, over='rows'):
+        """
+        As H5LMT.reduce(), but for any range of steps across the days.
+        """
+        Values = self.read(name, begin, end)
+        if Values is None:
+            return(None)
+        return(H5LMT.reduceValues(how, Values, over))
+
+    def sum(self, name, begin, end, over='rows'):
+        return(self.reduce('sum', name, begin, end, over))
+
+    def mean(self, name, begin, end, over='rows'):
+        return(self.reduce('mean', name, begin, end, over))
+
+    def max(self, name, begin, end, over='rows'):
+        return(self.reduce('max', name, begin, end, over))
+
+    def rollup(self, name, resolution, begin, end, stat='mean', total=False):
+        """
+        As H5LMT.rollup(), for the bins of every day in [begin, end). A
+        day's bins stop short of its closing midnight, so there's nothing
+        shared between days to leave out. Each day uses the best level
+        it has, so a day without rollups comes back a step at a time, and
+        the Steps say which is which. Return (Steps, Values), with
+        Values None if no day has any bins in the range.
+        """
+        if begin >= end:
+            handleError(self,
+                        ArchiveRangeError,
+                        "Archive.rollup(): Error - %d is not before %d" % (begin, end))
+            # not reached
+        Steps = []
+        parts = []
+        for day in dayRange(dayOf(begin), dayOf(end - 1)):
+            h5lmt = self.open(day)
+            if h5lmt is None:
+                continue
+            (DaySteps, Values) = h5lmt.rollup(name, resolution, stat, begin, end, total)
+            if len(DaySteps) == 0:
+                continue
+            if (len(parts) > 0) and (Values.shape[:-1] != parts[0].shape[:-1]):
+                handleError(self,
+                            ArchiveShapeError,
+                            "Archive.rollup(): Error - %s on %s has shape %s rather than %s" % (name, day, str(Values.shape[:-1]), str(parts[0].shape[:-1])))
+                # not reached
+            Steps.append(DaySteps)
+            parts.append(Values)
+        if len(parts) == 0:
+            return(np.array([], dtype=np.int32), None)
+        return(np.concatenate(Steps), np.concatenate(parts, axis=-1))
+
+    def buildIndex(self, path, firstDay, lastDay):
+        """
+        Write an HDF5 file at 'path' with the same groups and data sets as
+        a daily h5lmt file, but where each data set is a virtual data set
+        mapping the days firstDay through lastDay end to end (with the
+        shared midnights taken once, as above). The FSStepsDataSet is an
+        ordinary copy of the steps. H5LMT.H5LMT() can read the index like
+        any other h5lmt file, and HDF5 fetches the chunks it needs from
+        the daily files underneath. A data set goes in the index only if
+        every day has it. Return the list of days that had a file.
+        """
+        if not hasattr(h5py, 'VirtualLayout'):
+            handleError(self,
+                        ArchiveVirtualError,
+                        "Archive.buildIndex(): Error - This h5py (%s) has no virtual data sets" % h5py.version.version)
+            # not reached
+        days = []
+        counts = []
+        for day in dayRange(firstDay, lastDay):
+            own = self.ownSteps(day)
+            if own > 0:
+                days.append(day)
+                counts.append(own)
+        if len(days) == 0:
+            return(days)
+        total = sum(counts)
+        indexFile = h5py.File(path, 'w')
+        fsStepsGroup = indexFile.create_group('FSStepsGroup')
+        Steps = np.concatenate([self.open(day).Steps[:n] for (day, n) in zip(days, counts)])
+        fsStepsDataSet = fsStepsGroup.create_dataset('FSStepsDataSet', data=Steps, dtype=np.int32)
+        fsStepsDataSet.attrs['day'] = days[0]
+        fsStepsDataSet.attrs['nextday'] = nextDay(days[-1])
+        fsStepsDataSet.attrs['host'] = self.host
+        fsStepsDataSet.attrs['fs'] = self.fs
+        fsStepsDataSet.attrs['days'] = days
+        locations = [('FSStepsGroup', 'FSIntervalsDataSet')] + [(group, name) for (name, (group, names)) in H5LMT.DATA_SETS.items()]
+        for (group, name) in locations:
+            if not all([name in self.open(day).fsFile.get(group, {}) for day in days]):
+                continue
+            # Only MAX_OPEN days stay open, so keep what's needed from
+            # the first one rather than the data set itself
+            dataSet = self.open(days[0]).fsFile[group][name]
+            (rows, dtype) = (dataSet.shape[:-1], dataSet.dtype)
+            attrs = dict(dataSet.attrs.items())
+            layout = h5py.VirtualLayout(shape=rows + (total,), dtype=dtype)
+            offset = 0
+            for (day, own) in zip(days, counts):
+                daySet = self.open(day).fsFile[group][name]
+                if ((daySet.shape[:-1] != rows) or (daySet.dtype != dtype) or
+                    (daySet.attrs.get('units') != attrs.get('units'))):
+                    indexFile.close()
+                    handleError(self,
+                                ArchiveShapeError,
+                                "Archive.buildIndex(): Error - %s on %s doesn't match %s" % (name, day, days[0]))
+                    # not reached
+                source = h5py.VirtualSource(os.path.abspath(self.path(day)), '/%s/%s' % (group, name), shape=daySet.shape)
+                every = (slice(None),)*len(rows)
+                layout[every + (slice(offset, offset + own),)] = source[every + (slice(0, own),)]
+                offset += own
+            virtualDataSet = indexFile.require_group(group).create_virtual_dataset(name, layout, fillvalue=0)
+            for attr in attrs:
+                virtualDataSet.attrs[attr] = attrs[attr]
+        indexFile.close()
+        return(days)
+
+    def show(self):
+        print "%s %s in %s: %d days open" % (self.host, self.fs, self.dir, len(self.Open))
+        for day in self.Open:
+            print "%s: %d steps" % (day, len(self.Days[day].Steps))
+
+# End of class Archive
+#*******************************************************************************
@@ -32,7 +32,7 @@ import MySQLdb
 import numpy as np
 import numpy.ma as ma
 
-from pyLMT import Counter, HistBins, HistSeries, BrwOSS, Timestamp, TimeSteps, defaultErrorHandler
+from pyLMT import Catalog, Counter, HistBins, HistSeries, BrwOSS, Series, Timestamp, TimeSteps, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -97,6 +97,11 @@ class BrwFSNoBinsError(BrwFSError):
     In most cases you can't do anything without a HistBins object.
     """
 
+class BrwFSNoSuchBinError(BrwFSError):
+    """
+    A row of brw_stats data has a bin that getBrwStats() did not find.
+    """
+
 class BrwFSNoDataError(BrwFSError):
     """
     There is no data.
@@ -158,6 +163,13 @@ class BrwFS():
         # entry and indexed by the string representation of the STATS_ID
         self.Read = {}
         self.Write = {}
+        # For streamed data the OST histograms are views onto these
+        # (numOSTs, numBins, numSteps) arrays, also indexed by STATS_ID
+        self.OSTIDs = None
+        self.ReadMatrix = {}
+        self.WriteMatrix = {}
+        self.ReadValid = {}
+        self.WriteValid = {}
         self.Steps = None
         self.haveData = False
         self.total = 0
@@ -177,6 +189,13 @@ class BrwFS():
         # entry and indexed by the string representation of the STATS_ID
         self.Read = {}
         self.Write = {}
+        # For streamed data the OST histograms are views onto these
+        # (numOSTs, numBins, numSteps) arrays, also indexed by STATS_ID
+        self.OSTIDs = None
+        self.ReadMatrix = {}
+        self.WriteMatrix = {}
+        self.ReadValid = {}
+        self.WriteValid = {}
         self.Steps = None
         self.haveData = False
         self.total = 0
@@ -226,10 +245,13 @@ class BrwFS():
             # not reached
         oss.register(ost, hist, bin, sie, read, write)
 
-    def getBrwStats(self, conn=None, stat=None, bins=None):
+    def getBrwStats(self, conn=None, stat=None, bins=None, catalog=None):
         """
         Get the list of BrwStats using the provided MySQL
-        connection 'conn'.
+        connection 'conn'. If a Catalog.Catalog 'catalog' is provided the
+        BRW_STATS_INFO rows and the bins come from it instead, so there
+        is no scan of BRW_STATS_DATA just to learn the bin values unless
+        the interval is outside the TS_IDs the catalog has already seen.
         """
         if conn is None:
             if self.conn is None:
@@ -243,22 +265,33 @@ class BrwFS():
             self.DebugMessages += "BrwFS.getBrwStats(): get the list of BRW Stats on %s" % self.name
         self.end = self.Steps.end
         self.begin = self.Steps.begin
-        query = "SELECT * FROM BRW_STATS_INFO"
-        if not stat is None:
-            query += " where STATS_NAME='" + stat + "'"
-        query += " order by STATS_ID"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
+        if catalog is None:
+            query = "SELECT * FROM BRW_STATS_INFO"
+            if not stat is None:
+                query += " where STATS_NAME='" + stat + "'"
+            query += " order by STATS_ID"
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                if self.Debug == True:
+                    self.DebugMessages += "\t%s" % query
+                cursor.execute (query)
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            BrwFSQueryBrwStatsError,
+                            "BrwFS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+                # not reached
+            rows = cursor.fetchall()
             cursor.close()
-            handleError(self,
-                        BrwFSQueryBrwStatsError,
-                        "BrwFS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
+        else:
+            try:
+                rows = [row for row in catalog.brwStats(self.conn)
+                        if (stat is None) or (row["STATS_NAME"] == stat)]
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwFSQueryBrwStatsError,
+                            "BrwFS.getBrwStats: %s" % str(e))
+                # not reached
         if len(rows) == 0:
             handleError(self,
                         BrwFSQueryBrwStatsError,
@@ -301,7 +334,6 @@ class BrwFS():
                     ost.Read[id].setSteps(self.Steps)
                     ost.Write[id] = HistSeries.HistSeries(name, "count")
                     ost.Write[id].setSteps(self.Steps)
-        cursor.close()
         # If we were passed a list of bins, preload the Bins object with them
         # Presumably we won't see any new ones in the examination of rows,
         # so skip that and just return
@@ -312,37 +344,47 @@ class BrwFS():
             self.Bins[self.BrwIdDict[stats_id]].register()
             self.setBins()
             return
-        query = "select distinct STATS_ID, BIN from TIMESTAMP_INFO,BRW_STATS_DATA where "
-        if not stat is None:
-            stats_id = self.Bins[self.BrwNameDict[stat]].id
-            query += "STATS_ID=" + str(stats_id) + " AND "
-        query += "TIMESTAMP_INFO.TS_ID=BRW_STATS_DATA.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by STATS_ID, BIN"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
+        if catalog is None:
+            query = "select distinct STATS_ID, BIN from BRW_STATS_DATA where "
+            if not stat is None:
+                stats_id = self.Bins[self.BrwNameDict[stat]].id
+                query += "STATS_ID=" + str(stats_id) + " AND "
+            query += self.Steps.getTS_IDClause()
+            query += " order by STATS_ID, BIN"
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                if self.Debug == True:
+                    self.DebugMessages += "\t%s" % query
+                cursor.execute (query)
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            BrwFSQueryBrwStatsError,
+                            "BrwFS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+                # not reached
+            rows = cursor.fetchall()
+            if len(rows) == 0:
+                handleError(self,
+                            BrwFSQueryBrwStatsError,
+                            "BrwFS.getBrwStats(): WARNING - No bins data")
+                # not reached
+            for row in rows:
+                id = row["STATS_ID"]
+                bin = row["BIN"]
+                self.Bins[self.BrwIdDict[id]].examine(bin)
             cursor.close()
-            handleError(self,
-                        BrwFSQueryBrwFSError,
-                        "BrwFS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
-        if len(rows) == 0:
-            handleError(self,
-                        BrwFSQueryBrwFSError,
-                        "BrwFS.getBrwStats(): WARNING - No bins data")
-            # not reached
-        for row in rows:
-            id = row["STATS_ID"]
-            bin = row["BIN"]
-            self.Bins[self.BrwIdDict[id]].examine(bin)
+        else:
+            try:
+                binDict = catalog.bins(self.conn, self.Steps)
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwFSQueryBrwStatsError,
+                            "BrwFS.getBrwStats: %s" % str(e))
+                # not reached
+            for Bins in self.Bins:
+                if Bins.id in binDict:
+                    for bin in binDict[Bins.id]:
+                        Bins.examine(bin)
         for Bins in self.Bins:
             Bins.register()
             if (Bins.bins() == 0):
@@ -351,7 +393,6 @@ class BrwFS():
                             "BrwFS.getBrwStats(): Warning - No bins for %s" % Bins.name)
                 # not reached
         self.setBins()
-        cursor.close()
         return
 
     def getStatIndex(self, stat=None):
@@ -403,12 +444,14 @@ class BrwFS():
         # This should really be a call to a HistBins method getUnits()
         return(self.Bins[index].units)
 
-    def getOSSs(self, conn=None):
+    def getOSSs(self, conn=None, topology=None):
         """
         This supports accessing just the one BrwFS.
 
-        Get the list of OSSs that are on this BrwFS using the provided MySQL
-        connection 'conn'.
+        Get the list of OSSs that are on this BrwFS, and the OSTs on each,
+        using the provided MySQL connection 'conn'. The whole tree comes
+        from the one Catalog.getTopology() query, or from 'topology' if the
+        caller already has that list in hand.
         """
         if conn is None:
             if self.conn is None:
@@ -420,34 +463,31 @@ class BrwFS():
             self.conn = conn
         if self.Debug == True:
             self.DebugMessages += "BrwFS.getOSSs(): get the list of OSSs on %s" % self.name
-        query = "SELECT * FROM OSS_INFO"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
-            cursor.close()
-            handleError(self,
-                        BrwFSQueryOSSsError,
-                        "BrwFS.getOSSs: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
-        if len(rows) == 0:
+        if topology is None:
+            try:
+                topology = Catalog.getTopology(self.conn)
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwFSQueryOSSsError,
+                            "BrwFS.getOSSs: %s" % str(e))
+                # not reached
+        if len(topology) == 0:
             handleError(self,
                         BrwFSQueryOSSsError,
                         "BrwFS.getOSSs(): WARNING - No data")
             # not reached
-        for row in rows:
-            name = row["HOSTNAME"]
-            self.OSSDict[name] = len(self.OSSs)
-            brwoss = BrwOSS.BrwOSS(fs=self.name, name=name)
-            if self.DebugModules["BrwOSS"] == True:
-                brwoss.debug()
-                brwoss.debug("HistSeries")
-            self.OSSs.append(brwoss)
-            brwoss.getOSTs(self.conn)
-        cursor.close()
+        for (oss_id, hostname, ost_id, ost_name) in topology:
+            if not hostname in self.OSSDict:
+                self.OSSDict[hostname] = len(self.OSSs)
+                brwoss = BrwOSS.BrwOSS(fs=self.name, name=hostname)
+                brwoss.conn = self.conn
+                if self.DebugModules["BrwOSS"] == True:
+                    brwoss.debug()
+                    brwoss.debug("HistSeries")
+                self.OSSs.append(brwoss)
+            brwoss = self.OSSs[self.OSSDict[hostname]]
+            if not ost_name is None:
+                brwoss.addOST(ost_name, ost_id)
         return
 
     # You can ask for the OSS by name or by the name of one of its OSTs
@@ -494,17 +534,55 @@ class BrwFS():
                 oss.Bins = self.Bins
                 oss.setBins()
 
-    def getData(self, stat=None):
+    def setMatrices(self):
+        """
+        Allocate a (numOSTs, numBins, numSteps) array for the read and for
+        the write histograms of each BRW stat, with their validity bitmaps,
+        and make each OST's HistSeries storage a view onto its slice. The OST order follows
+        self.OSSs and oss.OSTs, and self.OSTIDs holds the OST_ID for each.
+        """
+        OSTs = []
+        for oss in self.OSSs:
+            OSTs += oss.OSTs
+        self.OSTIDs = np.zeros(len(OSTs), dtype=np.int64)
+        for index, ost in enumerate(OSTs):
+            if ost.ostID is None:
+                handleError(self,
+                            BrwFSNoSuchOSTError,
+                            "BrwFS.setMatrices(): Warning - No OST_ID for OST %s" % ost.name)
+                # not reached
+            self.OSTIDs[index] = ost.ostID
+        for Bins in self.Bins:
+            shape = (len(OSTs), Bins.bins(), self.Steps.steps())
+            self.ReadMatrix[Bins.id] = np.empty(shape, dtype=np.float64)
+            self.ReadValid[Bins.id] = Series.newValid(shape)
+            self.WriteMatrix[Bins.id] = np.empty(shape, dtype=np.float64)
+            self.WriteValid[Bins.id] = Series.newValid(shape)
+            for index, ost in enumerate(OSTs):
+                ost.Read[Bins.id].setStorage(self.ReadMatrix[Bins.id][index], self.ReadValid[Bins.id][index])
+                ost.Write[Bins.id].setStorage(self.WriteMatrix[Bins.id][index], self.WriteValid[Bins.id][index])
+
+    def getData(self, stat=None, chunk=None, pool=None):
         """
         This supports accessing all OSSs.
 
         Get data from the MySQL connection 'conn' for the interval
         from begin to end. begin and end are themselves already
         Timestamp objects, and are required.
+
+        Setting 'chunk' (a number of rows) streams the data instead. See
+        getStreamedData(). Providing a Pool.Pool 'pool' spreads the OSTs
+        across its connections. See getParallelData().
         """
         if self.Steps is None:
             print "BrwFS.getData(): Error - You must supply a TimeSteps oject first"
             return
+        if not pool is None:
+            self.getParallelData(stat, pool, chunk)
+            return
+        if not chunk is None:
+            self.getStreamedData(stat, chunk)
+            return
         if self.conn is None:
             handleError(self,
                         BrwFSNoConnectionError,
@@ -514,18 +592,15 @@ class BrwFS():
             self.DebugMessages += "BrwFS.getData(): get data from %d/%d to %d/%d" % (begin.sie, begin.ts_id, end.sie, end.ts_id)
         self.end = self.Steps.end
         self.begin = self.Steps.begin
-        query = "SELECT * FROM OSS_INFO,OST_INFO,TIMESTAMP_INFO,BRW_STATS_DATA WHERE "
+        query = "SELECT HOSTNAME,OST_NAME,STATS_ID,BIN,BRW_STATS_DATA.TS_ID,READ_COUNT,WRITE_COUNT "
+        query += "FROM OSS_INFO,OST_INFO,BRW_STATS_DATA WHERE "
         if not stat is None:
             stats_id = self.Bins[self.BrwNameDict[stat]].id
             query += "STATS_ID=" + str(stats_id) + " AND "
         query += "OSS_INFO.OSS_ID=OST_INFO.OSS_ID AND "
         query += "OST_INFO.OST_ID=BRW_STATS_DATA.OST_ID AND "
-        query += "TIMESTAMP_INFO.TS_ID=BRW_STATS_DATA.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query += self.Steps.getTS_IDClause("BRW_STATS_DATA.TS_ID")
+        query += " order by BRW_STATS_DATA.TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -556,7 +631,9 @@ class BrwFS():
             ost = oss.getOST(ostname)
             id = row['STATS_ID']
             bin = row['BIN']
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             read = int(row['READ_COUNT'])
             write = int(row['WRITE_COUNT'])
             self.register(oss, ost, id, bin, sie, read, write)
@@ -564,6 +641,140 @@ class BrwFS():
         self.setData()
         return
 
+    def getStreamedData(self, stat, chunk):
+        """
+        Get the same data as getData() through a server-side cursor, 'chunk'
+        rows at a time. Only the (OST_ID, STATS_ID, BIN, TS_ID, READ_COUNT,
+        WRITE_COUNT) columns come back, and each chunk is scattered as a
+        whole into the arrays from setMatrices(). Peak memory is those
+        arrays plus one chunk, however long the interval.
+        """
+        if self.Steps is None:
+            handleError(self,
+                        BrwFSNoStepsError,
+                        "BrwFS.getStreamedData(): Error - You must supply a TimeSteps oject first")
+            # not reached
+        if self.conn is None:
+            handleError(self,
+                        BrwFSNoConnectionError,
+                        "BrwFS.getStreamedData(): Error - Please provide a MySQL connection")
+            # not reached
+        self.end = self.Steps.end
+        self.begin = self.Steps.begin
+        self.setMatrices()
+        count = self.fetchStreamed(self.conn, stat=stat, chunk=chunk)
+        if count == 0:
+            handleError(self,
+                        BrwFSQueryError,
+                        "BrwFS.getStreamedData(): WARNING - No data")
+            # not reached
+        self.setData()
+        return
+
+    def getParallelData(self, stat, pool, chunk=None):
+        """
+        Get the same data as getStreamedData(), but with the OSTs dealt
+        out across the connections of the Pool.Pool 'pool'. Each worker
+        only touches its own OSTs' slices of the shared arrays.
+        """
+        if self.Steps is None:
+            handleError(self,
+                        BrwFSNoStepsError,
+                        "BrwFS.getParallelData(): Error - You must supply a TimeSteps oject first")
+            # not reached
+        self.end = self.Steps.end
+        self.begin = self.Steps.begin
+        self.setMatrices()
+        counts = pool.map(self.fetchStreamed, pool.partition(self.OSTIDs), stat, chunk, pool.lock)
+        if sum(counts) == 0:
+            handleError(self,
+                        BrwFSQueryError,
+                        "BrwFS.getParallelData(): WARNING - No data")
+            # not reached
+        self.setData()
+        return
+
+    def fetchStreamed(self, conn, ostIDs=None, stat=None, chunk=None, lock=None):
+        """
+        Run the query for the (OST_ID, STATS_ID, BIN, TS_ID, READ_COUNT,
+        WRITE_COUNT) columns on 'conn', for just the OSTs in 'ostIDs' if
+        that is given, and scatter the rows into the arrays. Without a
+        'chunk' the whole result is fetched at once. If 'lock' is given
+        it is held during each scatter. Returns the number of rows seen.
+        """
+        query = "SELECT OST_ID,STATS_ID,BIN,TS_ID,READ_COUNT,WRITE_COUNT FROM BRW_STATS_DATA WHERE "
+        if not stat is None:
+            stats_id = self.Bins[self.BrwNameDict[stat]].id
+            query += "STATS_ID=" + str(stats_id) + " AND "
+        if not ostIDs is None:
+            query += "OST_ID IN (" + ",".join([str(id) for id in ostIDs]) + ") AND "
+        query += self.Steps.getTS_IDClause()
+        try:
+            if chunk is None:
+                cursor = conn.cursor()
+            else:
+                cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+            if self.Debug == True:
+                self.DebugMessages += "\t%s" % query
+            cursor.execute (query)
+        except MySQLdb.Error, e:
+            cursor.close()
+            handleError(self,
+                        BrwFSQueryError,
+                        "BrwFS.fetchStreamed: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+            # not reached
+        count = 0
+        while True:
+            if chunk is None:
+                rows = cursor.fetchall()
+            else:
+                rows = cursor.fetchmany(chunk)
+            if len(rows) == 0:
+                break
+            count += len(rows)
+            data = np.array(rows, dtype=np.float64)
+            del rows
+            if lock is None:
+                self.scatterRows(data)
+            else:
+                lock.acquire()
+                try:
+                    self.scatterRows(data)
+                finally:
+                    lock.release()
+            if chunk is None:
+                break
+        cursor.close()
+        return(count)
+
+    def scatterRows(self, data):
+        """
+        'data' is an array of (OST_ID, STATS_ID, BIN, TS_ID, READ_COUNT,
+        WRITE_COUNT) rows. Put each value in its place in the arrays from
+        setMatrices(). A row whose bin is not one of the registered bins
+        is an error rather than being left out.
+        """
+        (ost_index, ost_valid) = TimeSteps.find_indices(self.OSTIDs, data[:,0].astype(np.int64))
+        step_index = self.Steps.getTS_IDIndex(data[:,3].astype(np.int64))
+        valid = ost_valid & (step_index >= 0)
+        for Bins in self.Bins:
+            selected = valid & (data[:,1] == Bins.id)
+            bin_index = TimeSteps.lookup(np.asarray(Bins.Bins), data[selected,2])
+            found = (bin_index >= 0)
+            if not np.all(found):
+                missing = np.unique(data[selected,2][~found].astype(np.int64))
+                handleError(self,
+                            BrwFSNoSuchBinError,
+                            "BrwFS.scatterRows(): Error - %s has bins %s that are not in its list" % (Bins.name, str(list(missing))))
+                # not reached
+            indices = (ost_index[selected],
+                       bin_index,
+                       step_index[selected])
+            self.ReadMatrix[Bins.id][indices] = data[selected,4]
+            self.WriteMatrix[Bins.id][indices] = data[selected,5]
+            Series.markValid(self.ReadValid[Bins.id], indices)
+            Series.markValid(self.WriteValid[Bins.id], indices)
+
     def getDataSlice(self, conn=None, stat=None):
         if conn is None:
             if self.conn is None:
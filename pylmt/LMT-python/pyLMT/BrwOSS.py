@@ -32,7 +32,7 @@ import MySQLdb
 import numpy as np
 import numpy.ma as ma
 
-from pyLMT import Counter, HistBins, HistSeries, BrwOST, Timestamp, TimeSteps, defaultErrorHandler
+from pyLMT import Catalog, Counter, HistBins, HistSeries, BrwOST, Timestamp, TimeSteps, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -217,10 +217,13 @@ class BrwOSS():
             # not reached
         ost.register(hist, bin, sie, read, write)
 
-    def getBrwStats(self, conn=None, stat=None, bins=None):
+    def getBrwStats(self, conn=None, stat=None, bins=None, catalog=None):
         """
         Get the list of BrwStats using the provided MySQL
-        connection 'conn'.
+        connection 'conn'. If a Catalog.Catalog 'catalog' is provided the
+        BRW_STATS_INFO rows and the bins come from it instead, so there
+        is no scan of BRW_STATS_DATA just to learn the bin values unless
+        the interval is outside the TS_IDs the catalog has already seen.
         """
         if conn is None:
             if self.conn is None:
@@ -234,22 +237,33 @@ class BrwOSS():
             self.DebugMessages += "BrwOSS.getBrwStats(): get the list of BRW Stats on %s" % self.name
         self.end = self.Steps.end
         self.begin = self.Steps.begin
-        query = "SELECT * FROM BRW_STATS_INFO"
-        if not stat is None:
-            query += " where STATS_NAME='" + stat + "'"
-        query += " order by STATS_ID"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
+        if catalog is None:
+            query = "SELECT * FROM BRW_STATS_INFO"
+            if not stat is None:
+                query += " where STATS_NAME='" + stat + "'"
+            query += " order by STATS_ID"
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                if self.Debug == True:
+                    self.DebugMessages += "\t%s" % query
+                cursor.execute (query)
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            BrwOSSQueryBrwStatsError,
+                            "BrwOSS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+                # not reached
+            rows = cursor.fetchall()
             cursor.close()
-            handleError(self,
-                        BrwOSSQueryBrwStatsError,
-                        "BrwOSS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
+        else:
+            try:
+                rows = [row for row in catalog.brwStats(self.conn)
+                        if (stat is None) or (row["STATS_NAME"] == stat)]
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwOSSQueryBrwStatsError,
+                            "BrwOSS.getBrwStats: %s" % str(e))
+                # not reached
         if len(rows) == 0:
             handleError(self,
                         BrwOSSQueryBrwStatsError,
@@ -290,38 +304,47 @@ class BrwOSS():
             stats_id = self.Bins[self.BrwNameDict[stat]].id
             for bin in bins:
                 self.Bins[self.BrwIdDict[stats_id]].examine(bin)
-        cursor.close()
-        query = "select distinct STATS_ID, BIN from TIMESTAMP_INFO,BRW_STATS_DATA where "
-        if not stat is None:
-            stats_id = self.Bins[self.BrwNameDict[stat]].id
-            query += "STATS_ID=" + str(stats_id) + " AND "
-        query += "TIMESTAMP_INFO.TS_ID=BRW_STATS_DATA.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by STATS_ID, BIN"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
+        if catalog is None:
+            query = "select distinct STATS_ID, BIN from BRW_STATS_DATA where "
+            if not stat is None:
+                stats_id = self.Bins[self.BrwNameDict[stat]].id
+                query += "STATS_ID=" + str(stats_id) + " AND "
+            query += self.Steps.getTS_IDClause()
+            query += " order by STATS_ID, BIN"
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                if self.Debug == True:
+                    self.DebugMessages += "\t%s" % query
+                cursor.execute (query)
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            BrwOSSQueryBrwStatsError,
+                            "BrwOSS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+                # not reached
+            rows = cursor.fetchall()
+            if len(rows) == 0:
+                handleError(self,
+                            BrwOSSQueryBrwStatsError,
+                            "BrwOSS.getBrwStats(): WARNING - No bins data")
+                # not reached
+            for row in rows:
+                id = row["STATS_ID"]
+                bin = row["BIN"]
+                self.Bins[self.BrwIdDict[stats_id]].examine(bin)
             cursor.close()
-            handleError(self,
-                        BrwOSSQueryBrwOSSError,
-                        "BrwOSS.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
-        if len(rows) == 0:
-            handleError(self,
-                        BrwOSSQueryBrwOSSError,
-                        "BrwOSS.getBrwStats(): WARNING - No bins data")
-            # not reached
-        for row in rows:
-            id = row["STATS_ID"]
-            bin = row["BIN"]
-            self.Bins[self.BrwIdDict[stats_id]].examine(bin)
+        else:
+            try:
+                binDict = catalog.bins(self.conn, self.Steps)
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwOSSQueryBrwStatsError,
+                            "BrwOSS.getBrwStats: %s" % str(e))
+                # not reached
+            for Bins in self.Bins:
+                if Bins.id in binDict:
+                    for bin in binDict[Bins.id]:
+                        Bins.examine(bin)
         for Bins in self.Bins:
             Bins.register()
             if (Bins.bins() == 0):
@@ -370,16 +393,25 @@ class BrwOSS():
                         "BrwOSS.getOSTs(): WARNING - No data")
             # not reached
         for row in rows:
-            name = row["OST_NAME"]
-            self.OSTDict[name] = len(self.OSTs)
-            brwost = BrwOST.BrwOST(name=name)
-            if self.DebugModules["BrwOST"] == True:
-                brwost.debug()
-                brwost.debug("HistSeries")
-            self.OSTs.append(brwost)
+            self.addOST(row["OST_NAME"], int(row["OST_ID"]))
         cursor.close()
         return
 
+    def addOST(self, name, ostID=None):
+        """
+        Add an OST to this BrwOSS. getOSTs() does this for each of its rows,
+        and BrwFS.getOSSs() does it from the single query for all the OSSs
+        and OSTs on the file system.
+        """
+        self.OSTDict[name] = len(self.OSTs)
+        brwost = BrwOST.BrwOST(name=name)
+        brwost.ostID = ostID
+        if self.DebugModules["BrwOST"] == True:
+            brwost.debug()
+            brwost.debug("HistSeries")
+        self.OSTs.append(brwost)
+        return(brwost)
+
     def getOST(self, ost=None):
         if ost is None:
             handleError(self,
@@ -424,19 +456,16 @@ class BrwOSS():
             self.DebugMessages += "BrwOSS.getData(): get data from %d/%d to %d/%d" % (begin.sie, begin.ts_id, end.sie, end.ts_id)
         self.end = self.Steps.end
         self.begin = self.Steps.begin
-        query = "SELECT * FROM OSS_INFO,OST_INFO,TIMESTAMP_INFO,BRW_STATS_DATA WHERE "
+        query = "SELECT OST_NAME,STATS_ID,BIN,BRW_STATS_DATA.TS_ID,READ_COUNT,WRITE_COUNT "
+        query += "FROM OSS_INFO,OST_INFO,BRW_STATS_DATA WHERE "
         if not stat is None:
             stats_id = self.Bins[self.BrwNameDict[stat]].id
             query += "STATS_ID=" + str(stats_id) + " AND "
         query += "OSS_INFO.OSS_ID=OST_INFO.OSS_ID AND "
         query += "OST_INFO.OST_ID=BRW_STATS_DATA.OST_ID AND "
         query += "OSS_INFO.HOSTNAME='" + self.name + "' AND "
-        query += "TIMESTAMP_INFO.TS_ID=BRW_STATS_DATA.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query += self.Steps.getTS_IDClause("BRW_STATS_DATA.TS_ID")
+        query += " order by BRW_STATS_DATA.TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -465,7 +494,9 @@ class BrwOSS():
             o = self.OSTs[self.OSTDict[name]]
             id = row['STATS_ID']
             bin = row['BIN']
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             read = int(row['READ_COUNT'])
             write = int(row['WRITE_COUNT'])
             self.register(o, id, bin, sie, read, write)
@@ -31,7 +31,7 @@
 import MySQLdb
 import numpy as np
 
-from pyLMT import Timestamp, HistBins, TimeSteps, HistSeries, defaultErrorHandler
+from pyLMT import Catalog, Timestamp, HistBins, TimeSteps, HistSeries, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -135,6 +135,7 @@ class BrwOST():
                              "HistSeries":False}
         self.ErrorMessages = None
         self.conn = None
+        self.ostID = None
         # Here, and below can get clear_data()ed
         self.begin = None
         self.end = None
@@ -220,10 +221,13 @@ class BrwOST():
             self.Read[Bins.id].setBins(Bins)
             self.Write[Bins.id].setBins(Bins)
 
-    def getBrwStats(self, conn=None, stat=None, bins=None):
+    def getBrwStats(self, conn=None, stat=None, bins=None, catalog=None):
         """
         Get the list of BrwStats using the provided MySQL
-        connection 'conn'.
+        connection 'conn'. If a Catalog.Catalog 'catalog' is provided the
+        BRW_STATS_INFO rows and the bins come from it instead, so there
+        is no scan of BRW_STATS_DATA just to learn the bin values unless
+        the interval is outside the TS_IDs the catalog has already seen.
         """
         if conn is None:
             if self.conn is None:
@@ -237,22 +241,33 @@ class BrwOST():
             self.DebugMessages += "BrwOST.getBrwStats(): get the list of BrwStats on %s" % self.name
         self.end = self.Steps.end
         self.begin = self.Steps.begin
-        query = "SELECT * FROM BRW_STATS_INFO"
-        if not stat is None:
-            query += " where STATS_NAME='" + stat + "'"
-        query += " order by STATS_ID"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
+        if catalog is None:
+            query = "SELECT * FROM BRW_STATS_INFO"
+            if not stat is None:
+                query += " where STATS_NAME='" + stat + "'"
+            query += " order by STATS_ID"
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                if self.Debug == True:
+                    self.DebugMessages += "\t%s" % query
+                cursor.execute (query)
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            BrwOSTQueryBrwOSTError,
+                            "BrwOST.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+                # not reached
+            rows = cursor.fetchall()
             cursor.close()
-            handleError(self,
-                        BrwOSTQueryBrwOSTError,
-                        "BrwOST.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
+        else:
+            try:
+                rows = [row for row in catalog.brwStats(self.conn)
+                        if (stat is None) or (row["STATS_NAME"] == stat)]
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwOSTQueryBrwOSTError,
+                            "BrwOST.getBrwStats: %s" % str(e))
+                # not reached
         if len(rows) == 0:
             handleError(self,
                         BrwOSTQueryBrwOSTError,
@@ -285,38 +300,47 @@ class BrwOST():
             stats_id = self.Bins[self.BrwNameDict[stat]].id
             for bin in bins:
                 self.Bins[self.BrwIdDict[stats_id]].examine(bin)
-        cursor.close()
-        query = "select distinct STATS_ID, BIN from TIMESTAMP_INFO,BRW_STATS_DATA where "
-        if not stat is None:
-            stats_id = self.Bins[self.BrwNameDict[stat]].id
-            query += "STATS_ID=" + str(stats_id) + " AND "
-        query += "TIMESTAMP_INFO.TS_ID=BRW_STATS_DATA.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by STATS_ID, BIN"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
+        if catalog is None:
+            query = "select distinct STATS_ID, BIN from BRW_STATS_DATA where "
+            if not stat is None:
+                stats_id = self.Bins[self.BrwNameDict[stat]].id
+                query += "STATS_ID=" + str(stats_id) + " AND "
+            query += self.Steps.getTS_IDClause()
+            query += " order by STATS_ID, BIN"
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                if self.Debug == True:
+                    self.DebugMessages += "\t%s" % query
+                cursor.execute (query)
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            BrwOSTQueryBrwOSTError,
+                            "BrwOST.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+                # not reached
+            rows = cursor.fetchall()
+            if len(rows) == 0:
+                handleError(self,
+                            BrwOSTQueryBrwOSTError,
+                            "BrwOST.getBrwStats(): WARNING - No bins data")
+                # not reached
+            for row in rows:
+                id = row["STATS_ID"]
+                bin = row["BIN"]
+                self.Bins[self.BrwIdDict[stats_id]].examine(bin)
             cursor.close()
-            handleError(self,
-                        BrwOSTQueryBrwOSTError,
-                        "BrwOST.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
-        if len(rows) == 0:
-            handleError(self,
-                        BrwOSTQueryBrwOSTError,
-                        "BrwOST.getBrwStats(): WARNING - No bins data")
-            # not reached
-        for row in rows:
-            id = row["STATS_ID"]
-            bin = row["BIN"]
-            self.Bins[self.BrwIdDict[stats_id]].examine(bin)
+        else:
+            try:
+                binDict = catalog.bins(self.conn, self.Steps)
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BrwOSTQueryBrwOSTError,
+                            "BrwOST.getBrwStats: %s" % str(e))
+                # not reached
+            for Bins in self.Bins:
+                if Bins.id in binDict:
+                    for bin in binDict[Bins.id]:
+                        Bins.examine(bin)
         for Bins in self.Bins:
             Bins.register()
             if (Bins.bins() == 0):
@@ -401,18 +425,19 @@ class BrwOST():
             self.conn = conn
         if self.Debug == True:
             print "BrwOST.getData(): get data from %d/%d to %d/%d" % (begin.sie, begin.ts_id, end.sie, end.ts_id)
-        query = "SELECT * FROM OST_INFO,TIMESTAMP_INFO,BRW_STATS_DATA WHERE "
+        if self.ostID is None:
+            query = "SELECT STATS_ID,BIN,BRW_STATS_DATA.TS_ID,READ_COUNT,WRITE_COUNT "
+            query += "FROM OST_INFO,BRW_STATS_DATA WHERE "
+            query += "OST_INFO.OST_ID=BRW_STATS_DATA.OST_ID AND "
+            query += "OST_INFO.OST_NAME='" + self.name + "' AND "
+        else:
+            query = "SELECT STATS_ID,BIN,TS_ID,READ_COUNT,WRITE_COUNT FROM BRW_STATS_DATA WHERE "
+            query += "OST_ID=" + str(self.ostID) + " AND "
         if not stat is None:
             stats_id = self.Bins[self.BrwNameDict[stat]].id
             query += "STATS_ID=" + str(stats_id) + " AND "
-        query += "OST_INFO.OST_ID=BRW_STATS_DATA.OST_ID AND "
-        query += "OST_INFO.OST_NAME='" + self.name + "' AND "
-        query += "TIMESTAMP_INFO.TS_ID=BRW_STATS_DATA.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query += self.Steps.getTS_IDClause("BRW_STATS_DATA.TS_ID")
+        query += " order by BRW_STATS_DATA.TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -432,7 +457,9 @@ class BrwOST():
             # not reached
         # Build up the arrays.
         for row in rows:
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             self.register(row['STATS_ID'], row['BIN'], sie, int(row['READ_COUNT']), int(row['WRITE_COUNT']))
         cursor.close()
         self.interpolate()
@@ -30,9 +30,8 @@
 
 import MySQLdb
 import numpy as np
-import numpy.ma as ma
 
-from pyLMT import Counter, CPU, OSS, Timestamp, TimeSteps, Graph, defaultErrorHandler
+from pyLMT import Catalog, Counter, CPU, OSS, Series, TimeSteps, Graph, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -108,7 +107,7 @@ class BulkNoStatsError(BulkError):
 
 #*******************************************************************************
 # Begin class Bulk
-class Bulk():
+class Bulk(object):
     """
     Container class for Bulk I/O data from all OSSs for a file system. There will
     be an OSS object for each OSS in the file system as well as summary data.
@@ -128,6 +127,10 @@ class Bulk():
         self.ErrorMessages = None
         self.conn = None
         self.fsID = None
+        # Keep the derived Bulk series around once it has been worked out
+        self.cacheDerived = True
+        # The dtype for the OST values. See setDtype().
+        self.dtype = None
         # Here, and below can get clear_data()ed
         self.begin = None
         self.end = None
@@ -135,7 +138,7 @@ class Bulk():
         self.OSSDict = {}
         self.Read = Counter.Counter("Bulk read", "count/sec")
         self.Write = Counter.Counter("Bulk write", "count/sec")
-        self.Bulk = Counter.Counter("Bulk", "count/sec")
+        self.Combined = None
         self.ReadHist = None
         self.WriteHist = None
         self.BulkHist = None
@@ -143,8 +146,17 @@ class Bulk():
         self.CPU = None
         self.Steps = None
         self.numOSTs = 0
+        self.OSTIDs = None
+        self.ReadMatrix = None
+        self.WriteMatrix = None
+        self.ReadValid = None
+        self.WriteValid = None
         self.haveData = False
         self.total = 0
+        # The mean and standard deviation across all the OSTs for each
+        # of 'Read' and 'Write', and 'Both' if asked. See aggregate().
+        self.Ave = None
+        self.Sdev = None
 
     def clear_data(self):
         self.begin = None
@@ -153,7 +165,7 @@ class Bulk():
         self.OSSDict = {}
         self.Read = Counter.Counter("Bulk read", "count/sec")
         self.Write = Counter.Counter("Bulk write", "count/sec")
-        self.Bulk = Counter.Counter("Bulk", "count/sec")
+        self.Combined = None
         self.ReadHist = None
         self.WriteHist = None
         self.BulkHist = None
@@ -161,8 +173,17 @@ class Bulk():
         self.CPU = None
         self.Steps = None
         self.numOSTs = 0
+        self.OSTIDs = None
+        self.ReadMatrix = None
+        self.WriteMatrix = None
+        self.ReadValid = None
+        self.WriteValid = None
         self.haveData = False
         self.total = 0
+        # The mean and standard deviation across all the OSTs for each
+        # of 'Read' and 'Write', and 'Both' if asked. See aggregate().
+        self.Ave = None
+        self.Sdev = None
 
     def debug(self, module=None):
         if (module is None) or (module == "Bulk"):
@@ -196,10 +217,12 @@ class Bulk():
             # not reached
         oss.register(ost, sie, read, write)
 
-    def getOSSs(self, conn=None):
+    def getOSSs(self, conn=None, topology=None):
         """
-        Get the list of OSSs that are on this file system using the provided MySQL
-        connection 'conn'.
+        Get the list of OSSs that are on this file system, and the OSTs on
+        each, using the provided MySQL connection 'conn'. The whole tree
+        comes from the one Catalog.getTopology() query, or from 'topology'
+        if the caller already has that list in hand.
         """
         if conn is None:
             if self.conn is None:
@@ -210,41 +233,48 @@ class Bulk():
         else:
             self.conn = conn
         if self.Debug == True:
-            self.DebugMessages += "Bulk.getOSTs(): get the list of OSTs on OSS %s" % self.name
-        query = "SELECT * FROM OSS_INFO"
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            if self.Debug == True:
-                self.DebugMessages += "\t%s" % query
-            cursor.execute (query)
-        except MySQLdb.Error, e:
-            cursor.close()
-            handleError(self,
-                        BulkQueryOSSsError,
-                        "Bulk.getOSSs: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
-            # not reached
-        rows = cursor.fetchall()
-        if len(rows) == 0:
+            self.DebugMessages += "Bulk.getOSSs(): get the list of OSSs and OSTs on %s" % self.name
+        if topology is None:
+            try:
+                topology = Catalog.getTopology(self.conn)
+            except Catalog.CatalogError, e:
+                handleError(self,
+                            BulkQueryOSSsError,
+                            "Bulk.getOSSs: %s" % str(e))
+                # not reached
+        if len(topology) == 0:
             handleError(self,
                         BulkQueryOSSsError,
                         "Bulk.getOSSs(): WARNING - No data")
             # not reached
-        for row in rows:
-            name = row["HOSTNAME"]
-            self.OSSDict[name] = len(self.OSSs)
-            oss = OSS.OSS(fs=self.name, name=name)
-            if self.Debug == True:
-                oss.debug()
-                oss.debug("OST")
-            # If I got all the OST_INFO rows at once I could do this all at once
-            # rather than initiating a separate query for each hostname.
-            self.OSSs.append(oss)
-        cursor.close()
-        for oss in self.OSSs:
-            oss.getOSTs(conn)
-            self.numOSTs += oss.getNumOSTs()
+        for (oss_id, hostname, ost_id, ost_name) in topology:
+            if not hostname in self.OSSDict:
+                self.OSSDict[hostname] = len(self.OSSs)
+                oss = OSS.OSS(fs=self.name, name=hostname)
+                oss.ossID = oss_id
+                oss.setDtype(self.dtype)
+                oss.conn = self.conn
+                if self.Debug == True:
+                    oss.debug()
+                    oss.debug("OST")
+                self.OSSs.append(oss)
+            oss = self.OSSs[self.OSSDict[hostname]]
+            if not ost_name is None:
+                oss.addOST(ost_name, ost_id)
+                self.numOSTs += 1
         return
 
+    def setDtype(self, dtype):
+        """
+        Keep the values of the series here in 'dtype', eg. the 'dtype' of
+        the LMTConfig record for the file system, rather than in
+        Series.DefaultDtype (see Series.setDtype()).
+        The OSS and file system sums stay in Series.SumDtype.
+        """
+        self.dtype = dtype
+        for oss in self.OSSs:
+            oss.setDtype(dtype)
+
     def getNumOSTs(self):
         return(self.numOSTs)
 
@@ -286,6 +316,24 @@ class Bulk():
                     BulkNoSuchOSTError,
                     "Bulk.getOST(): Warning - No OST %s on FS %s" % (oss, self.name))
 
+    def getBulk(self):
+        """
+        The read plus write series for the file system, summed up from
+        self.Read and self.Write when it's wanted rather than aggregated
+        or registered along with them. See OST.getOST().
+        """
+        if not self.Combined is None:
+            return(self.Combined)
+        Combined = Counter.sumOf("Bulk", "count/sec", self.Read, self.Write)
+        if (self.cacheDerived == True) and (self.Read.count > 0):
+            self.Combined = Combined
+        return(Combined)
+
+    Bulk = property(getBulk)
+
+    def clearDerived(self):
+        self.Combined = None
+
     def setSteps(self, Steps):
         self.Steps = Steps
         self.begin = self.Steps.begin
@@ -294,18 +342,67 @@ class Bulk():
             oss.setSteps(Steps)
         self.Read.setSteps(Steps)
         self.Write.setSteps(Steps)
-        self.Bulk.setSteps(Steps)
+        self.clearDerived()
 
-    def getData(self):
+    def setMatrices(self):
+        """
+        Allocate (numOSTs, numSteps) arrays for the read and write OST
+        values, along with their validity bitmaps (see Series.newValid()),
+        and make each OST's Counter storage a view onto its row. Anything
+        scattered into the matrices then shows up in the OST objects without
+        any per-observation register() calls. The row for each OST follows
+        the order of self.OSSs and oss.OSTs, and self.OSTIDs holds the
+        OST_ID for each row.
+        """
+        if self.Steps is None:
+            handleError(self,
+                        BulkNoStepsError,
+                        "Bulk.setMatrices(): Warning - No TimeSteps object")
+            # not reached
+        numSteps = self.Steps.steps()
+        self.OSTIDs = np.zeros(self.numOSTs, dtype=np.int64)
+        shape = (self.numOSTs, numSteps)
+        self.ReadMatrix = np.empty(shape, dtype=np.float64)
+        self.ReadValid = Series.newValid(shape)
+        self.WriteMatrix = np.empty(shape, dtype=np.float64)
+        self.WriteValid = Series.newValid(shape)
+        row = 0
+        for oss in self.OSSs:
+            for ost in oss.OSTs:
+                if ost.ostID is None:
+                    handleError(self,
+                                BulkNoSuchOSTError,
+                                "Bulk.setMatrices(): Warning - No OST_ID for OST %s" % ost.name)
+                    # not reached
+                self.OSTIDs[row] = ost.ostID
+                ost.Read.setStorage(self.ReadMatrix[row], self.ReadValid[row])
+                ost.Write.setStorage(self.WriteMatrix[row], self.WriteValid[row])
+                ost.clearDerived()
+                row += 1
+
+    def getData(self, columnar=False, chunk=None, pool=None):
         """
         Get data from the MySQL connection self.conn for the interval
         from Steps.begin to Steps.end. begin and end are themselves already
         Timestamp objects, and are required. The self.conn was already registered
         when we called self.getOSSs()
+
+        With 'columnar' set the rows are handled as whole arrays rather
+        than one at a time. See getColumnarData(). Setting 'chunk' (a
+        number of rows) implies 'columnar', and streams the result from
+        the server that many rows at a time. Providing a Pool.Pool 'pool'
+        also implies 'columnar', and spreads the OSTs across its
+        connections. See getParallelData().
         """
         if self.Steps is None:
             print "Bulk.getData(): Error - You must supply a TimeSteps oject first"
             return
+        if not pool is None:
+            self.getParallelData(pool, chunk)
+            return
+        if (columnar == True) or (not chunk is None):
+            self.getColumnarData(chunk)
+            return
         if self.conn is None:
             handleError(self,
                         BulkNoConnectionError,
@@ -314,14 +411,12 @@ class Bulk():
         if self.Debug == True:
             self.Debug
             self.DebugMessages += "Bulk.getData(): get data from %d/%d to %d/%d" % (selfSteps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        query = "SELECT * FROM OSS_INFO,OST_INFO,TIMESTAMP_INFO,OST_DATA WHERE "
+        query = "SELECT HOSTNAME,OST_NAME,OST_DATA.TS_ID,READ_BYTES,WRITE_BYTES "
+        query += "FROM OSS_INFO,OST_INFO,OST_DATA WHERE "
         query += "OSS_INFO.OSS_ID=OST_INFO.OSS_ID AND "
         query += "OST_INFO.OST_ID=OST_DATA.OST_ID AND "
-        query += "TIMESTAMP_INFO.TS_ID=OST_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query += self.Steps.getTS_IDClause("OST_DATA.TS_ID")
+        query += " order by OST_DATA.TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -350,7 +445,9 @@ class Bulk():
             # not reached
             oss = self.OSSs[self.OSSDict[oss_name]]
             ost = oss.getOST(ost_name)
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             read = float(row['READ_BYTES'])
             write = float(row['WRITE_BYTES'])
             self.register(oss, ost, sie, read, write)
@@ -358,25 +455,212 @@ class Bulk():
         self.setData()
         return
 
+    def getColumnarData(self, chunk=None):
+        """
+        Get the same data as getData(), but only the (OST_ID, TS_ID,
+        READ_BYTES, WRITE_BYTES) columns, as plain tuples. The whole result
+        is converted to one array and scattered into the matrices from
+        setMatrices() with a single fancy-index assignment per matrix, so
+        the OST objects end up holding the data without any per-row
+        Python work.
+
+        If 'chunk' is given the query uses a server-side cursor and the
+        rows are fetched and scattered 'chunk' at a time. Memory use is
+        then the matrices plus one chunk, however long the interval.
+        Interpolation and differentiation happen once, in setData(), after
+        the last chunk.
+        """
+        if self.Steps is None:
+            handleError(self,
+                        BulkNoStepsError,
+                        "Bulk.getColumnarData(): Warning - No TimeSteps object")
+            # not reached
+        if self.conn is None:
+            handleError(self,
+                        BulkNoConnectionError,
+                        "Bulk.getColumnarData(): Error - Please provide a MySQL connection")
+            # not reached
+        self.setMatrices()
+        count = self.fetchColumnar(self.conn, chunk=chunk)
+        if count == 0:
+            handleError(self,
+                        BulkQueryError,
+                        "Bulk.getColumnarData(): WARNING - No data")
+            # not reached
+        self.setData()
+        return
+
+    def getParallelData(self, pool, chunk=None):
+        """
+        Get the same data as getColumnarData(), but with the OSTs dealt
+        out across the connections of the Pool.Pool 'pool'. Each worker
+        queries for its own OSTs and scatters the rows into its own rows
+        of the shared matrices, so there is nothing to merge afterwards.
+        """
+        if self.Steps is None:
+            handleError(self,
+                        BulkNoStepsError,
+                        "Bulk.getParallelData(): Warning - No TimeSteps object")
+            # not reached
+        self.setMatrices()
+        counts = pool.map(self.fetchColumnar, pool.partition(self.OSTIDs), chunk, pool.lock)
+        if sum(counts) == 0:
+            handleError(self,
+                        BulkQueryError,
+                        "Bulk.getParallelData(): WARNING - No data")
+            # not reached
+        self.setData()
+        return
+
+    def fetchColumnar(self, conn, ostIDs=None, chunk=None, lock=None):
+        """
+        Run the columnar query on 'conn', for just the OSTs in 'ostIDs'
+        if that is given, and scatter the rows into the matrices. If
+        'lock' is given it is held during each scatter. Returns the
+        number of rows seen.
+        """
+        query = "SELECT OST_ID,TS_ID,READ_BYTES,WRITE_BYTES FROM OST_DATA WHERE "
+        if not ostIDs is None:
+            query += "OST_ID IN (" + ",".join([str(id) for id in ostIDs]) + ") AND "
+        query += self.Steps.getTS_IDClause()
+        try:
+            if chunk is None:
+                cursor = conn.cursor()
+            else:
+                cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+            if self.Debug == True:
+                self.DebugMessages += "\t%s" % query
+            cursor.execute (query)
+        except MySQLdb.Error, e:
+            cursor.close()
+            handleError(self,
+                        BulkQueryError,
+                        "Bulk.fetchColumnar: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+            # not reached
+        count = 0
+        while True:
+            if chunk is None:
+                rows = cursor.fetchall()
+            else:
+                rows = cursor.fetchmany(chunk)
+            if len(rows) == 0:
+                break
+            count += len(rows)
+            data = np.array(rows, dtype=np.float64)
+            del rows
+            if lock is None:
+                self.scatterRows(data)
+            else:
+                lock.acquire()
+                try:
+                    self.scatterRows(data)
+                finally:
+                    lock.release()
+            if chunk is None:
+                break
+        cursor.close()
+        return(count)
+
+    def scatterRows(self, data):
+        """
+        'data' is an array of (OST_ID, TS_ID, READ_BYTES, WRITE_BYTES) rows.
+        Put each value in its place in the matrices from setMatrices().
+        """
+        (ost_index, ost_valid) = TimeSteps.find_indices(self.OSTIDs, data[:,0].astype(np.int64))
+        step_index = self.Steps.getTS_IDIndex(data[:,1].astype(np.int64))
+        valid = np.logical_and(ost_valid, step_index >= 0)
+        if (not np.all(valid)) and (self.Debug == True):
+            self.DebugMessages += "Bulk.scatterRows(): Warning - ignoring %d rows with an unknown OST_ID or TS_ID" % np.sum(~valid)
+        ost_index = ost_index[valid]
+        step_index = step_index[valid]
+        read = data[valid,2]
+        write = data[valid,3]
+        self.ReadMatrix[ost_index, step_index] = read
+        self.WriteMatrix[ost_index, step_index] = write
+        Series.markValid(self.ReadValid, (ost_index, step_index))
+        Series.markValid(self.WriteValid, (ost_index, step_index))
+
     def setData(self):
         if self.Debug == True:
             self.DebugMessages += "Bulk.setData(): file system %s" % self.name
+        interpolated = False
+        if not self.ReadMatrix is None:
+            self.interpolate()
+            interpolated = True
         for oss in self.OSSs:
-            oss.setData(begin=self.begin, end=self.end)
-            if self.Read.count == 0:
-                self.Read.copy(oss.Read)
-            else:
-                self.Read.add(oss.Read)
-            if self.Write.count == 0:
-                self.Write.copy(oss.Write)
-            else:
-                self.Write.add(oss.Write)
-            if self.Bulk.count == 0:
-                self.Bulk.copy(oss.OSS)
-            else:
-                self.Bulk.add(oss.OSS)
+            oss.setData(begin=self.begin, end=self.end, interpolated=interpolated, aggregated=True)
+        self.aggregate()
         self.haveData = True
 
+    def aggregate(self, modes=('Read', 'Write')):
+        """
+        Produce the OSS and file system Read and Write series, and the
+        mean and standard deviation across OSTs that go with them, from
+        one Counter.aggregateMatrix() reduction each over the
+        (numOSTs, numSteps) matrices. If the data wasn't gathered into
+        matrices in the first place (see getData()) they are stacked up
+        from the OST Counters here. The combined series are derived from
+        these (see getBulk()), so 'Both' only needs to be in 'modes' for
+        its mean and standard deviation.
+        """
+        OSTs = []
+        Offsets = [0]
+        for oss in self.OSSs:
+            OSTs += oss.OSTs
+            Offsets.append(len(OSTs))
+        if len(OSTs) == 0:
+            return
+        if self.ReadMatrix is None:
+            ReadMatrix = np.array([ost.Read.Data for ost in OSTs])
+            WriteMatrix = np.array([ost.Write.Data for ost in OSTs])
+        else:
+            ReadMatrix = self.ReadMatrix
+            WriteMatrix = self.WriteMatrix
+        for mode in modes:
+            if mode == 'Read':
+                (Matrix, series) = (ReadMatrix, self.Read)
+            elif mode == 'Write':
+                (Matrix, series) = (WriteMatrix, self.Write)
+            else:
+                (Matrix, series) = (ReadMatrix + WriteMatrix, None)
+            (Sums, Aves, Sdevs, Total, Ave, Sdev) = Counter.aggregateMatrix(Matrix, Offsets)
+            for index, oss in enumerate(self.OSSs):
+                oss.setAggregate(mode, Sums[index], Aves[index], Sdevs[index])
+            if not series is None:
+                series.setDtype(Series.SumDtype)
+                series.Values = Total
+                series.stats()
+                self.clearDerived()
+            if self.Ave is None:
+                self.Ave = {}
+                self.Sdev = {}
+            self.Ave[mode] = Ave
+            self.Sdev[mode] = Sdev
+
+    def interpolate(self):
+        """
+        When the OST values are rows of the (numOSTs, numSteps) matrices
+        interpolate and differentiate all of them at once with
+        Counter.interpolateMatrix() rather than one Counter at a time.
+        Each OST's Counters then just get their own row of the Missing
+        and Resets results.
+        """
+        if self.ReadMatrix is None:
+            handleError(self,
+                        BulkNoStepsError,
+                        "Bulk.interpolate(): Warning - No data matrices")
+            # not reached
+        (ReadMissing, ReadResets) = Counter.interpolateMatrix(self.ReadMatrix, self.ReadValid, self.Steps)
+        (WriteMissing, WriteResets) = Counter.interpolateMatrix(self.WriteMatrix, self.WriteValid, self.Steps)
+        OSTs = [ost for oss in self.OSSs for ost in oss.OSTs]
+        self.ReadMatrix = Counter.compactMatrix(self.ReadMatrix, self.ReadValid, [ost.Read for ost in OSTs])
+        self.WriteMatrix = Counter.compactMatrix(self.WriteMatrix, self.WriteValid, [ost.Write for ost in OSTs])
+        for row, ost in enumerate(OSTs):
+            ost.Missing = ReadMissing[row]
+            ost.Read.setInterpolated(ReadMissing[row], ReadResets[row])
+            ost.Write.setInterpolated(WriteMissing[row], WriteResets[row])
+            ost.clearDerived()
+
     def getCPU(self):
         """
         """
@@ -388,13 +672,9 @@ class Bulk():
                         BulkNoConnectionError,
                         "Bulk.getCPU(): Error - Please provide a MySQL connection")
             # not reached
-        query = "SELECT HOSTNAME,TIMESTAMP,PCT_CPU FROM TIMESTAMP_INFO,OSS_DATA,OSS_INFO WHERE "
+        query = "SELECT HOSTNAME,OSS_DATA.TS_ID,PCT_CPU FROM OSS_DATA,OSS_INFO WHERE "
         query += "OSS_DATA.OSS_ID=OSS_INFO.OSS_ID AND "
-        query += "TIMESTAMP_INFO.TS_ID=OSS_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "'"
+        query += self.Steps.getTS_IDClause("OSS_DATA.TS_ID")
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -412,34 +692,21 @@ class Bulk():
                         BulkQueryCPUError,
                         "Bulk.getCPU(): WARNING - No data")
             # not reached
-        # If we are getting ops data as well, we hope that the set of timestamps
-        # for which there is PCT_CPU data is the same as for OPS. There may be
-        # missing or extra values or both. Interpolation should handle a few
-        # missing, but handle the extras gracefully. Obviously, if there is no
-        # ops data then we need to get the TimeSteps.
-        if self.Steps is None:
-            Steps = TimeSteps.TimeSteps()
-            if self.Debug == True:
-                Steps.debug()
-            for row in rows:
-                Steps.examine(row['TIMESTAMP'], Timestamp.calc_sie(row['TIMESTAMP']), row['TS_ID'])
-            Steps.register()
-            if (Steps.steps() == 0):
-                handleError(self,
-                            BulkQueryCPUError,
-                            "Bulk.getData(): Warning - No steps")
-                # not reached
-            self.setSteps(Steps)
+        # We hope that the set of timestamps for which there is PCT_CPU data
+        # is the same as for the OST data. There may be missing or extra
+        # values or both. Interpolation should handle a few missing, and
+        # the extras are skipped below.
         # In the second phase we actually build up the array
         for oss in self.OSSs:
             oss.CPU = CPU.CPU(oss.name+" CPU utilization")
+            oss.CPU.setDtype(self.dtype)
             if oss.Debug == True:
                 oss.CPU.debug()
             oss.CPU.setSteps(self.Steps)
             oss.CPU.initCount()
         for row in rows:
             oss = self.OSSs[self.OSSDict[row['HOSTNAME']]]
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
             if sie is None:
                 # or should I throw an exception?
                 continue
@@ -452,20 +719,17 @@ class Bulk():
         # Note also that self.CPU never calls interpolate(). the call
         # to stats() need to come after the OSS.CPU values have been
         # accumulated.
-        self.CPU.Values = np.zeros_like(self.Steps, dtype=np.float64)
-        # I don't initCount here because the aggregate CPU is going to
-        # get initialized by the first oss.CPU that  is added.
+        # I don't initCount, or give it Values, here because the aggregate
+        # CPU is going to get initialized by the first oss.CPU that is added.
         for oss in self.OSSs:
             oss.setCPU()
             self.CPU.add(oss.CPU)
         self.haveData = True
 
     def quickRegister(self, sie, read, write, cpu):
-        index = self.Steps.getIndex(sie)
-        self.Read.Values[index] = read
-        self.Write.Values[index] = write
-        self.Bulk.Values[index] = read + write
-        self.CPU.Values[index] = cpu
+        self.Read.register(sie, read)
+        self.Write.register(sie, write)
+        self.CPU.register(sie, cpu)
 
     def getQuickData(self, conn=None):
         """
@@ -483,13 +747,9 @@ class Bulk():
             self.conn = conn
         if self.Debug == True:
             self.DebugMessages += "Bulk.getQuickData(): get data from %d/%d to %d/%d" % (self.Steps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        query = "SELECT * FROM FILESYSTEM_AGGREGATE,TIMESTAMP_INFO WHERE "
-        query += "TIMESTAMP_INFO.TS_ID=FILESYSTEM_AGGREGATE.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query = "SELECT TS_ID,READ_RATE,WRITE_RATE,PCT_CPU FROM FILESYSTEM_AGGREGATE WHERE "
+        query += self.Steps.getTS_IDClause()
+        query += " order by TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -511,7 +771,9 @@ class Bulk():
         self.CPU.setSteps(self.Steps)
         # Build up the arrays.
         for row in rows:
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             read = float(row['READ_RATE'])
             write = float(row['WRITE_RATE'])
             cpu = float(row['PCT_CPU'])
@@ -564,9 +826,9 @@ class Bulk():
             return(None)
         values = "(" + str(self.fsID) + ","
         values += str(ts_id) + ","
-        values += str(self.Read.Values[index]) + ","
-        values += str(self.Write.Values[index]) + ","
-        values += str(self.CPU.Values[index]) + ")"
+        values += str(self.Read.Data[index]) + ","
+        values += str(self.Write.Data[index]) + ","
+        values += str(self.CPU.Data[index]) + ")"
         return(values)
 
     def doInsert(self, insert):
@@ -650,21 +912,18 @@ class Bulk():
             minval = float(bb['minval'])
         if 'maxval' in bb:
             maxval = float(bb['maxval'])
-        minval *= np.max(self.Bulk.Values)/100.0
-        maxval *= np.max(self.Bulk.Values)/100.0
+        Values = self.Bulk.Values
+        minval *= np.max(Values)/100.0
+        maxval *= np.max(Values)/100.0
         if self.Debug == True:
             self.DebugMessages += "cpu[%.0f,%.0f],values[%.0f,%.0f]" % (mincpu,
                                                         maxcpu,
                                                         minval,
                                                         maxval)
-        self.CPU.Values = ma.array(self.CPU.Values)
-        self.CPU.Values.mask = False
-        self.Write.Values = ma.array(self.Write.Values)
-        self.Write.Values.mask = False
-        self.Read.Values = ma.array(self.Read.Values)
-        self.Read.Values.mask = False
-        self.Bulk.Values = ma.array(self.Bulk.Values)
-        self.Bulk.Values.mask = False
+        for series in (self.CPU, self.Write, self.Read):
+            series.setValid()
+        self.clearDerived()
+        Values = self.Bulk.Values
         if mincpu < maxcpu:
             cpu_indices = np.logical_or((self.CPU.Values < mincpu),
                                         (self.CPU.Values > maxcpu))
@@ -672,19 +931,19 @@ class Bulk():
             cpu_indices = np.logical_and((self.CPU.Values < mincpu),
                                          (self.CPU.Values > maxcpu))
         if minval < maxval:
-            val_indices = np.logical_or((self.Bulk.Values < minval),
-                                        (self.Bulk.Values > maxval))
+            val_indices = np.logical_or((Values < minval),
+                                        (Values > maxval))
         else:
-            val_indices = np.logical_and((self.Bulk.Values < minval),
-                                         (self.Bulk.Values > maxval))
+            val_indices = np.logical_and((Values < minval),
+                                         (Values > maxval))
         if (mincpu < maxcpu) and (minval < maxval):
             indices = np.logical_or(cpu_indices, val_indices)
         else:
             indices = np.logical_and(cpu_indices, val_indices)
-        self.CPU.Values.mask = indices
-        self.Read.Values.mask = indices
-        self.Write.Values.mask = indices
-        self.Bulk.Values.mask = indices
+        # The derived Bulk series is masked wherever Read or Write is.
+        for series in (self.CPU, self.Read, self.Write):
+            series.setValid(~indices)
+        self.clearDerived()
 
 # End of class Bulk
 #*******************************************************************************
@@ -29,9 +29,8 @@
 """
 
 import numpy as np
-import numpy.ma as ma
 
-from pyLMT import TimeSeries, defaultErrorHandler
+from pyLMT import Series, TimeSeries, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -110,11 +109,12 @@ class CPU(TimeSeries.TimeSeries):
                         CPUNoStepsError,
                         "CPU.add(): Warning - adding with zero length TimeSteps object")
             # not reached
-        if ma.count_masked(cpu.Values) != 0:
+        if cpu.countMissing() != 0:
             print "%s still has masked values" % cpu.name
-        if self.Count == None:
+        # The average is accumulated in Series.SumDtype, see Series.add()
+        self.setDtype(Series.SumDtype)
+        if self.Count is None:
             self.Count = cpu.Count.copy()
-        if self.Values == None:
             self.Values = cpu.Values.copy()
         else:
             self.Values = (self.Values*self.Count + cpu.Values*cpu.Count)/(self.Count + cpu.Count)
@@ -0,0 +1,405 @@
+"""
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+"""
+
+import os
+import time
+import cPickle
+import MySQLdb
+
+from pyLMT import defaultErrorHandler
+
+from _pylmt_exceptions import Error
+
+handleError = defaultErrorHandler
+
+class CatalogError(Error):
+    """
+    Generic Error for problems with the catalog of OSSs, OSTs, and
+    the like.
+    """
+
+class CatalogNoConnectionError(CatalogError):
+    """
+    You need a MySQL connection to query the catalog tables.
+    """
+
+class CatalogQueryError(CatalogError):
+    """
+    Something went wrong while trying to query the DB for the catalog
+    tables.
+    """
+
+class CatalogNoSuchEntryError(CatalogError):
+    """
+    The cache only knows about the entries in Catalog.Entries.
+    """
+
+# The catalog tables change when the file system is reconfigured, which
+# is rare, so one day is a reasonable default lifetime for a cached copy.
+DEFAULT_CATALOG_DIR = os.path.expanduser('~/.lmt/catalog')
+DEFAULT_CATALOG_TTL = 24*60*60
+# A refresh of the bins only looks at this many of the most recent
+# TS_IDs of BRW_STATS_DATA (a day of 5 second steps) rather than its
+# whole history. An interval outside every window seen so far gets its
+# own bounded query, see Catalog.bins().
+BINS_WINDOW = 24*60*12
+
+#*******************************************************************************
+def getTopology(conn):
+    """
+    Get the whole OSS -> OST tree for the file system with one query
+    rather than one per OSS. The result is a list of
+    (OSS_ID, HOSTNAME, OST_ID, OST_NAME) tuples ordered by OSS_ID and then
+    OST_ID. An OSS with no OSTs appears once with None for its OST_ID and
+    OST_NAME.
+    """
+    if conn is None:
+        raise CatalogNoConnectionError("Catalog.getTopology(): Error - No connection to MySQL DB")
+    query = "SELECT OSS_INFO.OSS_ID,HOSTNAME,OST_ID,OST_NAME FROM OSS_INFO "
+    query += "LEFT JOIN OST_INFO ON OSS_INFO.OSS_ID=OST_INFO.OSS_ID "
+    query += "order by OSS_INFO.OSS_ID,OST_INFO.OST_ID"
+    try:
+        cursor = conn.cursor()
+        cursor.execute (query)
+        rows = cursor.fetchall()
+    except MySQLdb.Error, e:
+        cursor.close()
+        raise CatalogQueryError("Catalog.getTopology: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+    cursor.close()
+    topology = []
+    for row in rows:
+        (oss_id, hostname, ost_id, ost_name) = row
+        if not ost_id is None:
+            ost_id = int(ost_id)
+        topology.append((int(oss_id), hostname, ost_id, ost_name))
+    return(topology)
+
+#*******************************************************************************
+def getOperations(conn):
+    """
+    Get the OPERATION_INFO table. The result is a list of dicts with
+    the OPERATION_ID, OPERATION_NAME, and UNITS of each metadata
+    operation, ordered by OPERATION_ID.
+    """
+    if conn is None:
+        raise CatalogNoConnectionError("Catalog.getOperations(): Error - No connection to MySQL DB")
+    query = "SELECT OPERATION_ID,OPERATION_NAME,UNITS FROM OPERATION_INFO "
+    query += "order by OPERATION_ID"
+    try:
+        cursor = conn.cursor()
+        cursor.execute (query)
+        rows = cursor.fetchall()
+    except MySQLdb.Error, e:
+        cursor.close()
+        raise CatalogQueryError("Catalog.getOperations: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+    cursor.close()
+    operations = []
+    for (op_id, name, units) in rows:
+        operations.append({'OPERATION_ID' : int(op_id),
+                           'OPERATION_NAME' : name,
+                           'UNITS' : units})
+    return(operations)
+
+#*******************************************************************************
+def getBrwStats(conn):
+    """
+    Get the BRW_STATS_INFO table. The result is a list of dicts with
+    the STATS_ID, STATS_NAME, DESCRIPTION, and UNITS of each brw_stats
+    histogram, ordered by STATS_ID.
+    """
+    if conn is None:
+        raise CatalogNoConnectionError("Catalog.getBrwStats(): Error - No connection to MySQL DB")
+    query = "SELECT STATS_ID,STATS_NAME,DESCRIPTION,UNITS FROM BRW_STATS_INFO "
+    query += "order by STATS_ID"
+    try:
+        cursor = conn.cursor()
+        cursor.execute (query)
+        rows = cursor.fetchall()
+    except MySQLdb.Error, e:
+        cursor.close()
+        raise CatalogQueryError("Catalog.getBrwStats: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+    cursor.close()
+    stats = []
+    for (stats_id, name, description, units) in rows:
+        stats.append({'STATS_ID' : int(stats_id),
+                      'STATS_NAME' : name,
+                      'DESCRIPTION' : description,
+                      'UNITS' : units})
+    return(stats)
+
+#*******************************************************************************
+def getBins(conn, bounds=None):
+    """
+    Get the distinct bins seen for each brw_stats histogram in the
+    TS_ID range 'bounds', a (lo, hi) pair, or in the last BINS_WINDOW
+    TS_IDs that have brw_stats data if it is None. The result is a dict
+    with 'bins' mapping STATS_ID to the sorted list of its BIN values,
+    and 'spans', the list of TS_ID ranges the bins were taken from.
+    """
+    if conn is None:
+        raise CatalogNoConnectionError("Catalog.getBins(): Error - No connection to MySQL DB")
+    if bounds is None:
+        query = "SELECT MAX(TS_ID) FROM BRW_STATS_DATA"
+        try:
+            cursor = conn.cursor()
+            cursor.execute (query)
+            row = cursor.fetchone()
+        except MySQLdb.Error, e:
+            cursor.close()
+            raise CatalogQueryError("Catalog.getBins: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+        cursor.close()
+        if (row is None) or (row[0] is None):
+            return({'bins' : {}, 'spans' : []})
+        hi = int(row[0])
+        bounds = (max(hi - BINS_WINDOW, 0), hi)
+    query = "SELECT DISTINCT STATS_ID,BIN FROM BRW_STATS_DATA WHERE "
+    query += "TS_ID BETWEEN %d AND %d " % bounds
+    query += "order by STATS_ID,BIN"
+    try:
+        cursor = conn.cursor()
+        cursor.execute (query)
+        rows = cursor.fetchall()
+    except MySQLdb.Error, e:
+        cursor.close()
+        raise CatalogQueryError("Catalog.getBins: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+    cursor.close()
+    bins = {}
+    for (stats_id, bin) in rows:
+        stats_id = int(stats_id)
+        if not stats_id in bins:
+            bins[stats_id] = []
+        bins[stats_id].append(int(bin))
+    return({'bins' : bins, 'spans' : [bounds]})
+
+#*******************************************************************************
+def mergeBins(old, new):
+    """
+    The union of two getBins() results. A bin that has been seen once
+    stays in the list, and overlapping or adjacent spans are joined.
+    """
+    bins = {}
+    for part in (old['bins'], new['bins']):
+        for (stats_id, values) in part.items():
+            bins[stats_id] = sorted(set(bins.get(stats_id, [])) | set(values))
+    spans = []
+    for (lo, hi) in sorted(old['spans'] + new['spans']):
+        if (len(spans) > 0) and (lo <= spans[-1][1] + 1):
+            spans[-1] = (spans[-1][0], max(hi, spans[-1][1]))
+        else:
+            spans.append((lo, hi))
+    return({'bins' : bins, 'spans' : spans})
+
+#*******************************************************************************
+def covers(spans, bounds):
+    """
+    Whether the TS_ID range 'bounds' lies inside one of the 'spans'.
+    """
+    for (lo, hi) in spans:
+        if (lo <= bounds[0]) and (bounds[1] <= hi):
+            return(True)
+    return(False)
+
+#*******************************************************************************
+# Begin class Catalog
+class Catalog:
+    """
+    A persistent, on-disk cache of the slow-changing catalog tables for
+    one file system's LMT DB. Each entry is fetched from the DB the first
+    time it is asked for and then served from the cache file until it is
+    older than the TTL or is explicitly invalidated. The cache file is
+    keyed by the DB host, port, and name, so different file systems never
+    share entries.
+    """
+    Entries = {'topology' : getTopology,
+               'operations' : getOperations,
+               'brwstats' : getBrwStats,
+               'bins' : getBins}
+    # A refreshed entry is combined with the cached one rather than
+    # replacing it for these.
+    Merges = {'bins' : mergeBins}
+
+    def __init__(self, fsrc, path=None, ttl=None):
+        """
+        fsrc is the file system record from LMTConfig.filesystem(). Its
+        optional 'catalog_dir' and 'catalog_ttl' fields override the default
+        directory and lifetime (in seconds) of the cache.
+        """
+        self.Debug = False
+        self.DebugMessages = None
+        self.ErrorMessages = None
+        self.conn = None
+        if 'conn' in fsrc:
+            self.conn = fsrc['conn']
+        if path is None:
+            if 'catalog_dir' in fsrc:
+                path = fsrc['catalog_dir']
+            else:
+                path = DEFAULT_CATALOG_DIR
+        if ttl is None:
+            if 'catalog_ttl' in fsrc:
+                ttl = int(fsrc['catalog_ttl'])
+            else:
+                ttl = DEFAULT_CATALOG_TTL
+        self.ttl = ttl
+        self.key = (fsrc['dbhost'], str(fsrc['dbport']), fsrc['dbname'])
+        self.path = os.path.join(path, "%s_%s_%s.cache" % self.key)
+        self.Cache = None
+        self.queries = 0
+
+    def debug(self, module=None):
+        if (module is None) or (module == "Catalog"):
+            self.Debug = not self.Debug
+        if self.Debug == True:
+            self.DebugMessages = ''
+        else:
+            self.DebugMessages = None
+
+    def load(self):
+        """
+        Read the cache file. A missing, unreadable, or mismatched file is
+        the same as an empty cache.
+        """
+        self.Cache = {}
+        try:
+            f = open(self.path, 'rb')
+            try:
+                cache = cPickle.load(f)
+            finally:
+                f.close()
+        except (IOError, EOFError, ValueError, cPickle.UnpicklingError):
+            return
+        if (type(cache) is dict) and (cache.get('key') == self.key):
+            self.Cache = cache['entries']
+
+    def save(self):
+        """
+        Write the cache file via a temporary file and a rename so that
+        concurrent readers never see a partial file. Failing to save is
+        not an error, the next run will just query the DB again.
+        """
+        tmp = "%s.%d" % (self.path, os.getpid())
+        try:
+            dir = os.path.dirname(self.path)
+            if not os.path.isdir(dir):
+                os.makedirs(dir)
+            f = open(tmp, 'wb')
+            try:
+                cPickle.dump({'key' : self.key, 'entries' : self.Cache}, f,
+                             cPickle.HIGHEST_PROTOCOL)
+            finally:
+                f.close()
+            os.rename(tmp, self.path)
+        except (IOError, OSError), e:
+            if self.Debug == True:
+                self.DebugMessages += "Catalog.save(): could not write %s: %s\n" % (self.path, str(e))
+
+    def get(self, entry, conn=None):
+        """
+        Return the named entry, from the cache if it is fresh and from
+        the DB (refreshing the cache) otherwise.
+        """
+        if not entry in self.Entries:
+            handleError(self,
+                        CatalogNoSuchEntryError,
+                        "Catalog.get(): Error - No catalog entry %s" % entry)
+            # not reached
+        if not conn is None:
+            self.conn = conn
+        if self.Cache is None:
+            self.load()
+        if entry in self.Cache:
+            (stamp, value) = self.Cache[entry]
+            if time.time() - stamp < self.ttl:
+                return(value)
+        if self.conn is None:
+            handleError(self,
+                        CatalogNoConnectionError,
+                        "Catalog.get(): Error - No connection to MySQL DB for %s" % entry)
+            # not reached
+        if self.Debug == True:
+            self.DebugMessages += "Catalog.get(): refreshing %s from %s\n" % (entry, self.key[2])
+        value = self.Entries[entry](self.conn)
+        self.queries += 1
+        if (entry in self.Merges) and (entry in self.Cache):
+            value = self.Merges[entry](self.Cache[entry][1], value)
+        self.Cache[entry] = (time.time(), value)
+        self.save()
+        return(value)
+
+    def topology(self, conn=None):
+        return(self.get('topology', conn))
+
+    def operations(self, conn=None):
+        return(self.get('operations', conn))
+
+    def brwStats(self, conn=None):
+        return(self.get('brwstats', conn))
+
+    def bins(self, conn=None, steps=None):
+        """
+        The dict of STATS_ID to the list of every BIN seen for it. If the
+        TimeSteps 'steps' are given and their TS_ID range is outside the
+        spans the cached bins were taken from, the bins for that range
+        are queried and added to the cache first.
+        """
+        value = self.get('bins', conn)
+        if steps is None:
+            return(value['bins'])
+        bounds = steps.getTS_IDRange()
+        if (bounds is None) or covers(value['spans'], bounds):
+            return(value['bins'])
+        if self.Debug == True:
+            self.DebugMessages += "Catalog.bins(): TS_IDs %d to %d are not in the cached spans\n" % bounds
+        if self.conn is None:
+            handleError(self,
+                        CatalogNoConnectionError,
+                        "Catalog.bins(): Error - No connection to MySQL DB for TS_IDs %d to %d" % bounds)
+            # not reached
+        value = mergeBins(value, getBins(self.conn, bounds))
+        self.queries += 1
+        self.Cache['bins'] = (self.Cache['bins'][0], value)
+        self.save()
+        return(value['bins'])
+
+    def invalidate(self, entry=None):
+        """
+        Drop the named entry, or all of them, so that the next get()
+        goes back to the DB.
+        """
+        if self.Cache is None:
+            self.load()
+        if entry is None:
+            self.Cache = {}
+        elif entry in self.Cache:
+            del self.Cache[entry]
+        self.save()
+
+# End of class Catalog
+#*******************************************************************************
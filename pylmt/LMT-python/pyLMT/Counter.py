@@ -29,7 +29,6 @@
 """
 
 import numpy as np
-import numpy.ma as ma
 
 from pyLMT import Series, TimeSeries, defaultErrorHandler
 
@@ -49,6 +48,149 @@ class CounterDifferentialError(CounterError):
     Counter.differential() does nothing and is deprecated.
     """
 
+class CounterNoStepsError(CounterError):
+    """
+    The batched interpolateMatrix() needs the TimeSteps object that
+    the matrix columns correspond to, so that it can divide by the
+    step intervals.
+    """
+
+class CounterShapeError(CounterError):
+    """
+    The matrix handed to interpolateMatrix() has to be two dimensional,
+    with one column for each time step.
+    """
+
+def interpolateMatrix(Data, Valid, Steps):
+    """
+    This is the batched version of Counter.interpolate() for a whole
+    (num_series, num_steps) array of counter observations and its
+    validity bitmap (see Series.newValid()), as in Bulk.ReadMatrix and
+    Bulk.ReadValid or MDS.OpsMatrix and MDS.OpsValid. Each row is
+    interpolated across its gaps, differentiated, divided by the
+    Steps.Diff intervals, and has its negative (reset) differentials set
+    to zero, all in place and without looping over the rows. The gaps are
+    filled by Series.interpolateArray(). Gaps at the beginning or end of
+    a row get the first/last value present, and a row with no values at
+    all is set to zero. Every entry is valid afterwards.
+
+    Return the pair (Missing, Resets). Missing is an int32 array the
+    same shape as Data with a one where there was no observation.
+    Resets is a list with one entry per row, in the same form as the
+    Counter.Resets attribute, of the steps where the counter was reset.
+    """
+    if Steps is None:
+        raise CounterNoStepsError("Counter.interpolateMatrix(): Error - No TimeSteps object")
+    if len(Data.shape) != 2:
+        raise CounterShapeError("Counter.interpolateMatrix(): Error - Data has shape %s" % str(Data.shape))
+    (rows, steps) = Data.shape
+    valid = Series.unpackValid(Valid, steps)
+    Missing = (~valid).astype(np.int32)
+    if (rows == 0) or (steps == 0):
+        return(Missing, [(np.array([], dtype=np.int64),) for row in range(rows)])
+    Series.interpolateArray(Data, valid, Steps.Steps)
+    Data[~valid.any(axis=1)] = 0.0
+    Diff = np.diff(Data, axis=1)
+    Diff /= Steps.Diff
+    Data[:, 1:] = Diff
+    Data[:, 0] = 0.0
+    (reset_rows, reset_steps) = np.nonzero(Data < 0)
+    Resets = [(steps_in_row,) for steps_in_row in
+              np.split(reset_steps, np.searchsorted(reset_rows, np.arange(1, rows)))]
+    Data[Data < 0] = 0
+    Valid[...] = Series.packValid(np.ones((rows, steps), dtype=np.bool_))
+    return(Missing, Resets)
+
+def compactMatrix(Data, Valid, Counters):
+    """
+    Once interpolateMatrix() has turned the float64 counter observations
+    in Data into rates, convert it to the Counters' dtype (see
+    Series.getDtype()) and point each of the Counters (one per row) at
+    its row of the result. Return the converted matrix, which is just
+    Data if there was nothing to do.
+    """
+    if len(Counters) == 0:
+        return(Data)
+    dtype = Counters[0].getDtype()
+    if Data.dtype == dtype:
+        return(Data)
+    Data = Data.astype(dtype)
+    for row, counter in enumerate(Counters):
+        counter.setStorage(Data[row], Valid[row])
+    return(Data)
+
+def aggregateMatrix(Data, Offsets):
+    """
+    Sum up the rows of the (num_series, num_steps) array Data in groups,
+    e.g. the OSTs of each OSS, and over all the rows, e.g. the whole file
+    system. Group g is the rows Offsets[g] up to Offsets[g+1], so Offsets
+    has one more entry than there are groups and ends with num_series.
+
+    Return (Sums, Aves, Sdevs, Total, Ave, Sdev). The first three are
+    (num_groups, num_steps) arrays with the sum, the mean, and the
+    (population) standard deviation across the rows of each group at
+    each step. The last three are the same for all the rows together,
+    and come from the per-group sums rather than another pass over Data.
+    An empty group gets zeros.
+    """
+    Offsets = np.asarray(Offsets, dtype=np.int64)
+    counts = np.diff(Offsets)
+    steps = Data.shape[1]
+    Sums = np.zeros((len(counts), steps), dtype=np.float64)
+    SumSqs = np.zeros((len(counts), steps), dtype=np.float64)
+    # np.add.reduceat() doesn't do empty groups, but skipping them
+    # leaves the neighbouring groups' ranges unchanged.
+    nonempty = (counts > 0)
+    if nonempty.any():
+        starts = Offsets[:-1][nonempty]
+        Sums[nonempty] = np.add.reduceat(Data, starts, axis=0, dtype=np.float64)
+        SumSqs[nonempty] = np.add.reduceat(np.square(Data, dtype=np.float64), starts, axis=0)
+    (Aves, Sdevs) = meanAndSdev(Sums, SumSqs, counts[:, np.newaxis])
+    Total = np.sum(Sums, axis=0)
+    (Ave, Sdev) = meanAndSdev(Total, np.sum(SumSqs, axis=0), np.sum(counts))
+    return(Sums, Aves, Sdevs, Total, Ave, Sdev)
+
+def meanAndSdev(Sums, SumSqs, counts):
+    """
+    The mean and standard deviation from the sums and sums of squares of
+    'counts' values each.
+    """
+    counts = np.maximum(counts, 1).astype(np.float64)
+    Aves = Sums/counts
+    SdevSqs = SumSqs/counts - Aves*Aves
+    SdevSqs[SdevSqs < 0.0] = 0.0
+    return(Aves, np.sqrt(SdevSqs))
+
+def sumOf(name, units, *parts):
+    """
+    A new Counter holding the sum of the Counters in 'parts', e.g. the
+    read and write rates of an OST. A step is valid where it is valid
+    in every part, and the Missing and Resets are those of any part.
+    This is how the "OST" and "Both" series get derived when someone
+    asks for them, rather than being registered alongside read and
+    write.
+    """
+    Sum = Counter(name, units)
+    Sum.setDtype(Series.SumDtype)
+    Sum.Steps = parts[0].Steps
+    Sum.length = parts[0].length
+    if any([part.Data is None for part in parts]):
+        return(Sum)
+    Sum.Data = parts[0].Data.astype(Series.SumDtype)
+    Sum.Valid = parts[0].Valid.copy()
+    for part in parts[1:]:
+        Sum.Data += part.Data
+        Sum.Valid &= part.Valid
+    if not any([part.Missing is None for part in parts]):
+        Sum.Missing = np.zeros_like(parts[0].Missing)
+        for part in parts:
+            Sum.Missing |= part.Missing
+    if not any([part.Resets is None for part in parts]):
+        Sum.Resets = (reduce(np.union1d, [part.Resets[0] for part in parts]),)
+    if parts[0].count > 0:
+        Sum.stats()
+    return(Sum)
+
 #*******************************************************************************
 # Begin class Counter
 class Counter(TimeSeries.TimeSeries):
@@ -68,6 +210,16 @@ class Counter(TimeSeries.TimeSeries):
         self.Missing = None
         self.Resets = None
 
+    def setLength(self, length):
+        """
+        The raw counter observations can be far bigger than the rates they
+        become, so they are always kept in float64. The Counter's own dtype
+        (see Series.setDtype()) applies once interpolate() is done.
+        """
+        self.Data = np.empty(length, dtype=np.float64)
+        self.Valid = Series.newValid((length,))
+        self.length = length
+
     def clearData(self):
         TimeSeries.TimeSeries.clearData(self)
         self.Missing = None
@@ -88,20 +240,28 @@ class Counter(TimeSeries.TimeSeries):
         The time series gets its differential calculated as well, once
         the interpolation is complete.
         """
-        masked_vals = np.where(self.Values.mask == True)
-        self.Missing = np.zeros(len(self.Values), dtype=np.int32)
-        if ma.count_masked(self.Values) != 0:
-            self.Missing[masked_vals] = 1
+        self.Missing = (~self.getValid()).astype(np.int32)
         count = TimeSeries.TimeSeries.interpolate(self)
         if count == 0:
             return(0)
         if self.Steps == None:
             return(0)
         Series.Series.differential(self)
-        self.Values[1:] /= self.Steps.Diff
-        self.Resets = np.where(self.Values < 0)
-        self.Values[self.Values < 0] = 0
+        self.Data[1:] /= self.Steps.Diff
+        self.Resets = np.where(self.Data < 0)
+        self.Data[self.Data < 0] = 0
+        self.compact()
+        self.changed()
         return(count)
 
+    def setInterpolated(self, Missing, Resets):
+        """
+        When the Values are a row of a matrix that interpolateMatrix()
+        already handled, just record what it found for this row.
+        """
+        self.Missing = Missing
+        self.Resets = Resets
+        self.changed()
+
 # End of class Counter
 #*******************************************************************************
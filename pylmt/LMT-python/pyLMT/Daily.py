@@ -0,0 +1,203 @@
+"""
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+"""
+
+import os
+import numpy as np
+
+from pyLMT import defaultErrorHandler
+from _pylmt_exceptions import Error
+
+handleError = defaultErrorHandler
+
+class DailyError(Error):
+    """
+    Generic Error for problems with the daily summary store.
+    """
+
+class DailyCorruptError(DailyError):
+    """
+    A store file is just a sequence of fixed size records, so its size
+    has to be a whole number of them.
+    """
+
+class DailyOrderError(DailyError):
+    """
+    Days go into the store in order. A day can be put again (replacing
+    what was there) but not inserted before the last one.
+    """
+
+# The records have the same fields as the lines of the daily.data and
+# dailymds.data text files, quotes and all, so a store's rows drop in
+# wherever the np.loadtxt() results were used.
+DAILY_DTYPE = np.dtype([('day', 'S11'), ('hour', 'S11'), ('sie', np.uint64),
+                        ('read', np.float64), ('write', np.float64),
+                        ('rRate', np.float64), ('wRate', np.float64)])
+DAILY_MDS_DTYPE = np.dtype([('day', 'S11'), ('hour', 'S11'), ('sie', np.uint64),
+                            ('ops', np.float64), ('opsRate', np.float64)])
+
+# Store files are told apart from the text files by their name
+STORE_SUFFIX = '.store'
+
+#*******************************************************************************
+def isStore(path):
+    return(path.endswith(STORE_SUFFIX))
+
+#*******************************************************************************
+def load(path, dtype):
+    """
+    All the days in 'path', whether it is a store or one of the old text
+    files, as an (in memory, writable) array of 'dtype' records.
+    """
+    if isStore(path):
+        return(np.array(Store(path, dtype).rows()))
+    return(np.loadtxt(path, dtype=dtype, ndmin=1))
+
+#*******************************************************************************
+# Begin class Store
+class Store(object):
+    """
+    An appendable binary file of daily summary records, eg. one per day
+    for a file system as dailyfromh5lmt.py produces them. There's no
+    header, just the records of 'dtype' one after the other in day order,
+    so a new day is a single write at the end of the file and the whole
+    thing can be memory mapped for reading. Ranges of days are found by
+    binary search on the 'sie' field.
+    """
+    def __init__(self, path, dtype=DAILY_DTYPE):
+        self.Debug = False
+        self.DebugMessages = None
+        self.ErrorMessages = None
+        self.path = path
+        self.dtype = np.dtype(dtype)
+
+    def debug(self, module=None):
+        if (module is None) or (module == "Daily"):
+            self.Debug = not self.Debug
+        if self.Debug == True:
+            self.DebugMessages = ''
+        else:
+            self.DebugMessages = None
+
+    def count(self):
+        """
+        The number of records in the store.
+        """
+        if not os.path.exists(self.path):
+            return(0)
+        size = os.path.getsize(self.path)
+        if size % self.dtype.itemsize != 0:
+            handleError(self,
+                        DailyCorruptError,
+                        "Daily.count(): Error - %s has %d bytes, which is not a whole number of %d byte records" % (self.path, size, self.dtype.itemsize))
+            # not reached
+        return(size // self.dtype.itemsize)
+
+    def rows(self, begin=None, end=None):
+        """
+        The records, memory mapped (read only), for the days with sie
+        values from 'begin' up to and including 'end'. Either may be left
+        out to go from the first day or to the last one.
+        """
+        n = self.count()
+        if n == 0:
+            return(np.zeros(0, dtype=self.dtype))
+        Rows = np.memmap(self.path, dtype=self.dtype, mode='r', shape=(n,))
+        first = 0
+        last = n
+        if not begin is None:
+            first = np.searchsorted(Rows['sie'], begin, side='left')
+        if not end is None:
+            last = np.searchsorted(Rows['sie'], end, side='right')
+        return(Rows[first:last])
+
+    def since(self, index, until=None):
+        """
+        The records from number 'index' on, stopping after the one for
+        the day 'until' (yyyy-mm-dd) if it is given, and the index to
+        carry on from next time. cf. Rolling.readRows().
+        """
+        Rows = self.rows()[index:]
+        if not until is None:
+            days = np.char.strip(Rows['day'], '"')
+            found = np.flatnonzero(days == until)
+            if len(found) > 0:
+                Rows = Rows[:found[0]+1]
+        return(Rows, index + len(Rows))
+
+    def last(self, count, until=None):
+        """
+        The records (memory mapped) for the last 'count' days, ending with
+        the day 'until' (yyyy-mm-dd) if it is given and in the store.
+        """
+        Rows = self.rows()
+        end = len(Rows)
+        if not until is None:
+            days = np.char.strip(Rows['day'], '"')
+            found = np.flatnonzero(days == until)
+            if len(found) > 0:
+                end = found[0] + 1
+        return(Rows[max(0, end - count):end])
+
+    def put(self, record):
+        """
+        Add the day in 'record' (a tuple, or a record of the store's
+        dtype). A later day is appended. The day already at the end, or
+        any earlier day that is in the store, is replaced in place, eg.
+        when a day's summary is redone.
+        """
+        record = np.array([tuple(record)], dtype=self.dtype)
+        n = self.count()
+        index = n
+        if n > 0:
+            Rows = self.rows()
+            sie = record['sie'][0]
+            if sie <= Rows['sie'][-1]:
+                index = np.searchsorted(Rows['sie'], sie)
+                if Rows['sie'][index] != sie:
+                    handleError(self,
+                                DailyOrderError,
+                                "Daily.put(): Error - %s is before the last day in %s" % (record['day'][0], self.path))
+                    # not reached
+            del Rows
+        if n == 0:
+            dir = os.path.dirname(os.path.abspath(self.path))
+            if not os.path.isdir(dir):
+                os.makedirs(dir)
+            f = open(self.path, 'wb')
+        else:
+            f = open(self.path, 'r+b')
+        try:
+            f.seek(index*self.dtype.itemsize)
+            f.write(record.tostring())
+        finally:
+            f.close()
+
+# End of class Store
+#*******************************************************************************
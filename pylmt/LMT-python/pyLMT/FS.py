@@ -30,7 +30,7 @@
 
 import MySQLdb
 
-from pyLMT import Timestamp, TimeSteps, Bulk, MDS, defaultErrorHandler
+from pyLMT import Catalog, Series, Timestamp, TimeSteps, Bulk, MDS, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -52,6 +52,12 @@ class FSMissingParamsError(FSError):
     specify the interval of interest.
     """
 
+class FSQueryError(FSError):
+    """
+    Something went wrong while trying to query the DB for the OSSs
+    and OSTs.
+    """
+
 #*******************************************************************************
 # Begin class FS
 class FS():
@@ -74,10 +80,13 @@ class FS():
                              "Timestamp":False, "TimeSteps":False}
         self.ErrorMessages = None
         self.conn = None
+        # The dtype for the series on this file system. See setDtype().
+        self.dtype = None
         # Here, and below can get clear_data()ed
         self.begin = None
         self.end = None
         self.Steps = None
+        self.Topology = None
         self.Bulk = Bulk.Bulk(name)
         self.MDS = MDS.MDS(fs=name)
         self.haveData = False
@@ -87,6 +96,7 @@ class FS():
         self.begin = None
         self.end = None
         self.Steps = None
+        self.Topology = None
         self.Bulk = Bulk.Bulk(name)
         self.MDS = MDS.MDS(fs=name)
         self.haveData = False
@@ -108,10 +118,31 @@ class FS():
         if module == "TimeSteps":
             self.DebugModules[module] = not self.DebugModules[module]
 
-    def getInfo(self, conn=None):
+    def setDtype(self, dtype):
+        """
+        Keep the values of the series here in 'dtype', eg. the 'dtype' of
+        the LMTConfig record for the file system, rather than in
+        Series.DefaultDtype (see Series.setDtype()).
+        """
+        self.dtype = dtype
+        self.Bulk.setDtype(dtype)
+        self.MDS.setDtype(dtype)
+
+    def getDtype(self):
+        """
+        The dtype the series on this file system keep their values in.
+        """
+        if self.dtype is None:
+            return(Series.getDefaultDtype())
+        return(self.dtype)
+
+    def getInfo(self, conn=None, catalog=None):
         """
         Get the list of OSSs and the metadata operations using the provided MySQL
-        connection 'conn'.
+        connection 'conn'. The OSS/OST list is kept in self.Topology so that
+        other objects (eg. a BrwFS) can be built from it without another
+        query. If a Catalog.Catalog 'catalog' is provided it is consulted
+        first and the DB is only queried if its entries are stale.
         """
         if conn == None:
             if self.conn == None:
@@ -121,8 +152,20 @@ class FS():
             # not reached
         else:
             self.conn = conn
-        self.Bulk.getOSSs(conn)
-        self.MDS.opsFromDB(conn)
+        operations = None
+        try:
+            if catalog is None:
+                self.Topology = Catalog.getTopology(self.conn)
+            else:
+                self.Topology = catalog.topology(self.conn)
+                operations = catalog.operations(self.conn)
+        except Catalog.CatalogError, e:
+            handleError(self,
+                        FSQueryError,
+                        "FS.getInfo: %s" % str(e))
+            # not reached
+        self.Bulk.getOSSs(self.conn, topology=self.Topology)
+        self.MDS.opsFromDB(self.conn, operations=operations)
         return
 
     def setSteps(self, Steps):
@@ -132,11 +175,12 @@ class FS():
         self.Bulk.setSteps(Steps)
         self.MDS.setSteps(Steps)
 
-    def getData(self):
+    def getData(self, pool=None):
         """
         Get data from the MySQL connection 'conn' for the interval
         from Steps.begin to Steps.end. begin and end are themselves already
-        Timestamp objects, and are required.
+        Timestamp objects, and are required. With a Pool.Pool 'pool' the
+        bulk OST data is fetched in parallel across its connections.
         """
         if self.Steps is None:
             print "FS.getData(): Error - You must supply a TimeSteps oject first"
@@ -148,7 +192,7 @@ class FS():
             # not reached
         if self.Debug == True:
             self.DebugMessages += "FS.getData(): get data from %d/%d to %d/%d" % (self.Steps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        self.Bulk.getData()
+        self.Bulk.getData(pool=pool)
         self.MDS.getData()
         return
 
@@ -900,7 +900,7 @@ def OSS_pie(oss, sie, mode, plot):
             ts = ost.Write
         else:
             ts = ost.OST
-        pie[i] = ts.Values[step]/(1024.0*1024.0)
+        pie[i] = ts.Data[step]/(1024.0*1024.0)
         i += 1
     fig = plt.figure(figsize=(8,8))
     ax = plt.axes([0.1, 0.1, 0.8, 0.8])
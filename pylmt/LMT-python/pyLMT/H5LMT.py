@@ -0,0 +1,529 @@
+"""
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+"""
+
+import numpy as np
+
+from pyLMT import defaultErrorHandler
+from _pylmt_exceptions import Error
+
+handleError = defaultErrorHandler
+
+class H5LMTError(Error):
+    """
+    Generic Error for problems with h5lmt files.
+    """
+
+class H5LMTLayoutError(H5LMTError):
+    """
+    The layout version or compression asked for isn't one we know how
+    to produce.
+    """
+
+class H5LMTNoIntervalsError(H5LMTError):
+    """
+    IOSIZE counts can't be turned into rates without the step intervals
+    in FSIntervalsDataSet.
+    """
+
+class H5LMTNoDataSetError(H5LMTError):
+    """
+    The data set asked for isn't one of those in DATA_SETS, or isn't in
+    this file.
+    """
+
+class H5LMTReductionError(H5LMTError):
+    """
+    The reductions are 'sum', 'mean', and 'max', over 'rows', 'time',
+    or 'all'.
+    """
+
+class H5LMTRollupError(H5LMTError):
+    """
+    The rollups are of the data sets in ROLLUP_DATA_SETS, and have the
+    statistics in ROLLUP_STATS.
+    """
+
+# Version 1 files, including those from before FSStepsDataSet had a
+# 'layout' attribute, have every data set contiguous and uncompressed.
+# Version 2 chunks and compresses the per-step data sets. h5py reads
+# either one the same way, so readers only need layoutVersion() if
+# they care which they've got.
+LAYOUT_VERSION = 2
+LAYOUTS = (1, 2)
+COMPRESSIONS = ('gzip', 'lzf', None)
+GZIP_LEVEL = 4
+
+# A chunk is an hour of steps. Four rows per chunk keeps a whole day's
+# band of chunks (24 x 4 x 720 x 8 bytes) inside h5py's default 1 MB
+# chunk cache, so reading the OSTs one row at a time still only
+# decompresses each chunk once, while a read across all the OSTs at
+# one step touches num_osts/4 chunks. The IOSIZE histograms are read
+# an OST at a time, so they get one OST (and all its bins) per chunk.
+STEP_CHUNK = 720
+ROW_CHUNK = 4
+
+# The OSTIosize{Read,Write}DataSets hold per-second rates (float64)
+# unless their 'units' attribute says they hold the count for each
+# step (uint32), as h5lmt_init.py -C makes them. The counts are for
+# the interval up to that step, which is kept in FSIntervalsDataSet
+# (zero where there is no observation).
+IOSIZE_COUNTS = 'counts'
+IOSIZE_COUNT_DTYPE = np.uint32
+
+# The group each per-step data set lives in, and the attribute naming
+# its rows
+DATA_SETS = {'OSTBulkReadDataSet' : ('OSTReadGroup', 'OSTNames'),
+             'OSTIosizeReadDataSet' : ('OSTReadGroup', 'OSTNames'),
+             'OSTBulkWriteDataSet' : ('OSTWriteGroup', 'OSTNames'),
+             'OSTIosizeWriteDataSet' : ('OSTWriteGroup', 'OSTNames'),
+             'OSSCPUDataSet' : ('OSSCPUGroup', 'OSSNames'),
+             'FSMissingDataSet' : ('FSMissingGroup', None),
+             'MDSOpsDataSet' : ('MDSOpsGroup', 'OpNames'),
+             'MDSCPUDataSet' : ('MDSCPUGroup', None)}
+REDUCTIONS = {'sum' : np.sum, 'mean' : np.mean, 'max' : np.max}
+
+# The rollups are coarser copies of the busiest data sets, so a view
+# of a week or a month doesn't have to read every step. Each level
+# (in seconds) has its own group RollupGroup/<level>, with the start
+# of each bin in 'Steps' and the number of steps in it in 'Counts'.
+# A bin has the steps from its start up to (but not including) the
+# next bin, so the file's closing midnight is left to the next day.
+# Each data set gets a (len(ROLLUP_STATS), num_rows, num_bins) array
+# of the same name, and its whole file system total (the rows added
+# up, or averaged for the CPU utilization) gets a (len(ROLLUP_STATS),
+# num_bins) array <name>Total.
+ROLLUP_GROUP = 'RollupGroup'
+ROLLUP_LEVELS = (60, 900, 3600)
+ROLLUP_STATS = ('sum', 'mean', 'max', 'min')
+ROLLUP_TOTAL = 'Total'
+ROLLUP_DATA_SETS = {'OSTBulkReadDataSet' : 'sum',
+                    'OSTBulkWriteDataSet' : 'sum',
+                    'OSSCPUDataSet' : 'mean',
+                    'MDSOpsDataSet' : 'sum'}
+
+# The data set each kind of data goes into keeps, in these attributes,
+# the last step (and its TS_ID in the LMT DB) up to which the day has
+# been filled in without a break. h5lmt_add.py -I carries on from
+# there.
+WATERMARK = 'watermark'
+WATERMARK_TS_ID = 'watermark_ts_id'
+
+#*******************************************************************************
+def layoutVersion(fsFile):
+    """
+    The layout version of the open h5lmt file 'fsFile'.
+    """
+    fsStepsDataSet = fsFile['FSStepsGroup']['FSStepsDataSet']
+    if 'layout' in fsStepsDataSet.attrs:
+        return(int(fsStepsDataSet.attrs['layout']))
+    return(1)
+
+#*******************************************************************************
+def datasetOptions(shape, layout=LAYOUT_VERSION, compression='gzip'):
+    """
+    The keyword arguments for h5py's create_dataset() to give a data set
+    of 'shape' (rows first and steps last, eg. (num_osts, num_steps) or
+    (num_osts, num_bins, num_steps)) the given layout.
+    """
+    if not layout in LAYOUTS:
+        raise H5LMTLayoutError("H5LMT.datasetOptions(): Error - Unknown layout version %s" % str(layout))
+    if not compression in COMPRESSIONS:
+        raise H5LMTLayoutError("H5LMT.datasetOptions(): Error - Unknown compression %s" % str(compression))
+    if layout == 1:
+        return({})
+    shape = tuple(shape)
+    if len(shape) == 3:
+        rows = 1
+    else:
+        rows = ROW_CHUNK
+    chunks = (min(STEP_CHUNK, shape[-1]),)
+    if len(shape) > 1:
+        chunks = (min(rows, shape[0]),) + shape[1:-1] + chunks
+    chunks = tuple([max(1, dim) for dim in chunks])
+    options = {'chunks' : chunks}
+    if not compression is None:
+        options['compression'] = compression
+        options['shuffle'] = True
+        if compression == 'gzip':
+            options['compression_opts'] = GZIP_LEVEL
+    return(options)
+
+#*******************************************************************************
+def isCounts(dataSet):
+    """
+    Whether the IOSIZE data set holds counts rather than rates.
+    """
+    return(('units' in dataSet.attrs) and (dataSet.attrs['units'] == IOSIZE_COUNTS))
+
+#*******************************************************************************
+def getIntervals(fsFile):
+    """
+    The whole FSIntervalsDataSet, read once for use with iosizeRates(),
+    or None if the file doesn't have one.
+    """
+    fsStepsGroup = fsFile['FSStepsGroup']
+    if not 'FSIntervalsDataSet' in fsStepsGroup:
+        return(None)
+    return(fsStepsGroup['FSIntervalsDataSet'][:])
+
+#*******************************************************************************
+def iosizeRates(dataSet, ost_index, Intervals, begin=None, end=None):
+    """
+    The (num_bins, num_steps) per-second rates for one OST from an IOSIZE
+    data set, for the steps begin up to (but not including) end. If the
+    data set holds counts they are divided by the step Intervals (see
+    getIntervals()), and steps with no interval get zero. Rates come
+    back as they are, so readers handle either form the same way.
+    """
+    Values = dataSet[ost_index, :, begin:end]
+    if not isCounts(dataSet):
+        return(Values)
+    if Intervals is None:
+        raise H5LMTNoIntervalsError("H5LMT.iosizeRates(): Error - The data set holds counts but there are no step intervals")
+    return(countsToRates(Values, Intervals[begin:end]))
+
+#*******************************************************************************
+def countsToRates(Values, Intervals):
+    """
+    Divide the counts in Values (with the steps along the last axis) by
+    the step Intervals, giving zero where there is no interval.
+    """
+    Rates = np.zeros(Values.shape, dtype=np.float64)
+    observed = (Intervals > 0)
+    Rates[..., observed] = Values[..., observed]/Intervals[observed].astype(np.float64)
+    return(Rates)
+
+def reduceValues(how, Values, over='rows'):
+    """
+    Reduce the Values read from a data set (steps along the last axis)
+    as H5LMT.reduce() describes.
+    """
+    if (not how in REDUCTIONS) or (not over in ('rows', 'time', 'all')):
+        raise H5LMTReductionError("H5LMT.reduceValues(): Error - Unknown reduction %s over %s" % (str(how), str(over)))
+    if over == 'all':
+        return(REDUCTIONS[how](Values))
+    if over == 'time':
+        return(REDUCTIONS[how](Values, axis=-1))
+    if len(Values.shape) == 1:
+        return(Values)
+    return(REDUCTIONS[how](Values, axis=0))
+
+#*******************************************************************************
+def getWatermark(dataSet):
+    """
+    The step up to which 'dataSet' has been filled in, or None.
+    """
+    if not WATERMARK in dataSet.attrs:
+        return(None)
+    return(int(dataSet.attrs[WATERMARK]))
+
+def advanceWatermark(dataSet, first, begin, end, ts_id):
+    """
+    Note that 'dataSet' now has the steps begin through end (seconds
+    since the epoch), the last of which has 'ts_id' in the LMT DB, in a
+    file whose steps start at 'first'. The watermark only moves if the
+    interval carries on from it (or from the start of the file), so that
+    it always marks the end of an unbroken run from the start of the day.
+    Return the watermark.
+    """
+    watermark = getWatermark(dataSet)
+    if watermark is None:
+        reached = first
+    else:
+        reached = watermark
+    if (begin > reached) or ((not watermark is None) and (end <= watermark)):
+        return(watermark)
+    dataSet.attrs[WATERMARK] = end
+    dataSet.attrs[WATERMARK_TS_ID] = ts_id
+    return(end)
+
+#*******************************************************************************
+def rollupBins(Steps, level):
+    """
+    The bin each of the file's Steps falls in at rollup 'level', and the
+    number of bins. Steps past the last whole bin get the number of bins.
+    """
+    num_bins = int((Steps[-1] - Steps[0]) // level)
+    Bins = ((Steps - Steps[0]) // level).astype(np.int64)
+    Bins[Bins > num_bins] = num_bins
+    return(Bins, num_bins)
+
+def binStats(Values, Bins):
+    """
+    The ROLLUP_STATS of Values (steps along the last axis) for each run
+    of equal, increasing Bins. Return the bins and a (len(ROLLUP_STATS),
+    ..., num_runs) array.
+    """
+    starts = np.flatnonzero(np.r_[True, np.diff(Bins) != 0])
+    counts = np.diff(np.r_[starts, len(Bins)])
+    Values = np.asarray(Values, dtype=np.float64)
+    Sums = np.add.reduceat(Values, starts, axis=-1)
+    Stats = np.array([Sums,
+                      Sums/counts,
+                      np.maximum.reduceat(Values, starts, axis=-1),
+                      np.minimum.reduceat(Values, starts, axis=-1)])
+    return(Bins[starts], Stats)
+
+def writeRollups(fsFile, begin=None, end=None, levels=ROLLUP_LEVELS):
+    """
+    Bring the rollups of the open (r+) h5lmt file up to date for the
+    steps begin up to (but not including) end, eg. those h5lmt_add.py
+    just filled in. Every bin with any of those steps is worked out
+    again from all of its steps, reading each data set once for the
+    whole span. The RollupGroup is made the first time through.
+    """
+    Steps = fsFile['FSStepsGroup']['FSStepsDataSet'][:]
+    if len(Steps) < 2:
+        return
+    (begin, end, stride) = slice(begin, end).indices(len(Steps))
+    if begin >= end:
+        return
+    rollupGroup = fsFile.require_group(ROLLUP_GROUP)
+    names = [name for name in sorted(ROLLUP_DATA_SETS)
+             if name in fsFile.get(DATA_SETS[name][0], {})]
+    # The span of steps covered by the affected bins at every level
+    lo = begin
+    hi = end
+    Levels = {}
+    for level in levels:
+        (Bins, num_bins) = rollupBins(Steps, level)
+        if num_bins == 0:
+            continue
+        Levels[level] = (Bins, num_bins)
+        first = min(Bins[begin], num_bins - 1)
+        last = min(Bins[end - 1], num_bins - 1)
+        lo = min(lo, int(np.searchsorted(Bins, first, side='left')))
+        hi = max(hi, int(np.searchsorted(Bins, last, side='right')))
+    for name in names:
+        (group, row_names) = DATA_SETS[name]
+        dataSet = fsFile[group][name]
+        Values = dataSet[..., lo:hi]
+        Total = reduceValues(ROLLUP_DATA_SETS[name], Values, 'rows')
+        for level in sorted(Levels):
+            (Bins, num_bins) = Levels[level]
+            levelGroup = rollupGroup.require_group('%d' % level)
+            if not 'Steps' in levelGroup:
+                levelGroup.create_dataset('Steps', data=(Steps[0] + level*np.arange(num_bins)).astype(np.int32))
+                levelGroup.create_dataset('Counts', data=np.bincount(Bins[Bins < num_bins], minlength=num_bins).astype(np.int32))
+            if not name in levelGroup:
+                levelGroup.create_dataset(name, shape=(len(ROLLUP_STATS),) + dataSet.shape[:-1] + (num_bins,), dtype=np.float64)
+                levelGroup.create_dataset(name + ROLLUP_TOTAL, shape=(len(ROLLUP_STATS), num_bins), dtype=np.float64)
+            inside = (Bins[lo:hi] < num_bins)
+            if not inside.any():
+                continue
+            for (rollupName, Series) in ((name, Values), (name + ROLLUP_TOTAL, Total)):
+                (Written, Stats) = binStats(Series[..., inside], Bins[lo:hi][inside])
+                rollupDataSet = levelGroup[rollupName]
+                Slab = rollupDataSet[..., Written[0]:Written[-1]+1]
+                Slab[..., Written - Written[0]] = Stats
+                rollupDataSet[..., Written[0]:Written[-1]+1] = Slab
+    return
+
+#*******************************************************************************
+# Begin class H5LMT
+class H5LMT(object):
+    """
+    A reader for an open h5lmt file, as h5lmt_init.py and h5lmt_add.py
+    produce them. The FSStepsDataSet is read once, and on the usual
+    uniform 5 second grid the index of a time step is worked out rather
+    than searched for. The reductions read a whole slab of a data set
+    in one go and reduce it with numpy, rather than reading it a row
+    at a time. rollup() reads from the coarsest rollup (see
+    writeRollups()) that is still fine enough for the view.
+    """
+    def __init__(self, fsFile):
+        self.Debug = False
+        self.DebugMessages = None
+        self.ErrorMessages = None
+        self.fsFile = fsFile
+        fsStepsDataSet = fsFile['FSStepsGroup']['FSStepsDataSet']
+        self.Steps = fsStepsDataSet[:]
+        self.day = fsStepsDataSet.attrs['day']
+        self.fs = fsStepsDataSet.attrs['fs']
+        if 'host' in fsStepsDataSet.attrs:
+            self.host = fsStepsDataSet.attrs['host']
+        else:
+            self.host = 'hopper'
+        # None if the steps aren't evenly spaced, in which case index()
+        # has to search for them
+        self.Interval = None
+        if len(self.Steps) > 1:
+            Diff = np.diff(self.Steps)
+            if np.all(Diff == Diff[0]) and (Diff[0] > 0):
+                self.Interval = int(Diff[0])
+        self.Intervals = getIntervals(fsFile)
+
+    def debug(self, module=None):
+        if (module is None) or (module == "H5LMT"):
+            self.Debug = not self.Debug
+        if self.Debug == True:
+            self.DebugMessages = ''
+        else:
+            self.DebugMessages = None
+
+    def index(self, sie):
+        """
+        The index of the last step at or before 'sie', or None if 'sie'
+        is outside the steps of the file. cf. find_sie() in the h5lmt
+        scripts.
+        """
+        if (len(self.Steps) == 0) or (sie < self.Steps[0]) or (sie > self.Steps[-1]):
+            return(None)
+        if self.Interval is None:
+            return(int(np.searchsorted(self.Steps, sie, side='right')) - 1)
+        return(int((sie - self.Steps[0]) // self.Interval))
+
+    def getDataSet(self, name):
+        if not name in DATA_SETS:
+            handleError(self,
+                        H5LMTNoDataSetError,
+                        "H5LMT.getDataSet(): Error - %s is not an h5lmt data set" % name)
+            # not reached
+        (group, names) = DATA_SETS[name]
+        try:
+            return(self.fsFile[group][name])
+        except KeyError:
+            handleError(self,
+                        H5LMTNoDataSetError,
+                        "H5LMT.getDataSet(): Error - There is no %s in this file" % name)
+            # not reached
+
+    def getNames(self, name):
+        """
+        The names of the rows of data set 'name', eg. the OSTNames.
+        """
+        (group, names) = DATA_SETS.get(name, (None, None))
+        dataSet = self.getDataSet(name)
+        if (names is None) or (not names in dataSet.attrs):
+            return(None)
+        return(list(dataSet.attrs[names]))
+
+    def read(self, name, begin=None, end=None):
+        """
+        The steps begin up to (but not including) end of data set 'name',
+        for all of its rows, in a single read. IOSIZE counts come back as
+        rates (cf. iosizeRates()).
+        """
+        dataSet = self.getDataSet(name)
+        Values = dataSet[..., begin:end]
+        if not isCounts(dataSet):
+            return(Values)
+        if self.Intervals is None:
+            handleError(self,
+                        H5LMTNoIntervalsError,
+                        "H5LMT.read(): Error - %s holds counts but there are no step intervals" % name)
+            # not reached
+        return(countsToRates(Values, self.Intervals[begin:end]))
+
+    def reduce(self, how, name, begin=None, end=None, over='rows'):
+        """
+        Reduce the steps begin up to (but not including) end of data set
+        'name' with 'how' (one of REDUCTIONS). Over 'rows' (the OSTs,
+        OSSs, or ops, depending on the data set) gives a value for each
+        step, over 'time' gives a value for each row, and over 'all'
+        gives a single value.
+        """
+        if (not how in REDUCTIONS) or (not over in ('rows', 'time', 'all')):
+            handleError(self,
+                        H5LMTReductionError,
+                        "H5LMT.reduce(): Error - Unknown reduction %s over %s" % (str(how), str(over)))
+            # not reached
+        return(reduceValues(how, self.read(name, begin, end), over))
+
+    def sum(self, name, begin=None, end=None, over='rows'):
+        return(self.reduce('sum', name, begin, end, over))
+
+    def mean(self, name, begin=None, end=None, over='rows'):
+        return(self.reduce('mean', name, begin, end, over))
+
+    def max(self, name, begin=None, end=None, over='rows'):
+        return(self.reduce('max', name, begin, end, over))
+
+    def rollupLevel(self, name, resolution):
+        """
+        The coarsest rollup level with 'name' that is no coarser than
+        'resolution' seconds, or None if the steps themselves will have
+        to do.
+        """
+        if (resolution is None) or (not ROLLUP_GROUP in self.fsFile):
+            return(None)
+        rollupGroup = self.fsFile[ROLLUP_GROUP]
+        levels = [int(level) for level in rollupGroup
+                  if (int(level) <= resolution) and (name in rollupGroup[level])]
+        if len(levels) == 0:
+            return(None)
+        return(max(levels))
+
+    def rollup(self, name, resolution, stat='mean', begin=None, end=None, total=False):
+        """
+        Data set 'name' at a resolution of at most 'resolution' seconds,
+        from the coarsest rollup level that has it or from the steps if
+        there isn't one. Return (Steps, Values), where Steps has the
+        start of each bin beginning in [begin, end) (seconds since the
+        epoch) and Values has the ROLLUP_STATS 'stat' of each, for each
+        row or, with 'total', for the whole file system. Straight from
+        the steps every stat is just the value, and as with the rollups
+        the closing midnight is left out.
+        """
+        if (not name in ROLLUP_DATA_SETS) or (not stat in ROLLUP_STATS):
+            handleError(self,
+                        H5LMTRollupError,
+                        "H5LMT.rollup(): Error - There is no %s rollup of %s" % (str(stat), name))
+            # not reached
+        level = self.rollupLevel(name, resolution)
+        if level is None:
+            Steps = self.Steps[:-1]
+        else:
+            levelGroup = self.fsFile[ROLLUP_GROUP]['%d' % level]
+            Steps = levelGroup['Steps'][:]
+        b = None
+        e = None
+        if not begin is None:
+            b = int(np.searchsorted(Steps, begin, side='left'))
+        if not end is None:
+            e = int(np.searchsorted(Steps, end, side='left'))
+        if level is None:
+            Values = self.read(name, b, len(Steps) if e is None else e)
+            if total == True:
+                Values = reduceValues(ROLLUP_DATA_SETS[name], Values, 'rows')
+            return(Steps[b:e], Values)
+        if total == True:
+            name += ROLLUP_TOTAL
+        return(Steps[b:e], levelGroup[name][ROLLUP_STATS.index(stat), ..., b:e])
+
+    def show(self):
+        print "%s %s %s: %d steps" % (self.host, self.fs, self.day, len(self.Steps))
+        if self.Interval is None:
+            print "steps are not evenly spaced"
+        else:
+            print "every %d seconds" % self.Interval
+
+# End of class H5LMT
+#*******************************************************************************
@@ -40,7 +40,7 @@ import MySQLdb
 import numpy as np
 import numpy.ma as ma
 
-from pyLMT import Series2, defaultErrorHandler
+from pyLMT import Series2, TimeSeries, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -197,6 +197,12 @@ class HistSeries(Series2.Series2):
                (float(self.Steps.Steps[after]) -
                 float(self.Steps.Steps[before])))
 
+    def interpolationPoints(self):
+        """
+        Interpolate over the sie values of the steps, as for a TimeSeries.
+        """
+        return(self.Steps.Steps)
+
     def differential(self):
         """
         Take the differential and then adjust with the time diffeentials.
@@ -212,7 +218,14 @@ class HistSeries(Series2.Series2):
         #self.Diff /= self.Steps.Diff
         Series2.Series2.differential(self)
         # The Steps.Diff will also have one fewer entry (see Series.diffeential)
-        self.Values[:,1:] /= self.Steps.Diff
+        self.Data[:,1:] /= self.Steps.Diff
+
+    def resample(self, period, how='mean'):
+        """
+        Each bin's series reduced onto periods of 'period' seconds, as
+        for TimeSeries.resample().
+        """
+        return(TimeSeries.resampleSeries(self, period, how))
 
     def getSteps(self):
         """
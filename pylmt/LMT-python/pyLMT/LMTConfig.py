@@ -29,7 +29,7 @@
 """
 
 import MySQLdb
-from pyLMT import DEFAULT_CONFIG, defaultErrorHandler
+from pyLMT import DEFAULT_CONFIG, Catalog, Series, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -57,6 +57,12 @@ class LMTConfigMissingFieldError(LMTConfigError):
     There is a missing field in the file system record being identified.
     """
 
+class LMTConfigBadDtypeError(LMTConfigError):
+    """
+    The file system record's 'dtype' has to name a floating point type,
+    eg. float32 or float64.
+    """
+
 #*******************************************************************************
 def process_configuration(args):
     """
@@ -66,7 +72,9 @@ def process_configuration(args):
     If there is no args.fs then args.index can identify the file
     system of interest.
     On success return a dict with info for connecting to the
-    specific file system of interest.
+    specific file system of interest. The dict's 'catalog' entry is a
+    Catalog.Catalog cache of the OSS/OST, operation, and brw_stats tables
+    that should be consulted before querying them.
     """
     if args.config is None:
         args.config = open(DEFAULT_CONFIG)
@@ -157,6 +165,22 @@ class LMTConfig:
                         MySQLdb.Error,
                         "LMTConfig.filesystem(): Error - %d: %s" % (e.args[0], e.args[1]))
             # not reached
+        # The optional 'catalog_dir' and 'catalog_ttl' (seconds)
+        # fields control the on-disk catalog cache.
+        fs['catalog'] = Catalog.Catalog(fs)
+        # The optional 'dtype' field (eg. float32) is what Series values
+        # are kept in for this file system. It's left to the objects made
+        # for it (eg. FS.setDtype()), and is None for Series.DefaultDtype.
+        if not 'dtype' in fs:
+            fs['dtype'] = None
+        else:
+            try:
+                fs['dtype'] = Series.checkDtype(fs['dtype'])
+            except (TypeError, Series.SeriesDtypeError), e:
+                handleError(self,
+                            LMTConfigBadDtypeError,
+                            "LMTConfig.filesystem(): Error - bad dtype %s: %s" % (fs['dtype'], str(e)))
+                # not reached
         return(fs)
 
 
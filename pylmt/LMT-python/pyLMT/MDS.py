@@ -31,9 +31,8 @@
 import sys
 import MySQLdb
 import numpy as np
-import numpy.ma as ma
 
-from pyLMT import CPU, Operation, Timestamp, TimeSteps, defaultErrorHandler
+from pyLMT import Counter, CPU, Operation, Series, Timestamp, TimeSteps, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -129,11 +128,16 @@ class MDS:
         self.mds = fs
         self.conn = None
         self.mdsID = None
+        # The dtype for the Operation and CPU values. See setDtype().
+        self.dtype = None
         # Here, and below can get clear_data()ed
         self.begin = None
         self.end = None
         self.Ops = []
         self.OpsDict = {}
+        self.OpIDs = []
+        self.OpsMatrix = None
+        self.OpsValid = None
         self.haveData = False
         self.Steps = None
         self.MDS = None
@@ -148,6 +152,9 @@ class MDS:
         self.end = None
         self.Ops = []
         self.OpsDict = {}
+        self.OpIDs = []
+        self.OpsMatrix = None
+        self.OpsValid = None
         self.haveData = False
         self.Steps = None
         self.MDS = None
@@ -171,7 +178,12 @@ class MDS:
         else:
             self.DebugMessages = None
 
-    def opsFromDB(self, conn=None):
+    def opsFromDB(self, conn=None, operations=None):
+        """
+        Set up an Operation for each row of OPERATION_INFO. If
+        'operations' is provided (eg. from a Catalog.Catalog) it stands
+        in for the rows and the DB is not queried.
+        """
         if conn is None:
             if self.conn is None:
                 handleError(self,
@@ -180,27 +192,43 @@ class MDS:
                 # not reached
         else:
             self.conn = conn
-        try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
-            query = "SELECT * FROM OPERATION_INFO"
-            cursor.execute (query)
-            rows = cursor.fetchall()
-        except MySQLdb.Error, e:
+        if operations is None:
+            try:
+                cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+                query = "SELECT * FROM OPERATION_INFO"
+                cursor.execute (query)
+                rows = cursor.fetchall()
+            except MySQLdb.Error, e:
+                cursor.close()
+                handleError(self,
+                            MDSQueryOpsError,
+                            "MDS.opsFromDB: Error %d: %s" % (e.args[0], e.args[1]))
+                # not reached
             cursor.close()
-            handleError(self,
-                        MDSQueryOpsError,
-                        "MDS.opsFromDB: Error %d: %s" % (e.args[0], e.args[1]))
-            # not reached
+        else:
+            rows = operations
         for row in rows:
             self.OpsDict[row['OPERATION_NAME']] = len(self.Ops)
+            self.OpIDs.append(int(row['OPERATION_ID']))
             op = Operation.Operation(name=row['OPERATION_NAME'],
                                      units=row['UNITS'])
+            op.setDtype(self.dtype)
             self.Ops.append(op)
             if self.Debug == True:
                 op.debug()
-        cursor.close()
         self.MDS = Operation.Operation("all MDS ops", "count")
 
+    def setDtype(self, dtype):
+        """
+        Keep the values of the series here in 'dtype', eg. the 'dtype' of
+        the LMTConfig record for the file system, rather than in
+        Series.DefaultDtype (see Series.setDtype()).
+        The sum over all the operations stays in Series.SumDtype.
+        """
+        self.dtype = dtype
+        for op in self.Ops:
+            op.setDtype(dtype)
+
     def showOps(self):
         for op in self.Ops:
             print "%s %s" % (op.name, op.units)
@@ -221,15 +249,21 @@ class MDS:
     def getNumOps(self):
         return(len(self.Ops))
 
-    def getData(self):
+    def getData(self, chunk=None):
         """
         Get data from the self.conn for the interval from Steps.begin to Steps.end.
         begin and end are themselves already Timestamp objects, and are required.
         Populate MDSData.
+
+        Setting 'chunk' (a number of rows) streams the data instead. See
+        getStreamedData().
         """
         if self.Steps is None:
             print "MDS.getData(): Error - You must supply a TimeSteps oject first"
             return
+        if not chunk is None:
+            self.getStreamedData(chunk)
+            return
         if self.conn == None:
             handleError(self,
                         FSNoConnectionError,
@@ -239,13 +273,10 @@ class MDS:
             self.MDS.debug()
         if self.Debug == True:
             self.DebugMessages += "MDS.getData(): get data from %d/%d to %d/%d" % (self.Steps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        query = "SELECT * FROM OPERATION_INFO,TIMESTAMP_INFO,MDS_OPS_DATA WHERE "
+        query = "SELECT OPERATION_NAME,MDS_OPS_DATA.TS_ID,SAMPLES,SUM "
+        query += "FROM OPERATION_INFO,MDS_OPS_DATA WHERE "
         query += "OPERATION_INFO.OPERATION_ID=MDS_OPS_DATA.OPERATION_ID AND "
-        query += "TIMESTAMP_INFO.TS_ID=MDS_OPS_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "'"
+        query += self.Steps.getTS_IDClause("MDS_OPS_DATA.TS_ID")
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -272,7 +303,9 @@ class MDS:
                             "MDS.queryData(): Error - Name %s is not among listed operations. Skipping" % name)
                 # not reached
             op = self.Ops[self.OpsDict[name]]
-            sie = op.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = op.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             # profile data (with SUM and SUMSQUARES != 0.0) can't be handled
             # with this code.
             # Some operations get data posted but it is always 0.0, so skip those.
@@ -280,10 +313,90 @@ class MDS:
                 continue
             op.register(sie, float(row['SAMPLES']))
         cursor.close()
+        self.setData()
+        return
+
+    def getStreamedData(self, chunk):
+        """
+        Get the same data as getData() through a server-side cursor, 'chunk'
+        rows at a time. Only the (OPERATION_ID, TS_ID, SAMPLES, SUM) columns
+        come back, and each chunk is scattered as a whole into a
+        (numOps, numSteps) matrix whose rows are the Values of the Operation
+        objects. Peak memory is the matrix plus one chunk, however long the
+        interval.
+        """
+        if self.Steps is None:
+            handleError(self,
+                        MDSNoStepsError,
+                        "MDS.getStreamedData(): Error - You must supply a TimeSteps oject first")
+            # not reached
+        if self.conn == None:
+            handleError(self,
+                        MDSNoConnectionError,
+                        "MDS.getStreamedData(): Error - Please provide a MySQL connection")
+            # not reached
+        shape = (len(self.Ops), self.Steps.steps())
+        self.OpsMatrix = np.empty(shape, dtype=np.float64)
+        self.OpsValid = Series.newValid(shape)
+        for index, op in enumerate(self.Ops):
+            op.setStorage(self.OpsMatrix[index], self.OpsValid[index])
+        opIDs = np.array(self.OpIDs, dtype=np.int64)
+        query = "SELECT OPERATION_ID,TS_ID,SAMPLES,SUM FROM MDS_OPS_DATA WHERE "
+        query += self.Steps.getTS_IDClause()
+        try:
+            cursor = self.conn.cursor(MySQLdb.cursors.SSCursor)
+            if self.Debug == True:
+                self.DebugMessages += "\t%s" % query
+            cursor.execute (query)
+        except MySQLdb.Error, e:
+            cursor.close()
+            handleError(self,
+                        MDSQueryError,
+                        "MDS.getStreamedData: Error %d: %s\n%s" % (e.args[0], e.args[1], query))
+            # not reached
+        count = 0
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if len(rows) == 0:
+                break
+            count += len(rows)
+            data = np.array(rows, dtype=np.float64)
+            del rows
+            (op_index, op_valid) = TimeSteps.find_indices(opIDs, data[:,0].astype(np.int64))
+            step_index = self.Steps.getTS_IDIndex(data[:,1].astype(np.int64))
+            # As in getData(), skip profile data and the always-zero samples
+            valid = op_valid & (step_index >= 0) & (data[:,3] == 0.0) & (data[:,2] != 0.0)
+            self.OpsMatrix[op_index[valid], step_index[valid]] = data[valid,2]
+            Series.markValid(self.OpsValid, (op_index[valid], step_index[valid]))
+        cursor.close()
+        if count == 0:
+            handleError(self,
+                        MDSNoDataError,
+                        "MDS.getStreamedData(): WARNING - No data")
+            # not reached
+        self.setData()
+        return
+
+    def setData(self):
+        """
+        Once the Operation Values are in place interpolate (and
+        differentiate) each of them and accumulate the aggregate. When
+        they are rows of the OpsMatrix do them all in one go.
+        """
+        interpolated = False
+        if (not self.OpsMatrix is None) and (self.Steps.steps() > 0):
+            (Missing, Resets) = Counter.interpolateMatrix(self.OpsMatrix, self.OpsValid, self.Steps)
+            self.OpsMatrix = Counter.compactMatrix(self.OpsMatrix, self.OpsValid, self.Ops)
+            for index, op in enumerate(self.Ops):
+                op.setInterpolated(Missing[index], Resets[index])
+            interpolated = True
         for op in self.Ops:
             if (op.Values is None) or (op.Steps is None) or (op.Steps.steps() == 0):
                 continue
-            n = op.interpolate()
+            if interpolated == True:
+                n = len(op.Values)
+            else:
+                n = op.interpolate()
             if n == 0:
                 if self.Debug == True:
                     self.DebugMessages += "op %s has no data" % op.name
@@ -303,15 +416,12 @@ class MDS:
             print "MDS.getCPU(): Error - You must supply a TimeSteps oject first"
             return
         self.CPU = CPU.CPU("MDS CPU utilization")
+        self.CPU.setDtype(self.dtype)
         if self.Debug == True:
             self.CPU.debug()
         self.CPU.setSteps(self.Steps)
-        query = "SELECT TIMESTAMP,PCT_CPU FROM TIMESTAMP_INFO,MDS_DATA WHERE "
-        query += "TIMESTAMP_INFO.TS_ID=MDS_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "'"
+        query = "SELECT TS_ID,PCT_CPU FROM MDS_DATA WHERE "
+        query += self.Steps.getTS_IDClause()
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -331,7 +441,7 @@ class MDS:
             # not reached
         # Build up the array
         for row in rows:
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
             if sie is None:
                 continue
             self.CPU.register(sie, float(row['PCT_CPU']))
@@ -388,8 +498,7 @@ class MDS:
         self.x, residues, rank, singulars = np.linalg.lstsq(A, y)
 
     def quickRegister(self, sie, ops):
-        index = self.Steps.getIndex(sie)
-        self.MDS.Values[index] = ops
+        self.MDS.register(sie, ops)
 
     def getQuickData(self, conn=None):
         """
@@ -410,13 +519,9 @@ class MDS:
             self.MDS.debug()
         if self.Debug == True:
             self.DebugMessages += "MDS.getQuickData(): get data from %d/%d to %d/%d" % (self.Steps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        query = "SELECT * FROM MDS_AGGREGATE,TIMESTAMP_INFO WHERE "
-        query += "TIMESTAMP_INFO.TS_ID=MDS_AGGREGATE.TS_ID "
-        query += "AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query = "SELECT TS_ID,OPS_RATE FROM MDS_AGGREGATE WHERE "
+        query += self.Steps.getTS_IDClause()
+        query += " order by TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -436,7 +541,9 @@ class MDS:
             # not reached
         # Build up the arrays.
         for row in rows:
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             ops = float(row['OPS_RATE'])
             self.quickRegister(sie, ops)
         cursor.close()
@@ -483,7 +590,7 @@ class MDS:
             return(None)
         values = "(" + str(self.mdsID) + ","
         values += str(ts_id) + ","
-        values += str(self.MDS.Values[index]) + ")"
+        values += str(self.MDS.Data[index]) + ")"
         return(values)
 
     def doInsert(self, insert):
@@ -625,8 +732,6 @@ class MDS:
                                                                         maxcpu,
                                                                         minval,
                                                                         maxval)
-        self.CPU.Values = ma.array(self.CPU.Values)
-        self.MDS.Values = ma.array(self.MDS.Values)
         if mincpu < maxcpu:
             cpu_indices = np.logical_or((self.CPU.Values < mincpu),
                                         (self.CPU.Values > maxcpu))
@@ -643,8 +748,8 @@ class MDS:
             indices = np.logical_or(cpu_indices, val_indices)
         else:
             indices = np.logical_and(cpu_indices, val_indices)
-        self.CPU.Values.mask = indices
-        self.MDS.Values.mask = indices
+        self.CPU.setValid(~indices)
+        self.MDS.setValid(~indices)
 
 # End of class MDS
 #*******************************************************************************
@@ -13,7 +13,7 @@ import MySQLdb
 import numpy as np
 import numpy.ma as ma
 
-from pyLMT import Counter, CPU, OST, Timestamp, TimeSteps, defaultErrorHandler
+from pyLMT import Counter, CPU, OST, Series, Timestamp, TimeSteps, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -85,7 +85,7 @@ class OSSBadModeError(OSSError):
 
 #*******************************************************************************
 # Begin class OSS
-class OSS():
+class OSS(object):
     """
     Container class for OSS_INFO table rows. There will be an OST
     object for each OST on the OSS as well as summary data. Hold the Steps object
@@ -106,6 +106,10 @@ class OSS():
         self.ErrorMessages = None
         self.conn = None
         self.ossID = None
+        # Keep the derived OSS series around once it has been worked out
+        self.cacheDerived = True
+        # The dtype for the OST values. See setDtype().
+        self.dtype = None
         # Here, and below can get clear_data()ed
         self.begin = None
         self.end = None
@@ -113,7 +117,7 @@ class OSS():
         self.OSTDict = {}
         self.Read = Counter.Counter("OSS read", "count/sec")
         self.Write = Counter.Counter("OSS write", "count/sec")
-        self.OSS = Counter.Counter("OSS", "count/sec")
+        self.Combined = None
         self.ReadHist = None
         self.WriteHist = None
         self.OSSHist = None
@@ -123,6 +127,10 @@ class OSS():
         self.Missing = None
         self.haveData = False
         self.total = 0
+        # The mean and standard deviation across the OSTs for each of
+        # 'Read', 'Write', and 'Both'. See aggregate().
+        self.Ave = None
+        self.Sdev = None
 
     def clear_data(self):
         self.begin = None
@@ -131,7 +139,7 @@ class OSS():
         self.OSTDict = {}
         self.Read = Counter.Counter("OSS read", "count/sec")
         self.Write = Counter.Counter("OSS write", "count/sec")
-        self.OSS = Counter.Counter("OSS", "count/sec")
+        self.Combined = None
         self.ReadHist = None
         self.WriteHist = None
         self.OSSHist = None
@@ -141,13 +149,16 @@ class OSS():
         self.Missing = None
         self.haveData = False
         self.total = 0
+        # The mean and standard deviation across the OSTs for each of
+        # 'Read', 'Write', and 'Both'. See aggregate().
+        self.Ave = None
+        self.Sdev = None
 
     def debug(self, module=None):
         if (module is None) or (module == "OSS"):
             self.Debug = not self.Debug
             self.Read.debug()
             self.Write.debug()
-            self.OSS.debug()
         if module == "OST":
             self.DebugModules[module] = not self.DebugModules[module]
         if module == "Timestamp":
@@ -166,6 +177,24 @@ class OSS():
         for ost in self.OSTs:
             ost.showStep(step)
 
+    def getOSS(self):
+        """
+        The read plus write series for the OSS, summed up from self.Read
+        and self.Write when it's wanted rather than aggregated along with
+        them. See OST.getOST().
+        """
+        if not self.Combined is None:
+            return(self.Combined)
+        Combined = Counter.sumOf("OSS", "count/sec", self.Read, self.Write)
+        if (self.cacheDerived == True) and (self.Read.count > 0):
+            self.Combined = Combined
+        return(Combined)
+
+    OSS = property(getOSS)
+
+    def clearDerived(self):
+        self.Combined = None
+
     def getNumOSTs(self):
         return(len(self.OSTs))
                
@@ -225,16 +254,37 @@ class OSS():
                         "OSS.getOSTs(): WARNING - No data")
             # not reached
         for row in rows:
-            name = row["OST_NAME"]
-            self.OSTDict[name] = len(self.OSTs)
-            ost = OST.OST(name=name)
-            if self.DebugModules["OST"] == True:
-                ost.debug()
-                ost.debug("TimeSeries")
-            self.OSTs.append(ost)
+            self.addOST(row["OST_NAME"], int(row["OST_ID"]))
         cursor.close()
         return
 
+    def setDtype(self, dtype):
+        """
+        Keep the values of the series here in 'dtype', eg. the 'dtype' of
+        the LMTConfig record for the file system, rather than in
+        Series.DefaultDtype (see Series.setDtype()).
+        The OSS Read and Write sums stay in Series.SumDtype.
+        """
+        self.dtype = dtype
+        for ost in self.OSTs:
+            ost.setDtype(dtype)
+
+    def addOST(self, name, ostID=None):
+        """
+        Add an OST to this OSS. getOSTs() does this for each of its rows, and
+        Bulk.getOSSs() does it from the single query for all the OSSs and
+        OSTs on the file system.
+        """
+        self.OSTDict[name] = len(self.OSTs)
+        ost = OST.OST(name=name)
+        ost.ostID = ostID
+        ost.setDtype(self.dtype)
+        if self.DebugModules["OST"] == True:
+            ost.debug()
+            ost.debug("TimeSeries")
+        self.OSTs.append(ost)
+        return(ost)
+
     def showOSTs(self):
         for o in self.OSTs:
             print o.name
@@ -258,7 +308,7 @@ class OSS():
             o.setSteps(Steps)
         self.Read.setSteps(Steps)
         self.Write.setSteps(Steps)
-        self.OSS.setSteps(Steps)
+        self.clearDerived()
         
     def getData(self):
         """
@@ -279,15 +329,13 @@ class OSS():
             # not reached
         if self.Debug == True:
             self.DebugMessages += "OSS.getData(): get data from %d/%d to %d/%d" % (self.Steps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        query = "SELECT * FROM OSS_INFO,OST_INFO,TIMESTAMP_INFO,OST_DATA WHERE "
+        query = "SELECT OST_NAME,OST_DATA.TS_ID,READ_BYTES,WRITE_BYTES "
+        query += "FROM OSS_INFO,OST_INFO,OST_DATA WHERE "
         query += "OSS_INFO.OSS_ID=OST_INFO.OSS_ID AND "
         query += "OST_INFO.OST_ID=OST_DATA.OST_ID AND "
         query += "OSS_INFO.HOSTNAME='" + self.name + "' AND "
-        query += "TIMESTAMP_INFO.TS_ID=OST_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        query += self.Steps.getTS_IDClause("OST_DATA.TS_ID")
+        query += " order by OST_DATA.TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -314,7 +362,9 @@ class OSS():
                             "OSS.getData(): Warning - No OST %s on OSS %s" % (name, self.name))
                 # not reached
             o = self.OSTs[self.OSTDict[name]]
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             read = float(row['READ_BYTES'])
             write = float(row['WRITE_BYTES'])
             self.register(o, sie, read, write)
@@ -322,11 +372,15 @@ class OSS():
         self.setData()
         return
 
-    def setData(self, begin=None, end=None):
+    def setData(self, begin=None, end=None, interpolated=False, aggregated=False):
         """
         If data is acquired elsewhere and not from the getData() above, this is also
         called from elsewhere (as from Bulk.setData()). We need to initialize the
         (begin, end) pair. For the same reason we need to pass those values to the OSTs.
+        If the caller has already interpolated the OST Counters (see
+        Bulk.interpolate()) then set 'interpolated' to skip doing it again.
+        Similarly, set 'aggregated' if the caller will call setAggregate()
+        for the OSS series (see Bulk.aggregate()).
         """
         if not begin is None:
             self.begin = begin
@@ -334,11 +388,11 @@ class OSS():
             self.end = end
         for ost in self.OSTs:
             ost.setData(self.begin, self.end)
-        self.interpolate()
+        if interpolated == False:
+            self.interpolate()
         self.stats()
-        self.setRead()
-        self.setWrite()
-        self.setOSS()
+        if aggregated == False:
+            self.aggregate()
         self.haveData = True
 
     def interpolate(self):
@@ -353,6 +407,57 @@ class OSS():
         for o in self.OSTs:
             o.stats()
         
+    def aggregate(self, modes=('Read', 'Write')):
+        """
+        Sum the OST Counters, and get their mean and standard deviation
+        across the OSTs at each step, with one Counter.aggregateMatrix()
+        call for each of the 'modes'. This replaces the setRead(),
+        setWrite(), and setOSS() accumulation. The 'Both' mean and
+        standard deviation are only worked out when CalcSdev() asks.
+        """
+        if len(self.OSTs) == 0:
+            return
+        Offsets = [0, len(self.OSTs)]
+        for mode in modes:
+            if mode == 'Read':
+                Matrix = np.array([ost.Read.Data for ost in self.OSTs])
+            elif mode == 'Write':
+                Matrix = np.array([ost.Write.Data for ost in self.OSTs])
+            else:
+                Matrix = np.array([ost.OST.Data for ost in self.OSTs])
+            (Sums, Aves, Sdevs, Total, Ave, Sdev) = Counter.aggregateMatrix(Matrix, Offsets)
+            self.setAggregate(mode, Total, Ave, Sdev)
+
+    def setAggregate(self, mode, Sum, Ave, Sdev):
+        """
+        Take the sum of the OSTs' 'Read' or 'Write' values as the
+        corresponding OSS series, and keep the mean and standard
+        deviation across the OSTs for CalcSdev() and insertValues().
+        The OSS series itself is derived from those two, so for 'Both'
+        only the mean and standard deviation are kept.
+        """
+        if mode == 'Read':
+            series = self.Read
+        elif mode == 'Write':
+            series = self.Write
+        elif mode == 'Both':
+            series = None
+        else:
+            handleError(self,
+                        OSSBadModeError,
+                        "OSS.setAggregate(): Warning - unrecognized mode %s" % mode)
+            # not reached
+        if not series is None:
+            series.setDtype(Series.SumDtype)
+            series.Values = Sum
+            series.stats()
+            self.clearDerived()
+        if self.Ave is None:
+            self.Ave = {}
+            self.Sdev = {}
+        self.Ave[mode] = Ave
+        self.Sdev[mode] = Sdev
+
     def setRead(self):
         for o in self.OSTs:
             if self.Read.count == 0:
@@ -368,11 +473,11 @@ class OSS():
                 self.Write.add(o.Write)
 
     def setOSS(self):
-        for o in self.OSTs:
-            if self.OSS.count == 0:
-                self.OSS.copy(o.OST)
-            else:
-                self.OSS.add(o.OST)
+        """
+        The OSS series is now derived from Read and Write (see getOSS()),
+        so there is nothing to accumulate, just a stale sum to forget.
+        """
+        self.clearDerived()
                 
     def getCPU(self):
         if self.Steps is None:
@@ -383,14 +488,10 @@ class OSS():
                         BulkNoConnectionError,
                         "Bulk.getCPU(): Error - Please provide a MySQL connection")
             # not reached
-        query = "SELECT TIMESTAMP,PCT_CPU FROM TIMESTAMP_INFO,OSS_DATA,OSS_INFO WHERE "
+        query = "SELECT OSS_DATA.TS_ID,PCT_CPU FROM OSS_DATA,OSS_INFO WHERE "
         query += "OSS_DATA.OSS_ID=OSS_INFO.OSS_ID and OSS_INFO.HOSTNAME='"
         query += self.name + "' AND "
-        query += "TIMESTAMP_INFO.TS_ID=OSS_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "'"
+        query += self.Steps.getTS_IDClause("OSS_DATA.TS_ID")
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -410,11 +511,12 @@ class OSS():
             # not reached
         # Build up the array
         self.CPU = CPU.CPU(self.name+" CPU utilization")
+        self.CPU.setDtype(self.dtype)
         if self.Debug == True:
             self.CPU.debug()
         self.CPU.setSteps(self.Steps)
         for row in rows:
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
             if sie is None:
                 continue
             self.CPU.register(sie, float(row['PCT_CPU']))
@@ -422,10 +524,7 @@ class OSS():
         self.setCPU()
 
     def setCPU(self):
-        masked_vals = np.where(self.CPU.Values.mask == True)
-        self.Missing = np.zeros(len(self.CPU.Values), dtype=np.int32)
-        if ma.count_masked(self.CPU.Values) != 0:
-            self.Missing[masked_vals] = 1
+        self.Missing = (~self.CPU.getValid()).astype(np.int32)
         n = self.CPU.interpolate()
         if n == 0:
             handleError(self,
@@ -444,30 +543,11 @@ class OSS():
             # not reached
         readSdev = 0
         writeSdev = 0
-        read = 0.0
-        write = 0.0
-        readSq = 0.0
-        writeSq = 0.0
-        count = 0
-        for ost in self.OSTs:
-            val = ost.Read.Values[index]
-            read += val
-            readSq += val*val
-            val = ost.Write.Values[index]
-            write += val
-            writeSq += val*val
-            count += 1
-        if count > 0:
-            ave = read/count
-            aveSq = readSq/count
-            sdevSq = aveSq - ave*ave
-            if sdevSq > 0:
-                readSdev = np.sqrt(sdevSq)
-            ave = write/count
-            aveSq = writeSq/count
-            sdevSq = aveSq - ave*ave
-            if sdevSq > 0:
-                writeSdev = np.sqrt(sdevSq)
+        if len(self.OSTs) > 0:
+            if self.Sdev is None:
+                self.aggregate()
+            readSdev = self.Sdev['Read'][index]
+            writeSdev = self.Sdev['Write'][index]
         insert  = "insert ignore into OSS_AGGREGATE "
         insert += "(OSS_ID,TS_ID,READ_RATE,WRITE_RATE,"
         insert += "READ_SDEV,WRITE_SDEV) values ("
@@ -475,8 +555,8 @@ class OSS():
         insert += self.name + "'),"
         insert += "(select TS_ID from TIMESTAMP_INFO where unix_timestamp(TIMESTAMP)="
         insert += str(sie) + "),"
-        insert += str(self.Read.Values[index]) + ","
-        insert += str(self.Write.Values[index]) + ","
+        insert += str(self.Read.Data[index]) + ","
+        insert += str(self.Write.Data[index]) + ","
         insert += str(readSdev) + ","
         insert += str(writeSdev) + ")"
         try:
@@ -541,37 +621,16 @@ class OSS():
         ts_id = self.Steps.getTS_ID(index)
         if ts_id is None:
             return(None)
-        readSdev = 0
-        writeSdev = 0
-        read = 0.0
-        write = 0.0
-        readSq = 0.0
-        writeSq = 0.0
-        count = 0
-        for ost in self.OSTs:
-            val = ost.Read.Values[index]
-            read += val
-            readSq += val*val
-            val = ost.Write.Values[index]
-            write += val
-            writeSq += val*val
-            count += 1
-        if count == 0:
+        if len(self.OSTs) == 0:
             return(None)
-        ave = read/count
-        aveSq = readSq/count
-        sdevSq = aveSq - ave*ave
-        if sdevSq > 0:
-            readSdev = np.sqrt(sdevSq)
-        ave = write/count
-        aveSq = writeSq/count
-        sdevSq = aveSq - ave*ave
-        if sdevSq > 0:
-            writeSdev = np.sqrt(sdevSq)
+        if self.Sdev is None:
+            self.aggregate()
+        readSdev = self.Sdev['Read'][index]
+        writeSdev = self.Sdev['Write'][index]
         values = "(" + str(self.ossID) + ","
         values += str(ts_id) + ","
-        values += str(self.Read.Values[index]) + ","
-        values += str(self.Write.Values[index]) + ","
+        values += str(self.Read.Data[index]) + ","
+        values += str(self.Write.Data[index]) + ","
         values += str(readSdev) + ","
         values += str(writeSdev) + ")"
         return(values)
@@ -658,17 +717,14 @@ class OSS():
             minval = float(bb['minval'])
         if 'maxval' in bb:
             maxval = float(bb['maxval'])
-        minval *= np.max(self.OSS.Values)/100.0
-        maxval *= np.max(self.OSS.Values)/100.0
+        Values = self.OSS.Values
+        minval *= np.max(Values)/100.0
+        maxval *= np.max(Values)/100.0
         if self.Debug == True:
             self.DebugMessages += "cpu[%.0f,%.0f],values[%.0f,%.0f]" % (mincpu,
                                                                         maxcpu,
                                                                         minval,
                                                                         maxval)
-        self.CPU.Values = ma.array(self.CPU.Values)
-        self.Write.Values = ma.array(self.Write.Values)
-        self.Read.Values = ma.array(self.Read.Values)
-        self.OSS.Values = ma.array(self.OSS.Values)
         if mincpu < maxcpu:
             cpu_indices = np.logical_or((self.CPU.Values < mincpu),
                                         (self.CPU.Values > maxcpu))
@@ -676,19 +732,19 @@ class OSS():
             cpu_indices = np.logical_and((self.CPU.Values < mincpu),
                                          (self.CPU.Values > maxcpu))
         if minval < maxval:
-            val_indices = np.logical_or((self.OSS.Values < minval),
-                                        (self.OSS.Values > maxval))
+            val_indices = np.logical_or((Values < minval),
+                                        (Values > maxval))
         else:
-            val_indices = np.logical_and((self.OSS.Values < minval),
-                                         (self.OSS.Values > maxval))
+            val_indices = np.logical_and((Values < minval),
+                                         (Values > maxval))
         if (mincpu < maxcpu) and (minval < maxval):
             indices = np.logical_or(cpu_indices, val_indices)
         else:
             indices = np.logical_and(cpu_indices, val_indices)
-        self.CPU.Values.mask = indices
-        self.Read.Values.mask = indices
-        self.Write.Values.mask = indices
-        self.OSS.Values.mask = indices
+        # The derived OSS series is masked wherever Read or Write is.
+        for series in (self.CPU, self.Read, self.Write):
+            series.setValid(~indices)
+        self.clearDerived()
         
     def show(self, mode=None):
         if (mode is None) or (mode == 'Read'):
@@ -708,36 +764,26 @@ class OSS():
                     self.OSS.showStep(self.Steps.getIndex(step)+1)
 
     def CalcSdev(self, mode, scale=1024.0*1024.0):
-        sum   = np.zeros_like(self.Steps.Steps, dtype=np.float64)
-        sumSq = np.zeros_like(self.Steps.Steps, dtype=np.float64)
-        count = 0
+        """
+        The mean and standard deviation across the OSTs at each step,
+        as kept by aggregate(), in units of 'scale'.
+        """
         if not ((mode == 'Both') or (mode == 'Read') or
                 (mode == 'Write')):
             handleError(self,
                         OSSBadModeError,
                         "OSS.CalcSdev(): Warning - unrecognized mode %s" % mode)
             # not reached
-        for ost in self.OSTs:
-            if mode == 'Both':
-                values = ost.Both.Values/scale
-            if mode == 'Read':
-                values = ost.Read.Values/scale
-            if mode == 'Write':
-                values = ost.Write.Values/scale
-            sum += values
-            sumSq += values*values
-            count += 1
-        if count == 0:
+        if len(self.OSTs) == 0:
             handleError(self,
                         OSSNoOSTsError,
                         "OSS.CalcSdev(): Warning - No OSTs to calculate standard deviation on")
             # not reached
-        ave = sum/count
-        aveSq = sumSq/count
-        sdevSq = aveSq - ave*ave
-        sdevSq[sdevSq < 0.0] = 0.0
-        sdev = np.sqrt(sdevSq)
-        return(ave, sdev)
+        if self.Sdev is None:
+            self.aggregate()
+        if not mode in self.Sdev:
+            self.aggregate(modes=(mode,))
+        return(self.Ave[mode]/scale, self.Sdev[mode]/scale)
         
 # End of class OSS
 #*******************************************************************************
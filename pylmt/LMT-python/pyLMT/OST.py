@@ -30,7 +30,6 @@
 
 import MySQLdb
 import numpy as np
-import numpy.ma as ma
 
 from pyLMT import Counter, Timestamp, TimeSteps, defaultErrorHandler
 
@@ -60,10 +59,11 @@ class OSTNoStepsError(OSTError):
 
 #*******************************************************************************
 # Begin class OST
-class OST():
+class OST(object):
     """
     Container class for OST_INFO table rows. There will be a TimeSeries
-    object for read, write, and both. Hold the Steps object here as well.
+    object for read and write, and the combined (both) series is derived
+    from them when it is asked for. Hold the Steps object here as well.
     """
 
     def __init__(self, name):
@@ -78,12 +78,17 @@ class OST():
         self.DebugModules = {"Timestamp":False, "TimeSteps":False}
         self.ErrorMessages = None
         self.conn = None
+        self.ostID = None
+        # Keep the derived OST series around once it has been worked out
+        self.cacheDerived = True
+        # The dtype for the Read and Write values. See setDtype().
+        self.dtype = None
         # Here, and below can get clear_data()ed
         self.begin = None
         self.end = None
         self.Read = Counter.Counter("read", "count/sec")
         self.Write = Counter.Counter("write", "count/sec")
-        self.OST = Counter.Counter("OST", "count/sec")
+        self.Combined = None
         self.Steps = None
         self.Missing = None
         self.haveData = False
@@ -94,17 +99,27 @@ class OST():
         self.end = None
         self.Read = Counter.Counter(self.name, "count/sec")
         self.Write = Counter.Counter(self.name, "count/sec")
-        self.OST = Counter.Counter(self.name, "count/sec")
+        self.setDtype(self.dtype)
+        self.Combined = None
         self.Steps = None
         self.haveData = False
         self.total = 0
 
+    def setDtype(self, dtype):
+        """
+        Keep the values of the series here in 'dtype', eg. the 'dtype' of
+        the LMTConfig record for the file system, rather than in
+        Series.DefaultDtype (see Series.setDtype()).
+        """
+        self.dtype = dtype
+        self.Read.setDtype(dtype)
+        self.Write.setDtype(dtype)
+
     def debug(self, module=None):
         if (module == None) or (module == "OST"):
             self.Debug = not self.Debug
             self.Read.debug()
             self.Write.debug()
-            self.OST.debug()
         if module == "Timestamp":
             self.DebugModules[module] = not self.DebugModules[module]
         if module == "TimeSteps":
@@ -119,6 +134,29 @@ class OST():
         self.Write.showStep(step)
         self.OST.showStep(step)
 
+    def getOST(self):
+        """
+        The read plus write series. It isn't registered along with the
+        other two, but summed up from them the first time it's wanted.
+        Once the Read and Write data are complete (after stats()) the sum
+        is kept for next time, unless self.cacheDerived is False.
+        """
+        if not self.Combined is None:
+            return(self.Combined)
+        Combined = Counter.sumOf("OST", "count/sec", self.Read, self.Write)
+        if (self.cacheDerived == True) and (self.Read.count > 0):
+            self.Combined = Combined
+        return(Combined)
+
+    OST = property(getOST)
+
+    def clearDerived(self):
+        """
+        Forget the cached OST series, since the Read or Write data
+        it came from are changing.
+        """
+        self.Combined = None
+
     def register(self, sie, read, write):
         """
         All the sie values should alredy be registered with self.Steps
@@ -133,14 +171,15 @@ class OST():
             return
         self.Read.register(sie, read)
         self.Write.register(sie, write)
-        self.OST.register(sie, read+write)
+        self.Combined = None
 
     def setSteps(self, Steps):
         self.Steps = Steps
         self.begin = self.Steps.begin
         self.end = self.Steps.end
-        for data in (self.Read, self.Write, self.OST):
+        for data in (self.Read, self.Write):
             data.setSteps(self.Steps)
+        self.clearDerived()
 
     def getData(self, conn=None):
         """
@@ -162,14 +201,15 @@ class OST():
             self.conn = conn
         if self.Debug == True:
             print "OST.getData(): get data from %d/%d to %d/%d" % (self.Steps.begin.sie, self.Steps.begin.ts_id, self.Steps.end.sie, self.Steps.end.ts_id)
-        query = "SELECT * FROM OST_INFO,TIMESTAMP_INFO,OST_DATA WHERE "
-        query += "OST_INFO.OST_ID=OST_DATA.OST_ID AND "
-        query += "OST_INFO.OST_NAME='" + self.name + "' AND "
-        query += "TIMESTAMP_INFO.TS_ID=OST_DATA.TS_ID AND TIMESTAMP_INFO.TIMESTAMP >= '"
-        query += self.begin.timestr
-        query += "' AND TIMESTAMP_INFO.TIMESTAMP <= '"
-        query += self.end.timestr
-        query += "' order by TIMESTAMP_INFO.TS_ID"
+        if self.ostID is None:
+            query = "SELECT OST_DATA.TS_ID,READ_BYTES,WRITE_BYTES FROM OST_INFO,OST_DATA WHERE "
+            query += "OST_INFO.OST_ID=OST_DATA.OST_ID AND "
+            query += "OST_INFO.OST_NAME='" + self.name + "' AND "
+        else:
+            query = "SELECT TS_ID,READ_BYTES,WRITE_BYTES FROM OST_DATA WHERE "
+            query += "OST_ID=" + str(self.ostID) + " AND "
+        query += self.Steps.getTS_IDClause("OST_DATA.TS_ID")
+        query += " order by OST_DATA.TS_ID"
         try:
             cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
             if self.Debug == True:
@@ -189,7 +229,9 @@ class OST():
             # not reached
         # Build up the arrays.
         for row in rows:
-            sie = self.Steps.getSie(timestamp=row['TIMESTAMP'])
+            sie = self.Steps.getSie(ts_id=row['TS_ID'])
+            if sie is None:
+                continue
             self.register(sie, float(row['READ_BYTES']), float(row['WRITE_BYTES']))
         cursor.close()
         self.interpolate()
@@ -205,10 +247,7 @@ class OST():
         # N.B. The counter interpolate() fucntion also divides by
         # the step intervals, so the resulting series is a set of
         # observations of the true rate in MB/s.
-        masked_vals = np.where(self.Read.Values.mask == True)
-        self.Missing = np.zeros(len(self.Read.Values), dtype=np.int32)
-        if ma.count_masked(self.Read.Values) != 0:
-            self.Missing[masked_vals] = 1
+        self.Missing = (~self.Read.getValid()).astype(np.int32)
         n = self.Read.interpolate()
         if n == 0:
             handleError(self,
@@ -221,17 +260,12 @@ class OST():
                         OSTNoDataError,
                         "OST.interpolate(): Warning - No Write data")
             # not reached
-        n = self.OST.interpolate()
-        if n == 0:
-            handleError(self,
-                        OSTNoDataError,
-                        "OST.interpolate(): Warning - No combined data")
-            # not reached
+        self.clearDerived()
 
     def stats(self):
         self.Read.stats()
         self.Write.stats()
-        self.OST.stats()
+        self.clearDerived()
 
     def header1(self):
         #print "%12s\t%6d\t%5.3e\t%6d\t%5.3e\t%5.3e\t%6d (%5.3e)\t%5.3e (%5.3e)"
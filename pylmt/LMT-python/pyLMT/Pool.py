@@ -0,0 +1,187 @@
+"""
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+"""
+
+import sys
+import Queue
+import threading
+import MySQLdb
+
+from pyLMT import defaultErrorHandler
+
+from _pylmt_exceptions import Error
+
+handleError = defaultErrorHandler
+
+class PoolError(Error):
+    """
+    Generic Error for problems with Pool objects.
+    """
+
+class PoolMissingFieldError(PoolError):
+    """
+    The file system record needs the same DB fields that
+    LMTConfig.filesystem() uses to connect.
+    """
+
+class PoolConnectionError(PoolError):
+    """
+    One of the pool's connections to the MySQL DB failed.
+    """
+
+# The default number of connections when neither the caller nor the
+# file system record's 'pool_size' field says otherwise.
+DEFAULT_POOL_SIZE = 4
+
+#*******************************************************************************
+# Begin class Pool
+class Pool:
+    """
+    A fixed set of MySQL connections to one file system's LMT DB, and the
+    means to run a query function on each of several parts of a job at
+    once, one thread and one connection per part. The threads spend
+    almost all their time waiting on the DB server, so they overlap well
+    despite the interpreter lock. Anything the workers do to shared
+    arrays should be done while holding self.lock.
+    """
+    def __init__(self, fsrc, size=None):
+        """
+        fsrc is the file system record from LMTConfig.filesystem().
+        """
+        self.Debug = False
+        self.DebugMessages = None
+        self.ErrorMessages = None
+        if size is None:
+            if 'pool_size' in fsrc:
+                size = int(fsrc['pool_size'])
+            else:
+                size = DEFAULT_POOL_SIZE
+        if size < 1:
+            size = 1
+        self.size = size
+        self.lock = threading.Lock()
+        self.Conns = []
+        self.Idle = Queue.Queue()
+        fields = ['dbhost', 'dbport', 'dbuser', 'dbauth', 'dbname']
+        for field in fields:
+            if not field in fsrc:
+                handleError(self,
+                            PoolMissingFieldError,
+                            "Pool.__init__(): Error - %s value missing " % field)
+                # not reached
+        for i in range(self.size):
+            try:
+                conn = MySQLdb.connect (host = fsrc['dbhost'],
+                                        port = int(fsrc['dbport']),
+                                        user = fsrc['dbuser'],
+                                        passwd = fsrc['dbauth'],
+                                        db = fsrc['dbname'])
+            except MySQLdb.Error, e:
+                self.close()
+                handleError(self,
+                            PoolConnectionError,
+                            "Pool.__init__(): Error - %d: %s" % (e.args[0], e.args[1]))
+                # not reached
+            self.Conns.append(conn)
+            self.Idle.put(conn)
+
+    def debug(self, module=None):
+        if (module is None) or (module == "Pool"):
+            self.Debug = not self.Debug
+        if self.Debug == True:
+            self.DebugMessages = ''
+        else:
+            self.DebugMessages = None
+
+    def get(self):
+        """
+        Take a connection from the pool, waiting for one if they are
+        all in use.
+        """
+        return(self.Idle.get())
+
+    def put(self, conn):
+        self.Idle.put(conn)
+
+    def partition(self, items):
+        """
+        Deal the items out round-robin into (at most) self.size parts.
+        The OSTs of one OSS are usually adjacent in the list, so dealing
+        them out spreads each OSS's share of the work across the parts.
+        """
+        items = list(items)
+        parts = []
+        for i in range(min(self.size, len(items))):
+            parts.append(items[i::self.size])
+        return(parts)
+
+    def map(self, func, parts, *args):
+        """
+        Call func(conn, part, *args) for each part, each in its own thread
+        with its own connection from the pool, and return the list of
+        results in the order of 'parts'. If any of the calls raised an
+        exception the first one is raised again here, once all the
+        threads are done.
+        """
+        results = [None]*len(parts)
+        errors = [None]*len(parts)
+        def worker(index, part):
+            conn = self.get()
+            try:
+                try:
+                    results[index] = func(conn, part, *args)
+                except:
+                    errors[index] = sys.exc_info()
+            finally:
+                self.put(conn)
+        threads = []
+        for index, part in enumerate(parts):
+            thread = threading.Thread(target=worker, args=(index, part))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        for error in errors:
+            if not error is None:
+                raise error[0], error[1], error[2]
+        if self.Debug == True:
+            self.DebugMessages += "Pool.map(): %d parts over %d connections\n" % (len(parts), self.size)
+        return(results)
+
+    def close(self):
+        for conn in self.Conns:
+            try:
+                conn.close()
+            except MySQLdb.Error:
+                pass
+        self.Conns = []
+        self.Idle = Queue.Queue()
+
+# End of class Pool
+#*******************************************************************************
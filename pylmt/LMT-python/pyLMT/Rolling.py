@@ -0,0 +1,307 @@
+"""
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+"""
+
+import os
+import bisect
+import cPickle
+import collections
+import numpy as np
+
+from pyLMT import Daily, defaultErrorHandler
+from _pylmt_exceptions import Error
+
+handleError = defaultErrorHandler
+
+class RollingError(Error):
+    """
+    Generic Error for problems with Rolling objects.
+    """
+
+class RollingWindowError(RollingError):
+    """
+    The window has to hold at least one value.
+    """
+
+class RollingOrderError(RollingError):
+    """
+    Values are added in order. A key (eg. the sie of the day) that isn't
+    later than the last one added means that value is already in the
+    window, or is out of order.
+    """
+
+class RollingEmptyError(RollingError):
+    """
+    There are no statistics for a window with nothing in it yet.
+    """
+
+#*******************************************************************************
+def loadState(path):
+    """
+    The dict saved by saveState() at 'path', or None if there isn't one
+    that can be read.
+    """
+    try:
+        f = open(path, 'rb')
+        try:
+            state = cPickle.load(f)
+        finally:
+            f.close()
+    except (IOError, EOFError, ValueError, cPickle.UnpicklingError):
+        return(None)
+    if not type(state) is dict:
+        return(None)
+    return(state)
+
+#*******************************************************************************
+def saveState(path, state):
+    """
+    Save the dict 'state', typically some Rolling objects and how far
+    into the data file they have got, via a temporary file and a rename
+    (as for Catalog.save()) so a failed run never leaves a partial file.
+    """
+    tmp = "%s.%d" % (path, os.getpid())
+    dir = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(dir):
+        os.makedirs(dir)
+    f = open(tmp, 'wb')
+    try:
+        cPickle.dump(state, f, cPickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+    os.rename(tmp, path)
+
+#*******************************************************************************
+def readRows(path, format, offset=0, until=None):
+    """
+    Parse the lines of the text file 'path' (eg. daily.data) from byte
+    'offset' on into an array of the np.dtype 'format', as np.loadtxt()
+    would. With 'until' stop after the line whose first field (without
+    its quotes) is equal to it, eg. a day "yyyy-mm-dd". A last line
+    without its newline is still being written and is left for next
+    time. Return the rows and the offset to carry on from.
+    """
+    (rows, starts, offset) = scanRows(path, format, offset, until)
+    return(rows, offset)
+
+#*******************************************************************************
+def scanRows(path, format, offset=0, until=None):
+    """
+    As readRows(), but also return the offset at which each row's line
+    starts, between the rows and the offset to carry on from.
+    """
+    lines = []
+    starts = []
+    f = open(path, 'r')
+    try:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if (line == '') or (line[-1:] != '\n'):
+                break
+            start = offset
+            offset += len(line)
+            fields = line.split()
+            if len(fields) == 0:
+                continue
+            lines.append(line)
+            starts.append(start)
+            if (not until is None) and (fields[0].strip('"') == until):
+                break
+    finally:
+        f.close()
+    if len(lines) == 0:
+        return(np.zeros(0, dtype=format), np.zeros(0, dtype=np.int64), offset)
+    return(np.loadtxt(lines, dtype=format, ndmin=1), np.array(starts, dtype=np.int64), offset)
+
+#*******************************************************************************
+def sieAt(path, offset):
+    """
+    The sie (the third field) of the line that starts at byte 'offset'
+    of the text file 'path', or None if no line starts there.
+    """
+    f = open(path, 'r')
+    try:
+        if offset > 0:
+            f.seek(offset - 1)
+            if f.read(1) != '\n':
+                return(None)
+        fields = f.readline().split()
+    finally:
+        f.close()
+    if (len(fields) < 3) or (not fields[2].isdigit()):
+        return(None)
+    return(int(fields[2]))
+
+#*******************************************************************************
+def latest(rows, count):
+    """
+    The last 'count' days in 'rows', in sie order. A day that is in
+    'rows' more than once, eg. because it was redone, has the values of
+    its last row.
+    """
+    if len(rows) == 0:
+        return(rows)
+    backwards = rows[::-1]
+    (sies, last) = np.unique(backwards['sie'], return_index=True)
+    return(backwards[last][-count:])
+
+#*******************************************************************************
+def recentRows(path, format, count, state, until=None):
+    """
+    The last 'count' days of the daily summaries in 'path' (up to the
+    day 'until', if given), in sie order, as latest() gives them. They
+    are found again on every run, rather than carried over, so a day
+    that has been redone since is seen with its new values. For a
+    Daily.Store that's a memory mapped slice off the end. A text file
+    (eg. daily.data) is read again from the first line of the days kept
+    last time, which the dict 'state' remembers between runs (see
+    saveState()). If the file has changed before that line, or there
+    aren't 'count' days from there on, it is read from the beginning.
+    """
+    if Daily.isStore(path):
+        return(latest(Daily.Store(path, format).last(count, until=until), count))
+    start = state.get('start', 0)
+    if (start > 0) and (sieAt(path, start) != state.get('startSie')):
+        start = 0
+    (rows, starts, offset) = scanRows(path, format, start, until=until)
+    recent = latest(rows, count)
+    if (start > 0) and (len(recent) < count):
+        # eg. 'until' is before the days kept last time
+        (rows, starts, offset) = scanRows(path, format, 0, until=until)
+        recent = latest(rows, count)
+    if len(recent) > 0:
+        first = np.flatnonzero(rows['sie'] >= recent['sie'][0])[0]
+        state['start'] = int(starts[first])
+        state['startSie'] = int(rows['sie'][first])
+    return(recent)
+
+#*******************************************************************************
+# Begin class Rolling
+class Rolling(object):
+    """
+    Statistics over the last 'window' values of a series that arrives a
+    value at a time, eg. the daily bytes moved from daily.data. The
+    values are kept in arrival order, to know which one leaves the window
+    next, and in sorted order, for the median and percentiles, so adding
+    a value is a binary search rather than a re-sort. A running sum gives
+    the mean. A Rolling object pickles, so saveState() can keep it
+    between runs.
+    """
+    def __init__(self, window, name=None):
+        self.Debug = False
+        self.DebugMessages = None
+        self.ErrorMessages = None
+        if window < 1:
+            handleError(self,
+                        RollingWindowError,
+                        "Rolling.__init__(): Error - window of %d values" % window)
+            # not reached
+        self.window = window
+        self.name = name
+        # Here, and below can get clearData()ed
+        self.Values = collections.deque()
+        self.Sorted = []
+        self.Sum = 0.0
+        self.key = None
+
+    def clearData(self):
+        self.Values = collections.deque()
+        self.Sorted = []
+        self.Sum = 0.0
+        self.key = None
+
+    def debug(self, module=None):
+        if (module is None) or (module == "Rolling"):
+            self.Debug = not self.Debug
+        if self.Debug == True:
+            self.DebugMessages = ''
+        else:
+            self.DebugMessages = None
+
+    def add(self, value, key=None):
+        """
+        Put 'value' in the window, and drop the oldest one if it's full.
+        The optional 'key' (anything that increases, eg. an sie) guards
+        against adding the same day twice.
+        """
+        if not key is None:
+            if (not self.key is None) and (key <= self.key):
+                handleError(self,
+                            RollingOrderError,
+                            "Rolling.add(): Error - key %s is not after %s" % (str(key), str(self.key)))
+                # not reached
+            self.key = key
+        value = float(value)
+        if len(self.Values) == self.window:
+            old = self.Values.popleft()
+            del self.Sorted[bisect.bisect_left(self.Sorted, old)]
+            self.Sum -= old
+        self.Values.append(value)
+        bisect.insort(self.Sorted, value)
+        self.Sum += value
+
+    def count(self):
+        return(len(self.Values))
+
+    def mean(self):
+        if len(self.Values) == 0:
+            handleError(self,
+                        RollingEmptyError,
+                        "Rolling.mean(): Error - No values")
+            # not reached
+        return(self.Sum/len(self.Values))
+
+    def percentile(self, q):
+        """
+        The q-th percentile (0 to 100) of the values in the window,
+        interpolated between neighbours as np.percentile() does.
+        """
+        n = len(self.Sorted)
+        if n == 0:
+            handleError(self,
+                        RollingEmptyError,
+                        "Rolling.percentile(): Error - No values")
+            # not reached
+        position = (n - 1)*q/100.0
+        below = int(np.floor(position))
+        above = min(below + 1, n - 1)
+        fraction = position - below
+        return(self.Sorted[below] + (self.Sorted[above] - self.Sorted[below])*fraction)
+
+    def median(self):
+        return(self.percentile(50.0))
+
+    def show(self):
+        print self.name, self.window, len(self.Values), self.key
+        if len(self.Values) > 0:
+            print "mean = %f, median = %f" % (self.mean(), self.median())
+
+# End of class Rolling
+#*******************************************************************************
@@ -67,9 +67,128 @@ class SeriesDifferentialError(SeriesError):
     looks more like an assert.
     """
 
+class SeriesDtypeError(SeriesError):
+    """
+    The values of a series can be kept as float64 or in a more compact
+    floating point type (float32, say), but not as anything else.
+    """
+
+# The dtype new Series keep their values in, unless they have their own
+# (see Series.setDtype()). The 'dtype' field of an LMTConfig file system
+# record is given to the objects for that file system (eg. FS.setDtype())
+# rather than set here.
+DefaultDtype = np.float64
+
+# The dtype that sums of several series (Series.add(), Counter.sumOf(),
+# CPU.add(), and the OSS and file system aggregates) are kept in, whatever
+# the dtype of their parts, so that small values aren't lost against big
+# ones.
+SumDtype = np.float64
+
+def checkDtype(dtype):
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise SeriesDtypeError("Series.checkDtype(): Error - %s is not a floating point type" % str(dtype))
+    return(dtype.type)
+
+def setDefaultDtype(dtype):
+    """
+    Keep the values of every Series without a dtype of its own in 'dtype',
+    e.g. np.float32 or the string 'float32'. Accumulations (sums,
+    statistics, counter differentials) are still done in float64.
+    """
+    global DefaultDtype
+    DefaultDtype = checkDtype(dtype)
+
+def getDefaultDtype():
+    return(DefaultDtype)
+
+def newValid(shape):
+    """
+    An all-invalid validity bitmap for values of the given shape. The
+    bits are packed (eight to a byte, as np.packbits() does it) along the
+    last axis, so a row of a 2-D or 3-D bitmap is the bitmap for the
+    corresponding row of the values.
+    """
+    shape = tuple(shape)
+    return(np.zeros(shape[:-1] + ((shape[-1] + 7)//8,), dtype=np.uint8))
+
+def packValid(valid):
+    """
+    Pack a boolean array of valid entries into a validity bitmap.
+    """
+    return(np.packbits(np.asarray(valid, dtype=np.bool_), axis=-1))
+
+def unpackValid(Valid, length):
+    """
+    The boolean array, with 'length' entries along the last axis, of the
+    validity bitmap 'Valid'.
+    """
+    return(np.unpackbits(Valid, axis=-1)[..., :length].astype(np.bool_))
+
+def countValid(Valid):
+    """
+    The number of valid entries in the bitmap. The padding bits of the last
+    byte in each row are never set.
+    """
+    return(int(np.unpackbits(Valid).sum()))
+
+def markValid(Valid, index):
+    """
+    Set the bits in the validity bitmap 'Valid' for the entries at
+    'index'. That is an integer or integer array for a 1-D bitmap, or a
+    tuple of them, as for fancy indexing, with one per axis.
+    """
+    if not isinstance(index, tuple):
+        index = (index,)
+    column = np.asarray(index[-1], dtype=np.int64)
+    bits = np.left_shift(1, 7 - (column & 7)).astype(np.uint8)
+    np.bitwise_or.at(Valid, index[:-1] + (column >> 3,), bits)
+
+def interpolateArray(Data, valid, points):
+    """
+    Fill the invalid entries of the 1-D or 2-D array Data, in place, by
+    linear interpolation along its last axis. 'valid' is the boolean array
+    (cf. unpackValid()) of entries that have values. The 'points' are the
+    positions of the entries along that axis (array indices, or the sie
+    values of a TimeSteps object), so a gap across uneven steps is
+    weighted by the time between them. Entries before the first or after
+    the last value present get that first/last value. A row with no
+    values at all is left alone.
+
+    All the rows are done with one np.interp() call: each row is shifted
+    along the axis far enough that it doesn't overlap its neighbours, and
+    its first and last entries are pinned to the values the ends of the
+    row should get.
+    """
+    if valid.all():
+        return
+    length = Data.shape[-1]
+    data = Data.reshape(-1, length)
+    valid = valid.reshape(-1, length)
+    present = valid.any(axis=1)
+    if not present.any():
+        return
+    rows = np.arange(data.shape[0])
+    first = np.argmax(valid, axis=1)
+    last = length - 1 - np.argmax(valid[:, ::-1], axis=1)
+    work = data.copy()
+    work[:, 0] = data[rows, first]
+    work[:, -1] = data[rows, last]
+    anchors = valid.copy()
+    anchors[:, 0] = True
+    anchors[:, -1] = True
+    anchors[~present] = False
+    points = np.asarray(ma.getdata(points), dtype=np.float64)
+    points = points - points[0]
+    offsets = (points[-1] + 1.0)*rows
+    axis = points[np.newaxis, :] + offsets[:, np.newaxis]
+    gaps = ~valid & present[:, np.newaxis]
+    Data[gaps.reshape(Data.shape)] = np.interp(axis[gaps], axis[anchors], work[anchors])
+
 #*******************************************************************************
 # Begin class Series
-class Series:
+class Series(object):
     """
     Container class for Series data. It is possible for a particular entry
     to lack a value, in which case it should remain masked.
@@ -79,6 +198,12 @@ class Series:
     to the series data. Neither is required for this class to carry out
     any of the actions I have in mind.
 
+    The values are kept in a plain ndarray, Data, along with a packed
+    validity bitmap, Valid, rather than in a numpy.ma masked array. The
+    Values attribute still gives a masked array, but it is built on
+    request as a view onto Data. Writing a value through that view
+    changes Data, but changing its mask does not change Valid, so assign
+    a whole new array to Values, or use register(), to do that.
     """
     def __init__(self, name=None, units=None):
         """
@@ -93,16 +218,95 @@ class Series:
         self.units = units
         # Here, and below can get clear_data()ed
         self.length = 0
-        # The set of values in the series
-        self.Values = None
+        # The set of values in the series and the bitmap of which are valid
+        self.Data = None
+        self.Valid = None
+        # The dtype of Data, or None for DefaultDtype. See setDtype().
+        self.dtype = None
         # When more than one Series is combined we can track that here.
         self.count = 0
         # When the time comes we can attach various statistics about the
         # Series.
         self.Stats = None
 
+    def getValuesArray(self):
+        if self.Data is None:
+            return(None)
+        return(ma.array(self.Data, mask=~self.getValid(), copy=False))
+
+    def setValuesArray(self, values):
+        if values is None:
+            self.Data = None
+            self.Valid = None
+            return
+        self.Data = ma.getdata(values)
+        if self.Data.dtype != self.getDtype():
+            self.Data = self.Data.astype(self.getDtype())
+        self.Valid = packValid(~ma.getmaskarray(values))
+        self.changed()
+
+    Values = property(getValuesArray, setValuesArray)
+
+    def setStorage(self, Data, Valid):
+        """
+        Use the given (typically a row of a larger matrix) Data array and
+        Valid bitmap for this series without copying them. Anything put
+        in them later shows up in this series.
+        """
+        self.Data = Data
+        self.Valid = Valid
+        self.changed()
+
+    def getDtype(self):
+        """
+        The dtype the values are kept in.
+        """
+        if self.dtype is None:
+            return(DefaultDtype)
+        return(self.dtype)
+
+    def setDtype(self, dtype):
+        """
+        Keep this series' values in 'dtype' rather than the library's
+        DefaultDtype (or in DefaultDtype again if 'dtype' is None),
+        converting any it already has.
+        """
+        if dtype is None:
+            self.dtype = None
+        else:
+            self.dtype = checkDtype(dtype)
+        self.compact()
+
+    def compact(self):
+        """
+        Convert Data to the series' dtype if it isn't in it already, e.g.
+        once a Counter's float64 observations have become rates.
+        """
+        if (not self.Data is None) and (self.Data.dtype != self.getDtype()):
+            self.Data = self.Data.astype(self.getDtype())
+            self.changed()
+
+    def getValid(self):
+        """
+        The boolean array of entries that have a value.
+        """
+        return(unpackValid(self.Valid, self.Data.shape[-1]))
+
+    def setValid(self, valid=True):
+        """
+        Mark the entries valid (or not) according to the boolean 'valid',
+        which may be a single value for all of them.
+        """
+        valid = np.broadcast_to(valid, self.Data.shape)
+        self.Valid[...] = packValid(valid)
+        self.changed()
+
+    def countMissing(self):
+        return(self.Data.size - countValid(self.Valid))
+
     def clearData(self):
-        self.Values = None
+        self.Data = None
+        self.Valid = None
         self.count = 0
         self.Stats = None
         self.DebugMessages = None
@@ -130,8 +334,8 @@ class Series:
         self.Stats.show()
 
     def setLength(self, length):
-        self.Values = ma.empty(length, dtype=np.float64)
-        self.Values.mask = True
+        self.Data = np.empty(length, dtype=self.getDtype())
+        self.Valid = newValid((length,))
         self.length = length
 
     def register(self, index, value):
@@ -139,7 +343,7 @@ class Series:
         """
         if self.Debug == True:
             self.DebugMessages += "Series.register(): name %s, index %d, value %f" % (self.name, index, value)
-        if self.Values == None:
+        if self.Data is None:
             handleError(self,
                         SeriesRegisterError,
                         "Series.register(): Error - No Values array. Did you forget to call setLength?")
@@ -150,52 +354,44 @@ class Series:
                         "Series.register(): Error - Index %d out of range for %d long series" % (index, self.length))
             #not reached
         # I could also check that value is a number of some sort
-        self.Values[index] = value
+        self.Data[index] = value
+        self.Valid[index >> 3] |= 0x80 >> (index & 7)
+        self.changed()
 
     def gapFraction(self, before, at, after):
         return((float(at) - float(before))/
                (float(after) - float(before)))
 
+    def interpolationPoints(self):
+        """
+        The positions of the Values along the series used by interpolate().
+        For a plain Series that is just the index. Classes with a TimeSteps
+        object use its sie values instead. cf. gapFraction().
+        """
+        return(np.arange(self.length, dtype=np.float64))
+
     def interpolate(self):
         """
         There may be missing observations at the beginning, in the middle,
         or at the end. For the beginning and end propogate the first/last
         value present to the missing values. In the middle interpolate
-        across the missing values.
+        across the missing values. See interpolateArray().
         """
-        l = len(self.Values)
-        if ma.count_masked(self.Values) == 0:
+        l = len(self.Data)
+        valid = self.getValid()
+        if valid.all():
             # no masked values at all so no work to do
             return(l)
-        self.Values.soften_mask()
-        if ma.count(self.Values) == 0:
+        if not valid.any():
             # no registered values at all, so there was
             # no activity in this interval (or you messed up)
-            self.Values[:] = 0
-            return(l)
-        # The first valid value
-        i = np.where(self.Values.mask == False)[0][0]
-        if i > 0:
-            # there is a gap at the beginning
-            self.Values[0:i] = self.Values[i]
-        # The last valid value
-        j = np.where(self.Values.mask == False)[0][-1]
-        if j < l - 1:
-            # there is a gap at the end
-            self.Values[j+1:l] = self.Values[j]
-        while ma.count_masked(self.Values[i:j]) > 0:
-            # Find the begining of the first gap still remaining
-            k = i + np.where(self.Values.mask[i:j+1] == True)[0][0]
-            # Find its end
-            m = k + np.where(self.Values.mask[k:j+1] == False)[0][0]
-            # interpolate
-            self.Values[k:m] = (self.Values[k-1] +
-                                ((self.Values[m] - self.Values[k-1])*
-                                 ((np.array(range(m-k), dtype=np.float64)+1)/(l-k+1))))
-            i = m
+            self.Data[:] = 0
+        else:
+            interpolateArray(self.Data, valid, self.interpolationPoints())
+        # setValid() also takes care of changed()
+        self.setValid()
         return(l)
 
-
     def differential(self):
         """
         The differential is going ot have one fewer elements than the
@@ -205,15 +401,17 @@ class Series:
         worked out with the classes that coordinate with sequences of
         time steps.
         """
-        if ma.count_masked(self.Values) != 0:
+        valid = self.getValid()
+        if not valid.all():
             print "obj %s: " % self.name
-            for val in np.where(self.Values.mask == True)[0]:
+            for val in np.where(valid == False)[0]:
                 print val
             handleError(self,
                         SeriesDifferentialError,
                         "Series.differential(): Warning - Masked values present. Did you mean to interpolate?")
-        self.Values[1:] = np.diff(self.Values)
-        self.Values[0] = 0.0
+        self.Data[1:] = np.diff(self.Data)
+        self.Data[0] = 0.0
+        self.changed()
 
     def setCount(self, count):
         self.count = count
@@ -227,26 +425,54 @@ class Series:
         once you've done the stats(). I set the count to 1 and thereafter
         it can be accumulated into aggregate Series objects. You can also
         test its status by checking if getCount returns something bigger
-        than 0.
+        than 0. The Statistics aren't actually calculated until they are
+        asked for, so this is cheap to call after every add().
         """
-        self.Stats = Statistics.Statistics(self.Values)
+        self.newStats()
         self.count = 1
 
+    def newStats(self):
+        if self.countMissing() == 0:
+            self.Stats = Statistics.Statistics(self.Data)
+        else:
+            self.Stats = Statistics.Statistics(self.Values)
+
+    def changed(self):
+        """
+        Anything that changes Data or Valid calls this, so that Statistics
+        made before the change don't describe the old values. The new
+        ones are worked out when they are next asked for, as in stats().
+        """
+        if not self.Stats is None:
+            self.newStats()
+
     def copy(self, series):
-        self.Values = series.Values.copy()
+        """
+        Entries without a value in 'series' become zero (and valid) here.
+        """
+        valid = series.getValid()
+        self.Data = series.Data.astype(self.getDtype())
+        self.Data[~valid] = 0
+        self.Valid = packValid(np.ones(self.Data.shape, dtype=np.bool_))
         self.count = series.count
         self.length = series.length
-        self.Values[np.where(self.Values.mask == True)] = 0
         if self.Stats == None:
             self.Stats = Statistics.Statistics(None)
         self.Stats.copy(series.Stats)
 
     def add(self, series):
-        if self.Values == None:
+        """
+        Accumulate 'series' into this one, which is kept in SumDtype from
+        now on whatever dtype it had.
+        """
+        self.setDtype(SumDtype)
+        if self.Data is None:
             self.copy(series)
         else:
-            self.Values[np.where(np.logical_and(series.Values.mask == False, self.Values.mask == True))] = 0.0
-            self.Values[np.where(series.Values.mask == False)] += series.Values[np.where(series.Values.mask == False)]
+            valid = series.getValid()
+            self.Data[valid & ~self.getValid()] = 0.0
+            self.Data[valid] += series.Data[valid]
+            self.Valid |= series.Valid
             self.count += series.count
         self.stats()
 
@@ -258,5 +484,3 @@ class Series:
 
 # End of class Series
 #*******************************************************************************
-
-
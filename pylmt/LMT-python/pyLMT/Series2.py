@@ -29,7 +29,6 @@
 """
 
 import numpy as np
-import numpy.ma as ma
 
 from pyLMT import Series, Statistics, defaultErrorHandler
 from _pylmt_exceptions import Error
@@ -106,8 +105,8 @@ class Series2(Series.Series):
             print self.DebugMessages
 
     def setWidthAndLength(self, width, length):
-        self.Values = ma.empty((width, length), dtype=np.float64)
-        self.Values.mask = True
+        self.Data = np.empty((width, length), dtype=np.float64)
+        self.Valid = Series.newValid((width, length))
         self.width = width
         self.length = length
 
@@ -116,7 +115,7 @@ class Series2(Series.Series):
         """
         if self.Debug == True:
             self.DebugMessages += "Series2.register(): name %s, index %d, value %f" % (self.name, index, value)
-        if self.Values == None:
+        if self.Data is None:
             handleError(self,
                         SeriesRegisterError,
                         "Series2.register(): Error - No Values array. Did you forget to call setLength?")
@@ -132,97 +131,56 @@ class Series2(Series.Series):
                         "Series2.register(): Error - Series index %d out of range for %d long series" % (sIndex, self.length))
             #not reached
         # I could also check that value is a number of some sort
-        self.Values[vIndex,sIndex] = value
+        self.Data[vIndex,sIndex] = value
+        self.Valid[vIndex,sIndex >> 3] |= 0x80 >> (sIndex & 7)
 
     def gapFraction(self, before, at, after):
         return((float(at) - float(before))/
                (float(after) - float(before)))
 
+    def interpolationPoints(self):
+        """
+        The positions of the Values along the series, as in
+        Series.interpolationPoints().
+        """
+        return(np.arange(self.length, dtype=np.float64))
+
     def interpolate(self):
+        """
+        Interpolate all the vector positions at once. A position with no
+        registered values anywhere in the series is left masked, since that
+        series probably wasn't in use. See Series.interpolateArray().
+        """
         # If there are no masked values there is nothing to do
-        if ma.count_masked(self.Values) == 0:
+        valid = self.getValid()
+        if valid.all():
             if self.Debug == True:
                 self.DebugMessages += "Series2.interpolate(): No masked values"
-            return(len(self.Values))
-        for vIndex in range(self.width):
-            self.interpolateItem(vIndex)
+            return(len(self.Data))
+        Series.interpolateArray(self.Data, valid, self.interpolationPoints())
+        # Only the rows that had any values are now completely filled in
+        present = valid.any(axis=1)
+        valid[present] = True
+        self.setValid(valid)
+        return(len(self.Data))
 
     def interpolateItem(self, vIndex):
         """
-        Interpolate oover the series of values at vector position vIndex.
+        Interpolate over the series of values at vector position vIndex.
         There may be missing observations at the beginning, in the middle,
         or at the end. For the beginning and end propogate the first/last
         value present to the missing values. In the middle interpolate
         across the missing values.
         """
-        self.Values.soften_mask()
-        # At the beginning
-        sIndex= 0
-        # Find the first non-masked value, if any
-        while (sIndex< self.length) and (self.Values[vIndex,sIndex] is ma.masked):
-            sIndex+= 1
-        if sIndex== self.length:
+        valid = Series.unpackValid(self.Valid[vIndex], self.length)
+        if not valid.any():
             # Nothing was ever registered, then this time series probably wasn't in use
             if self.Debug == True:
                 self.DebugMessages += "Series2.interpolate(): Warning - There are no valid values over which to interpolate"
             return(0)
-        # now go back and copy the value to all the previous ones back to the beginning
-        after = sIndex
-        before = None
-        while sIndex> 0:
-            sIndex-= 1
-            self.Values[vIndex,sIndex] = self.Values[vIndex,sIndex+1]
-        # Resume from the point after the first non-masked value
-        sIndex= after+1
-        while sIndex< self.length:
-            # Find the next masked value, if any
-            while (sIndex< self.length) and (not (self.Values[vIndex,sIndex] is ma.masked)):
-                sIndex+= 1
-            if sIndex== self.length:
-                # This is the usual exit point
-                if self.Debug == True:
-                    self.DebugMessages += "Series2.interpolate(): last after value = %d" % after
-                    if before != None:
-                        self.DebugMessages +=  "Series2.interpolate(): last before value = %d" % before
-                return(len(self.Values))
-            # We have one or more masked values to interpolate across
-            before = sIndex- 1
-            # Find the next non-maked value, if any
-            while (sIndex< self.length) and (self.Values[vIndex,sIndex] is ma.masked):
-                sIndex+= 1
-            if sIndex== self.length:
-                # The masked value (or sequence of them) is at the end.
-                # This will also be an exit point.
-                sIndex= before + 1
-                while sIndex< self.length:
-                    self.Values[vIndex,sIndex] = self.Values[vIndex,before]
-                    sIndex+= 1
-                # and we're done
-                if self.Debug == True:
-                    self.DebugMessages +=  "Series2.interpolate(): last after value = %d" % after
-                    self.DebugMessages +=  "Series2.interpolate(): last before value = %d" % before
-                return(len(self.Values))
-            # A masked value (or sequence of them) is in the middle, so
-            # interpolate across the gap
-            after = sIndex
-            for j in range(before+1, after):
-                # interpolate
-                frac = self.gapFraction(before, j, after)
-                self.Values[vIndex,j] = (self.Values[vIndex,before] +
-                               frac*(self.Values[vIndex, after] - self.Values[vIndex, before]))
-                if self.Values[vIndex,j] is ma.masked:
-                    handleError(self,
-                                SeriesInterpolateError,
-                                "Series2.interpolate(): ERROR - Values[%d,%d] = %f is still masked!" % (vIndex, j, self.Values[vIndex, j]))
-                    # not reached
-            sIndex= after+1
-        # We only reach this point if the next-to-last value is masked and
-        # the last is not. Then the above assignment (sIndex= after+1) creates the
-        # termination condition for the loop.
-        if self.Debug == True:
-            self.DebugMessages += "Series2.interpolate(): last after value = %d" % after
-            self.DebugMessages +=  "Series2.interpolate(): last before value = %d" % before
-        return(len(self.Values))
+        Series.interpolateArray(self.Data[vIndex], valid, self.interpolationPoints())
+        self.Valid[vIndex] = Series.packValid(np.ones(self.length, dtype=np.bool_))
+        return(len(self.Data))
 
 
     def differential(self):
@@ -234,13 +192,12 @@ class Series2(Series.Series):
         worked out with the classes that coordinate with sequences of
         time steps.
         """
-        if ma.count_masked(self.Values) != 0:
+        if self.countMissing() != 0:
             handleError(self,
                         SeriesDifferentialError,
                         "Series2.differential(): Warning - Masked values present. Did you mean to interpolate?")
-        for vIndex in range(self.width):
-            self.Values[vIndex, 1:] = np.diff(self.Values[vIndex,:])
-            self.Values[vIndex,0] = 0.0
+        self.Data[:, 1:] = np.diff(self.Data, axis=1)
+        self.Data[:, 0] = 0.0
 
     def setCount(self, count):
         self.count = count
@@ -249,17 +206,20 @@ class Series2(Series.Series):
         return(self.count)
 
     def copy(self, series):
-        self.Values = series.Values.copy()
+        self.Data = series.Data.copy()
+        self.Valid = series.Valid.copy()
         self.width = series.width
         self.length = series.length
         self.count = series.count
 
     def add(self, series):
-        if self.Values == None:
+        if self.Data is None:
             self.copy(series)
             self.count = 1
         else:
-            self.Values += series.Values
+            # As with masked arrays, the sum only has a value where both do
+            self.Data += series.Data
+            self.Valid &= series.Valid
             self.count += series.count
 
 # End of class Series
@@ -29,6 +29,7 @@
 """
 
 import numpy as np
+import numpy.ma as ma
 
 from pyLMT import defaultErrorHandler
 from _pylmt_exceptions import Error
@@ -37,8 +38,7 @@ handleError = defaultErrorHandler
 
 class StatisticsError(Error):
     """
-    Generic Error for problems with Statistics objects. I think there is only
-    one.
+    Generic Error for problems with Statistics objects.
     """
 
 class StatisticsCopyError(StatisticsError):
@@ -48,10 +48,18 @@ class StatisticsCopyError(StatisticsError):
 
 #*******************************************************************************
 # Begin class Statistics
-class Statistics:
+class Statistics(object):
     """
     Container class for Statistics on an array of values.
 
+    Nothing is calculated when the object is made. The first time one of
+    total, max, ave, stdev, above, totAbv, or totAbvFrac is asked for the
+    array is reduced, in one go, to a summary: the number of values,
+    their sum, the sum of squared deviations from their mean, their max,
+    and the count and total of those above the mean. The array is not
+    copied, and once it is summarized it is let go, so the Statistics
+    describe the values as they were at that time. A Series makes new
+    Statistics whenever its values change (see Series.changed()).
     """
     def __init__(self, array):
         """
@@ -59,29 +67,27 @@ class Statistics:
         self.Debug = False
         self.DebugMessages = None
         self.ErrorMessages = None
+        self.clearData()
         if (array is None) or (len(array) <= 0):
             # Sometimes we just want to get the object and fill it
             # in later, as when we copy from another Statsitics object.
-            self.clearData()
             return
-        self.total = np.sum(array)
-        self.max = np.max(array)
-        self.ave = np.average(array)
-        self.stdev = np.std(array)
-        self.above = len(array[array>self.ave])
-        self.totAbv = np.sum(array[array>self.ave])
-        if self.total > 0:
-            self.totAbvFrac = float(self.totAbv)/float(self.total)
-        else:
-            self.totAbvFrac = 0
+        if isinstance(array, ma.MaskedArray):
+            if ma.count_masked(array) != 0:
+                array = array.compressed()
+            else:
+                array = ma.getdata(array)
+        self.Array = np.asarray(array)
 
     def clearData(self):
-        self.max = None
-        self.ave = None
-        self.stdev = None
-        self.above = None
-        self.totAbv = None
-        self.totAbvFrac = None
+        # The array, until it is summarized
+        self.Array = None
+        self.n = 0
+        self.Sum = 0.0
+        self.M2 = 0.0
+        self.Max = None
+        self.Above = 0
+        self.TotAbv = 0.0
 
     def debug(self, module=None):
         if (module is None) or (module == "Statistics"):
@@ -91,6 +97,72 @@ class Statistics:
         else:
             self.DebugMessages = None
 
+    def summarize(self):
+        if self.Array is None:
+            return
+        array = self.Array
+        self.Array = None
+        self.n = array.size
+        if self.n == 0:
+            return
+        self.Sum = np.sum(array, dtype=np.float64)
+        deviation = np.subtract(array, self.Sum/self.n, dtype=np.float64)
+        self.M2 = np.vdot(deviation, deviation)
+        self.Max = np.max(array)
+        selected = array[deviation > 0]
+        self.Above = len(selected)
+        self.TotAbv = np.sum(selected, dtype=np.float64)
+
+    def getTotal(self):
+        self.summarize()
+        if self.n == 0:
+            return(None)
+        return(self.Sum)
+
+    def getMax(self):
+        self.summarize()
+        return(self.Max)
+
+    def getAve(self):
+        self.summarize()
+        if self.n == 0:
+            return(None)
+        return(self.Sum/self.n)
+
+    def getStdev(self):
+        self.summarize()
+        if self.n == 0:
+            return(None)
+        return(np.sqrt(self.M2/self.n))
+
+    def getAbove(self):
+        self.summarize()
+        if self.n == 0:
+            return(None)
+        return(self.Above)
+
+    def getTotAbv(self):
+        self.summarize()
+        if self.n == 0:
+            return(None)
+        return(self.TotAbv)
+
+    def getTotAbvFrac(self):
+        total = self.getTotal()
+        if total is None:
+            return(None)
+        if total > 0:
+            return(float(self.TotAbv)/float(total))
+        return(0)
+
+    total = property(getTotal)
+    max = property(getMax)
+    ave = property(getAve)
+    stdev = property(getStdev)
+    above = property(getAbove)
+    totAbv = property(getTotAbv)
+    totAbvFrac = property(getTotAbvFrac)
+
     def show(self):
         """
         This is one of the few times we actually call 'print' explicitely.
@@ -110,16 +182,14 @@ class Statistics:
                         StatisticsCopyError,
                         "Statistics.copy(): Error - no Statistics to copy")
             # not reached
-        self.total = stats.total
-        self.max = stats.max
-        self.ave = stats.ave
-        self.stdev = stats.stdev
-        self.above = stats.above
-        self.totAbv = stats.totAbv
-        self.totAbvFrac = stats.totAbvFrac
-
-    def getMax(self):
-        return(self.max)
+        stats.summarize()
+        self.Array = None
+        self.n = stats.n
+        self.Sum = stats.Sum
+        self.M2 = stats.M2
+        self.Max = stats.Max
+        self.Above = stats.Above
+        self.TotAbv = stats.TotAbv
 
 # End of class Statistics
 #*******************************************************************************
@@ -30,6 +30,7 @@
 
 import sys
 import os
+import copy
 import re
 import time
 import string
@@ -40,7 +41,7 @@ import MySQLdb
 import numpy as np
 import numpy.ma as ma
 
-from pyLMT import Series, defaultErrorHandler
+from pyLMT import Series, TimeSteps, defaultErrorHandler
 
 from _pylmt_exceptions import Error
 
@@ -58,6 +59,118 @@ class TimeSeriesRegisterError(TimeSeriesError):
     to make arrays.
     """
 
+class TimeSeriesResampleError(TimeSeriesError):
+    """
+    A series can only be resampled onto periods of a positive number of
+    seconds, by one of the RESAMPLE_HOWS reductions, and once it has a
+    TimeSteps object and values.
+    """
+
+# The ways resample() can reduce the steps that fall in each period
+RESAMPLE_HOWS = ('mean', 'max', 'min', 'sum')
+
+def resampleArray(Data, valid, Steps, periods, hows):
+    """
+    Reduce the values in Data, whose last axis follows the TimeSteps
+    object Steps, and which have a value where the boolean array 'valid'
+    is True, onto each of the 'periods' (in seconds). The steps fall into
+    periods aligned with the epoch, so a period of 86400 gives (UTC) days.
+    All the periods come from one pass over Data: the shortest period is
+    reduced from Data with np.add.reduceat() and friends, and each longer
+    one from the next shorter one when it is a multiple of it (and from
+    Data again otherwise).
+
+    Return a dict with an entry (sies, first, Result) for each period,
+    where 'sies' are the start of each period with any steps in it,
+    'first' is the index in Steps of its first step, and Result is a dict
+    of (Values, Valid) pairs for each of the 'hows' (see RESAMPLE_HOWS).
+    A period without any valid values is not Valid.
+    """
+    sies = np.asarray(ma.getdata(Steps.Steps), dtype=np.int64)
+    Data = np.where(valid, Data, 0.0)
+    Levels = {}
+    finer = None
+    for period in sorted(set(periods)):
+        if (not finer is None) and (period % finer[0] == 0):
+            (fine_period, fine_sies, fine_first, counts, sums, maxs, mins) = finer
+        else:
+            (fine_sies, fine_first) = (sies, np.arange(len(sies)))
+            (counts, sums) = (valid.astype(np.float64), Data)
+            maxs = np.where(valid, Data, -np.inf)
+            mins = np.where(valid, Data, np.inf)
+        keys = fine_sies//period
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        counts = np.add.reduceat(counts, starts, axis=-1)
+        sums = np.add.reduceat(sums, starts, axis=-1, dtype=np.float64)
+        maxs = np.maximum.reduceat(maxs, starts, axis=-1)
+        mins = np.minimum.reduceat(mins, starts, axis=-1)
+        first = fine_first[starts]
+        finer = (period, keys[starts]*period, first, counts, sums, maxs, mins)
+        present = (counts > 0)
+        Result = {}
+        for how in hows:
+            if how == 'mean':
+                Values = sums/np.maximum(counts, 1)
+            elif how == 'max':
+                Values = maxs
+            elif how == 'min':
+                Values = mins
+            else:
+                Values = sums
+            Result[how] = (np.where(present, Values, 0.0), present)
+        Levels[period] = (keys[starts]*period, first, Result)
+    return(Levels)
+
+def resampleSeries(series, period, how):
+    """
+    The work of TimeSeries.resample() and HistSeries.resample(). Each
+    resampled series is a (shallow) copy of 'series', so it is of the
+    same class and keeps its name, units, Bins, and so on, but has its
+    own values and a TimeSteps object with one step per period.
+    """
+    periods = period
+    if np.isscalar(period):
+        periods = (period,)
+    hows = how
+    if isinstance(how, str):
+        hows = (how,)
+    for p in periods:
+        if (int(p) != p) or (p <= 0):
+            raise TimeSeriesResampleError("TimeSeries.resample(): Error - bad period %s" % str(p))
+    for h in hows:
+        if not h in RESAMPLE_HOWS:
+            raise TimeSeriesResampleError("TimeSeries.resample(): Error - unrecognized reduction %s" % str(h))
+    if (series.Steps is None) or (series.Data is None):
+        raise TimeSeriesResampleError("TimeSeries.resample(): Error - %s has no steps or values" % series.name)
+    Levels = resampleArray(series.Data, series.getValid(), series.Steps,
+                           [int(p) for p in periods], hows)
+    Resampled = {}
+    for p in periods:
+        (sies, first, Result) = Levels[int(p)]
+        Steps = TimeSteps.TimeSteps()
+        Steps.begin = series.Steps.begin
+        Steps.end = series.Steps.end
+        Steps.setArrays(sies, ma.getdata(series.Steps.TS_IDs)[first])
+        for h in hows:
+            (Values, valid) = Result[h]
+            resampled = copy.copy(series)
+            resampled.Steps = Steps
+            resampled.Data = Values.astype(series.getDtype())
+            resampled.Valid = Series.packValid(valid)
+            resampled.length = len(sies)
+            resampled.Stats = None
+            resampled.count = 0
+            # A Counter's Missing and Resets are per step of the original
+            if hasattr(resampled, 'Resets'):
+                resampled.Missing = None
+                resampled.Resets = None
+            if series.count > 0:
+                resampled.stats()
+            Resampled[(p, h)] = resampled
+    if np.isscalar(period) and isinstance(how, str):
+        return(Resampled[(period, how)])
+    return(Resampled)
+
 #*******************************************************************************
 # Begin class TimeSeries
 class TimeSeries(Series.Series):
@@ -112,7 +225,7 @@ class TimeSeries(Series.Series):
         else:
             length = 0
         if length > 0:
-            Series.Series.setLength(self, length)
+            self.setLength(length)
 
     def showStep(self, step):
         # Here 'step' is an index into the Steps array. In other contexts
@@ -164,12 +277,20 @@ class TimeSeries(Series.Series):
                (float(self.Steps.Steps[after]) -
                 float(self.Steps.Steps[before])))
 
+    def interpolationPoints(self):
+        """
+        Interpolate over the sie values of the steps, rather than their
+        indices, so that gaps across uneven steps are time-weighted.
+        """
+        return(self.Steps.Steps)
+
     def interpolate(self):
         """
         There may be missing observations at the beginning, in the middle,
         or at the end. For the beginning and end propogate the first/last
         value present to the missing values. In the middle interpolate
-        across the missing values. The only difference
+        across the missing values. The only difference is the
+        interpolationPoints().
         """
         return(Series.Series.interpolate(self))
 
@@ -188,7 +309,18 @@ class TimeSeries(Series.Series):
         #self.Diff /= self.Steps.Diff
         Series.Series.differential(self)
         # The Steps.Diff will also have one fewer entry (see Series.diffeential)
-        self.Values[1:] /= self.Steps.Diff
+        self.Data[1:] /= self.Steps.Diff
+        self.changed()
+
+    def resample(self, period, how='mean'):
+        """
+        The series reduced onto periods of 'period' seconds, eg. 3600 for
+        hourly or 86400 for daily values, by 'how', one of 'mean', 'max',
+        'min', or 'sum'. If either is a list then all the combinations
+        come back, from one pass over the values, in a dict keyed by
+        (period, how). See resampleArray().
+        """
+        return(resampleSeries(self, period, how))
 
     def getSteps(self):
         """
@@ -209,7 +341,7 @@ class TimeSeries(Series.Series):
             self.setSteps(series.Steps)
             # if we're initializing Steps and Values then we need
             # zero Values out with non-masked values.
-            self.Values = np.zeros(series.length, dtype=np.float64)
+            self.Values = np.zeros(series.length, dtype=self.getDtype())
         Series.Series.add(self, series)
 
 # End of class TimeSeries
@@ -82,6 +82,35 @@ class TimeStepsNoStepsError(TimeStepsError):
     Most things require that the Steps attribute be set (to a TimeSteps object).
     """
 
+def lookup(table, keys):
+    """
+    'table' is a sorted array of unique values. Return the index in 'table'
+    of each value in the array 'keys', with -1 wherever the key does not
+    appear in the table.
+    """
+    table = np.asarray(table)
+    keys = np.asarray(keys)
+    if len(table) == 0:
+        return(-np.ones(keys.shape, dtype=np.int64))
+    indices = np.searchsorted(table, keys).astype(np.int64)
+    indices[indices >= len(table)] = 0
+    indices[table[indices] != keys] = -1
+    return(indices)
+
+def find_indices(table, keys):
+    """
+    As with lookup(), but 'table' need not be sorted (the values in it must
+    still be unique). Returns the array of indices along with a boolean
+    array that is False wherever the key was not in the table. The index for
+    such a key is -1.
+    """
+    table = np.asarray(table)
+    order = np.argsort(table, kind='mergesort')
+    indices = lookup(table[order], keys)
+    valid = (indices >= 0)
+    indices[valid] = order[indices[valid]]
+    return(indices, valid)
+
 #*******************************************************************************
 # Begin class TimeSteps
 class TimeSteps:
@@ -105,12 +134,18 @@ class TimeSteps:
 
     numSteps = len(Steps)
 
-    The dictionary StepDict holds the index in Steps for each sie value, i.e.:
-      Steps[StepDict[sie]] = sie
+    TS_IDs holds the TS_ID for each step. More than one TS_ID may share an sie
+    value (again around daylight savings transitions). AllTS_IDs is the sorted
+    array of every TS_ID seen and AllTS_IDIndex the index in Steps for each.
 
-    Since we don't know in advance what sie values we'll need we have to build
-    StepDict incrementally with the examine() method and then fill in the Steps
-    array with the register() method..
+    Lookups of an sie or TS_ID value, or of whole arrays of them, are binary
+    searches (np.searchsorted) in those sorted arrays. getTimeSteps() gets
+    the sie and TS_ID values for the whole interval as arrays and hands them
+    to setArrays(), so no per-timestamp conversion is needed.
+
+    The older incremental interface is still available. The examine() method
+    collects the sie values in the dictionary StepDict and the register() method
+    then builds the Steps array from them.
 
     """
     def __init__(self):
@@ -140,6 +175,9 @@ class TimeSteps:
         self.StepDict = {}
         self.TS_IDDict = {}
         self.Timestamps = {}
+        self.TS_IDs = None
+        self.AllTS_IDs = None
+        self.AllTS_IDIndex = None
         self.dst = None
         self.HaveData = False
 
@@ -153,7 +191,11 @@ class TimeSteps:
         self.Steps = None
         self.Diff = None
         self.StepDict = {}
+        self.TS_IDDict = {}
         self.Timestamps = {}
+        self.TS_IDs = None
+        self.AllTS_IDs = None
+        self.AllTS_IDIndex = None
         self.dst = None
         self.HaveData = False
 
@@ -167,9 +209,9 @@ class TimeSteps:
 
     def show(self):
         print self.begin, self.end, self.numSteps, self.HaveData
-        print  self.StepDict[self.Steps[0]], self.Steps[0]
+        print  0, self.Steps[0], self.TS_IDs[0]
         for i in range(1, self.numSteps ):
-            print  self.StepDict[self.Steps[i]], self.Steps[i], self.Diff[i-1]
+            print  i, self.Steps[i], self.TS_IDs[i], self.Diff[i-1]
 
     def examine(self, timestamp, sie, ts_id):
         """
@@ -204,28 +246,92 @@ class TimeSteps:
         return(self.numSteps)
 
     def getIndex(self, sie):
-        if not sie in self.StepDict:
+        """
+        The index in Steps of the given sie value, or None if it is not one
+        of the steps. If 'sie' is an array of values then the result is an
+        array of indices, with -1 for any value not in Steps.
+        """
+        if (sie is None) or (self.Steps is None):
             return None
-        self.current = self.StepDict[sie]
+        if not np.isscalar(sie):
+            return(lookup(self.Steps.data, sie))
+        index = lookup(self.Steps.data, [sie])[0]
+        if index < 0:
+            return None
+        self.current = int(index)
         return(self.current)
 
+    def getTS_IDIndex(self, ts_id):
+        """
+        The index in Steps of the given TS_ID, or None if it is not in the
+        interval. As with getIndex() an array of TS_ID values gets an array
+        of indices back, with -1 for any value not found.
+        """
+        if (ts_id is None) or (self.AllTS_IDs is None):
+            return None
+        if not np.isscalar(ts_id):
+            indices = lookup(self.AllTS_IDs, ts_id)
+            found = np.where(indices >= 0)
+            indices[found] = self.AllTS_IDIndex[indices[found]]
+            return(indices)
+        index = lookup(self.AllTS_IDs, [ts_id])[0]
+        if index < 0:
+            return None
+        return(int(self.AllTS_IDIndex[index]))
+
     def getTS_ID(self, index):
         if (not type(index) is int) or (index < 0) or (index >= self.numSteps):
             return(None)
         return(self.TS_IDs[index])
 
-    def getSie(self, index=None, timestamp=None):
+    def getTS_IDRange(self):
+        """
+        The lowest and highest TS_ID in the interval, or None if there are
+        no steps yet.
+        """
+        if (self.AllTS_IDs is None) or (len(self.AllTS_IDs) == 0):
+            return(None)
+        return((int(self.AllTS_IDs[0]), int(self.AllTS_IDs[-1])))
+
+    def getTS_IDClause(self, column="TS_ID"):
+        """
+        The SQL predicate "<column> BETWEEN <lo> AND <hi>" for the TS_ID
+        range of the interval. The data tables are all keyed on TS_ID, so
+        this finds the interval's rows from the index alone, without a
+        join to TIMESTAMP_INFO. A TS_ID in the range that is not one of
+        the interval's (getTS_IDIndex() is None) should just be skipped.
+        """
+        bounds = self.getTS_IDRange()
+        if bounds is None:
+            handleError(self,
+                        TimeStepsNoStepsError,
+                        "TimeSteps.getTS_IDClause(): Warning - No steps")
+            # not reached
+        return("%s BETWEEN %d AND %d" % (column, bounds[0], bounds[1]))
+
+    def getSie(self, index=None, timestamp=None, ts_id=None):
+        """
+        The sie value of the step at 'index', or for the TIMESTAMP string
+        'timestamp', or for the TS_ID 'ts_id'. None if it is not one of the
+        steps.
+        """
+        if not ts_id is None:
+            index = self.getTS_IDIndex(ts_id)
+            if index is None:
+                return None
         if (index == None) and (timestamp == None):
             return None
         if index != None:
-            if not index in range(self.numSteps):
+            if (index < 0) or (index >= self.numSteps):
                 return None
             self.current = index
             return(self.Steps[index])
-        if not timestamp in self.Timestamps:
+        if timestamp in self.Timestamps:
+            sie = self.Timestamps[timestamp]
+        else:
+            sie = Timestamp.calc_sie(timestamp)
+        if self.getIndex(sie) is None:
             return None
-        sie = self.Timestamps[timestamp]
-        self.current = self.StepDict[sie]
         return(sie)
 
     def getSteps(self):
@@ -237,35 +343,42 @@ class TimeSteps:
 
     def register(self):
         """
-        We have all the sie and timestamp values in dictionaries, so just
+        We have all the sie and TS_ID values in dictionaries, so just
         build the time step sequence from them
         """
-        self.numSteps = len(self.StepDict)
-        self.Steps = ma.empty(self.numSteps, dtype=np.int32)
-        self.Steps.mask = True
-        self.TS_IDs = ma.empty(self.numSteps, dtype=np.int32)
-        self.TS_IDs.mask = True
-        self.Steps.soften_mask()
-        self.TS_IDs.soften_mask()
-        for sie,index in self.StepDict.iteritems():
-            self.Steps[index] = sie
-            self.TS_IDs[index] = self.TS_IDDict[sie]
+        sies = np.array(self.StepDict.keys(), dtype=np.int64)
+        ts_ids = np.array([self.TS_IDDict[sie] for sie in sies], dtype=np.int64)
         self.__registered += 1
-        if ma.count_masked(self.Steps) != 0:
+        self.setArrays(sies, ts_ids)
+
+    def setArrays(self, sies, ts_ids):
+        """
+        Build the Steps, TS_IDs, and Diff arrays from the (parallel) arrays of
+        sie and TS_ID values for the interval. They may be in any order and
+        may repeat an sie value. Steps gets each sie value once, in order,
+        along with the lowest TS_ID for it. Every TS_ID still maps to its
+        step via getTS_IDIndex().
+        """
+        sies = np.asarray(sies, dtype=np.int64)
+        ts_ids = np.asarray(ts_ids, dtype=np.int64)
+        if len(sies) != len(ts_ids):
             handleError(self,
                         TimeStepsRegisterError,
-                        "TimeSteps.register(): Warning - registered all %d, but still have %d masked values" % (self.numSteps, len(np.nonzero(self.Steps.mask))))
+                        "TimeSteps.setArrays(): Warning - %d sie values but %d TS_ID values" % (len(sies), len(ts_ids)))
             # not reached
+        order = np.lexsort((ts_ids, sies))
+        sies = sies[order]
+        ts_ids = ts_ids[order]
+        (unique, first) = np.unique(sies, return_index=True)
+        self.numSteps = len(unique)
+        self.Steps = ma.array(unique, dtype=np.int32)
+        self.TS_IDs = ma.array(ts_ids[first], dtype=np.int32)
+        order = np.argsort(ts_ids, kind='mergesort')
+        self.AllTS_IDs = ts_ids[order]
+        self.AllTS_IDIndex = np.searchsorted(unique, sies)[order]
         if self.Debug == True:
-            self.DebugMessages += "TimeSteps.register(): Registred all %d expected values, now to check them and take the Step differences" % self.numSteps
-        self.Diff = np.diff(self.Steps)
-        if (np.min(self.Diff) <= 0) and (self.Debug == True):
-            message = "TimeSteps.register(): Warning - negative or zero time differentials at\n"
-            message += "indices:" + str(np.where(self.Diff <= 0)) + "values:" + str(self.Diff[np.where(self.Diff <= 0)])
-            handleError(self,
-                        TimeStepsRegisterError,
-                        message)
-            # not reached
+            self.DebugMessages += "TimeSteps.setArrays(): Registered %d steps from %d values" % (self.numSteps, len(sies))
+        self.Diff = np.diff(unique).astype(np.int32)
         self.HaveData = True
 
     def getDst(self):
@@ -299,14 +412,14 @@ class TimeSteps:
             self.DebugMessages += "TimeSteps.getTimeSteps(): get data size from %d/%d to %d/%d" % (begin.sie, begin.ts_id, end.sie, end.ts_id)
         self.end = end
         self.begin = begin
-        query = "SELECT TS_ID,TIMESTAMP FROM TIMESTAMP_INFO WHERE "
+        query = "SELECT TS_ID,UNIX_TIMESTAMP(TIMESTAMP) FROM TIMESTAMP_INFO WHERE "
         query += "TIMESTAMP >= '"
         query += self.begin.timestr
         query += "' AND TIMESTAMP <= '"
         query += self.end.timestr
         query += "'"
         try:
-            cursor = self.conn.cursor(MySQLdb.cursors.DictCursor)
+            cursor = self.conn.cursor()
             if self.Debug == True:
                 self.DebugMessages += "\t%s" % query
             cursor.execute (query)
@@ -322,16 +435,17 @@ class TimeSteps:
                         TimeStepsQueryError,
                         "TimeSteps.getTimeSteps(): WARNING - No data")
             # not reached
-        # First establish the sequence of time steps involved
-        for row in rows:
-            self.examine(row['TIMESTAMP'], Timestamp.calc_sie(row['TIMESTAMP']), row['TS_ID'])
-        self.register()
+        cursor.close()
+        # The whole sequence of time steps comes in at once
+        data = np.array(rows, dtype=np.int64)
+        del rows
+        self.setArrays(data[:,1], data[:,0])
         if (self.steps() == 0):
             handleError(self,
                         TimeStepsNoStepsError,
                         "TimeSteps.getTimeSteps(): Warning - No steps")
             # not reached
-            return self.steps()
+        return self.steps()
 
 # End of class TimeSteps
 #*******************************************************************************
@@ -75,7 +75,7 @@ def defaultErrorHandler(obj, error, message):
         obj.ErrorMessages += message
     raise error(message)
 
-__all__=['Bulk', 'Counter', 'CPU', 'FS', 'Graph', 'LMTConfig', 'MDS',
-         'Operation', 'OSS', 'OST', 'Series', 'Statistics', 'tests',
-         'TimeSeries', 'Timestamp', 'TimeSteps']
+__all__=['Archive', 'Bulk', 'Catalog', 'Counter', 'CPU', 'Daily', 'FS', 'Graph', 'H5LMT',
+         'LMTConfig', 'MDS', 'Operation', 'OSS', 'OST', 'Pool', 'Rolling', 'Series',
+         'Statistics', 'tests', 'TimeSeries', 'Timestamp', 'TimeSteps']
 
@@ -28,7 +28,8 @@
 #*****************************************************************************/
 """
 
-__all__=['test_Bulk', 'test_Counter', 'test_CPU', 'test_FS', 'test_Graph',
-         'test_LMTConfig', 'test_MDS', 'test_Operation', 'test_OSS',
-         'test_OST', 'test_Series', 'test_Statistics', 'test_TimeSeries',
-         'test_Timestamp', 'test_TimeSteps']
+__all__=['test_Archive', 'test_Bulk', 'test_Catalog', 'test_Counter', 'test_CPU',
+         'test_Daily', 'test_FS', 'test_Graph', 'test_H5LMT', 'test_LMTConfig',
+         'test_MDS', 'test_Operation', 'test_OSS', 'test_OST', 'test_Pool',
+         'test_Rolling', 'test_Series', 'test_Statistics', 'test_TimeSeries', 'test_Timestamp',
+         'test_TimeSteps']
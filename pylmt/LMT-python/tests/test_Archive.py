@@ -0,0 +1,117 @@
+#!/bin/env python
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+import time
+import argparse
+import numpy as np
+from pyLMT import Archive
+
+#*******************************************************************************
+def process_args(main=False):
+    parser = argparse.ArgumentParser(description='Read a range of steps across the daily h5lmt files')
+    parser.add_argument('-b', '--begin', default=None, type=str, help='The beginning of the range (yyyy-mm-dd hh:mm:ss)')
+    parser.add_argument('-d', '--dir', default='.', type=str, help='The directory with the <day>/<host>_<fs>.h5lmt files (default .)')
+    parser.add_argument('-e', '--end', default=None, type=str, help='The end of the range, not included (yyyy-mm-dd hh:mm:ss)')
+    parser.add_argument('-f', '--fs', default=None, type=str, help='The file system')
+    parser.add_argument('-H', '--host', default='hopper', type=str, help='The host (default hopper)')
+    parser.add_argument('-i', '--index', default=None, type=str, help='Also write a virtual data set index of the days to this file')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
+    parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
+    args = parser.parse_args()
+    if main == True:
+        args = validate_args(args)
+    return(args)
+
+#*******************************************************************************
+def validate_args(args):
+    if (args.begin is None) or (args.end is None) or (args.fs is None):
+        print "test_Archive.validate_args(): Error - Please provide a begin, end, and file system"
+        return(None)
+    args.beginSie = int(time.mktime(time.strptime(args.begin, "%Y-%m-%d %H:%M:%S")))
+    args.endSie = int(time.mktime(time.strptime(args.end, "%Y-%m-%d %H:%M:%S")))
+    return(args)
+
+#*******************************************************************************
+def do_main(args):
+    '''
+    The range has to come out as one increasing run of steps, with no
+    midnight step repeated.
+    '''
+    archive = Archive.Archive(args.dir, args.host, args.fs)
+    if args.verbose == True:
+        archive.debug()
+    Steps = archive.steps(args.beginSie, args.endSie)
+    if np.any(np.diff(Steps) <= 0):
+        print "test_Archive.do_main(): Error - The steps are not strictly increasing"
+        return(None)
+    if args.index is not None:
+        days = archive.buildIndex(args.index, Archive.dayOf(args.beginSie), Archive.dayOf(args.endSie - 1))
+        print "%s indexes %d days" % (args.index, len(days))
+    return(archive)
+
+#*******************************************************************************
+def do_action(args, archive):
+    Steps = archive.steps(args.beginSie, args.endSie)
+    print "%d steps from %s to %s" % (len(Steps), args.begin, args.end)
+    read = archive.sum('OSTBulkReadDataSet', args.beginSie, args.endSie)
+    write = archive.sum('OSTBulkWriteDataSet', args.beginSie, args.endSie)
+    if read is None:
+        print "no data"
+        return
+    print "read %f MB" % (np.sum(read[1:]*np.diff(Steps))/(1024*1024))
+    print "write %f MB" % (np.sum(write[1:]*np.diff(Steps))/(1024*1024))
+    if args.verbose == True:
+        archive.show()
+        print archive.DebugMessages
+    archive.close()
+
+#*******************************************************************************
+
+
+if __name__ == "__main__":
+    """
+    test_Archive.py <opts>
+    Options include:
+    -b <begin>  The beginning of the range (yyyy-mm-dd hh:mm:ss)
+    -d <dir>    The directory with the <day>/<host>_<fs>.h5lmt files
+    -e <end>    The end of the range, not included
+    -f <fs>     The file system
+    -h          A help message
+    -H <host>   The host (default hopper)
+    -i <file>   Also write a virtual data set index of the days to this file
+    -v          Print debug messages
+    -V          Print the version and exit
+
+    Perform a rudimentary test of the Archive object.
+
+    """
+    args = process_args(main=True)
+    if not args is None:
+        archive = do_main(args)
+        if not archive is None:
+            do_action(args, archive)
@@ -32,7 +32,7 @@ import argparse
 import MySQLdb
 import numpy as np
 
-from pyLMT import BrwFS, LMTConfig, Timestamp, Graph
+from pyLMT import BrwFS, LMTConfig, Pool, Timestamp, Graph
 
 #*******************************************************************************
 def process_args(main=False):
@@ -42,6 +42,8 @@ def process_args(main=False):
     parser.add_argument('-e', '--end', default=None, type=str, help='The end of the time interval to be queried in seconds in epoch (default "now")')
     parser.add_argument('-f', '--fs', default=None, type=str, help='The (db name of the) file system of interest')
     parser.add_argument('-i', '--index', default=1, type=int, help='The file system index (# as listed in conf: default = 1) to query for data')
+    parser.add_argument('-k', '--chunk', default=None, type=int, help='Stream the data from the DB this many rows at a time')
+    parser.add_argument('-n', '--connections', default=None, type=int, help='Fetch the data in parallel over this many DB connections')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
     parser.add_argument('-r', '--report', action='store_true', default=False, help='Summariaze stats in a table')
     parser.add_argument('-R', '--read', action='store_true', default=False, help='Plot the read rate')
@@ -71,6 +73,7 @@ def do_main(args):
          end - (string) As above giving the end of the data to be gathered.
          fs - (string) The dbname entry in the config file for the file system of interest.
          index - (int) The index of the file system of interest in the config file
+         chunk - (int) Stream the data from the DB this many rows at a time
          plot - (string) The name of the file to which the graph should be saved.
                   'noplot' is allowed if you just want a report.
          report - (boolean) Print out summary info about the analyzed operations
@@ -89,14 +92,19 @@ def do_main(args):
     # - return the oss
     fsrc = LMTConfig.process_configuration(args)
     brwfs = BrwFS.BrwFS(fsrc['dbname'])
-    brwfs.getOSSs(fsrc['conn'])
+    brwfs.getOSSs(fsrc['conn'], topology=fsrc['catalog'].topology())
     if args.verbose == True:
         brwfs.debug()
         brwfs.debug(module="BrwFS")
         #oss.debug(module="Timestamp")
-    brwfs.getBrwStats(fsrc['conn'], args.stat)
+    brwfs.getBrwStats(fsrc['conn'], args.stat, catalog=fsrc['catalog'])
     (begin_ts, end_ts) = Timestamp.process_timestamps(args, fsrc)
-    brwfs.getData(begin_ts, end_ts, args.stat)
+    pool = None
+    if not args.connections is None:
+        pool = Pool.Pool(fsrc, args.connections)
+    brwfs.getData(args.stat, chunk=args.chunk, pool=pool)
+    if not pool is None:
+        pool.close()
     if (brwfs.Bins is None) or (len(brwfs.Bins) == 0):
         print "test_BrwFS: Warning - No HistBins objects from OSS %s" % oss.name
         return
@@ -193,6 +201,8 @@ if __name__ == "__main__":
     -f <fs>     The dbname for this filesystem in the lmtrc
     -h          A help message
     -i <index>  Index of the file system entry in the the config file
+    -k <rows>   Stream the data from the DB this many rows at a time
+    -n <conns>  Fetch the data in parallel over this many DB connections
     -o <oss>    The name of the OSS to examine
     -p <file>   File name of .png file for graph
     -r          Print a report of statistics
@@ -29,7 +29,7 @@
 
 import argparse
 
-from pyLMT import Bulk, LMTConfig, Timestamp, TimeSteps, Graph
+from pyLMT import Bulk, LMTConfig, Pool, Timestamp, TimeSteps, Graph
 
 #*******************************************************************************
 def process_args(main=False):
@@ -41,8 +41,11 @@ def process_args(main=False):
     parser.add_argument('-e', '--end', default=None, type=str, help='The end of the time interval to be queried in seconds in epoch (default "now")')
     parser.add_argument('-f', '--fs', default=None, type=str, help='The (db name of the) file system of interest')
     parser.add_argument('-i', '--index', default=1, type=int, help='The file system index (# as listed in conf: default = 1) to query for data')
+    parser.add_argument('-k', '--chunk', default=None, type=int, help='Stream the data from the DB this many rows at a time')
+    parser.add_argument('-l', '--columnar', action='store_true', default=False, help='Ingest the OST data as whole arrays rather than row by row')
     parser.add_argument('-m', '--spectrum', action='store_true', default=False, help='Plot the cross-correlation spectrum')
     parser.add_argument('-M', '--mask', default=None, type=str, help='Filter out samples of the spectrum based on the mask. eg. "left=0.0,right=0.1" only shows the values with CPU utilization up  to 10%. "bottom=0.0,top=0.1" does the same for data rate')
+    parser.add_argument('-n', '--connections', default=None, type=int, help='Fetch the data in parallel over this many DB connections')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
     parser.add_argument('-P', '--plotSdevs', action='store_true', default=False, help='Calculate and plot the standard deviation across OSTs at each timestep')
     parser.add_argument('-r', '--report', action='store_true', default=False, help='Summariaze stats in a table')
@@ -83,6 +86,8 @@ def do_main(args):
          end - (string) As above giving the end of the data to be gathered.
          FS - (string) The dbname entry in the config file for the file system of interest.
          index - (int) The index of the file system of interest in the config file
+         chunk - (int) Stream the data from the DB this many rows at a time
+         columnar - (boolean) Ingest the OST data as whole arrays rather than row by row
          mask - (key=value:keys in {mincpu, maxcpu, minval, maxval}) mask values outside the given range
          plot - (string) The name of the file to which the graph should be saved.
                   'noplot' is allowed if you just want a report.
@@ -116,7 +121,12 @@ def do_main(args):
     if (bulk.Steps is None) or (bulk.Steps.steps() == 0):
         print "Bulk: Warning - No steps from FS %s" % bulk.name
         return(None)
-    bulk.getData()
+    pool = None
+    if not args.connections is None:
+        pool = Pool.Pool(fsrc, args.connections)
+    bulk.getData(columnar=args.columnar, chunk=args.chunk, pool=pool)
+    if not pool is None:
+        pool.close()
     if (args.cpu == True) or (args.x_correlate == True):
         bulk.getCPU()
     return(bulk)
@@ -166,10 +176,13 @@ if __name__ == "__main__":
     -f <fs>     The dbname for this filesystem in the lmtrc
     -h          A help message
     -i <index>  Index of the file system entry in the the config file
+    -k <rows>   Stream the data from the DB this many rows at a time
+    -l          Ingest the OST data as whole arrays rather than row by row
     -m          Plot the cross correlation spectrum
     -M <mask>   Filter out samples of the spectrum based on this mask
                 <mask> is a string of key=values pairs with keys:
                 left, right, top, bottom
+    -n <conns>  Fetch the data in parallel over this many DB connections
     -p <file>   File name of .png file for graph
     -P          Calculate and plot the standard deviation across OSTs at each timestep
     -r          Print a report of statistics
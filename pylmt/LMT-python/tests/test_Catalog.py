@@ -0,0 +1,102 @@
+#!/bin/env python
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+
+import argparse
+
+from pyLMT import LMTConfig
+
+#*******************************************************************************
+def process_args(main=False):
+    parser = argparse.ArgumentParser(description='Access an LMT DB')
+    parser.add_argument('-c', '--config', default=None, type=file, help='The configuration file to use for DB access')
+    parser.add_argument('-f', '--fs', default=None, type=str, help='The (db name of the) file system of interest')
+    parser.add_argument('-i', '--index', default=1, type=int, help='The file system index (# as listed in conf: default = 1) to query for data')
+    parser.add_argument('-I', '--invalidate', action='store_true', default=False, help='Discard the cached catalog and query the DB again')
+    parser.add_argument('-t', '--ttl', default=None, type=int, help='Seconds before a cached catalog entry is stale (default: from the config or one day)')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
+    parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.1')
+    args = parser.parse_args()
+    return(args)
+
+#*******************************************************************************
+def do_main(args):
+    """
+    args.config - (file) The lmtrc config file telling how to get to the DB
+         fs - (string) The dbname entry in the config file for the file system of interest.
+         index - (int) The index of the file system of interest in the config file
+         invalidate - (boolean) Drop the cached entries before reading them
+         ttl - (int) Lifetime in seconds of a cached entry
+         verbose - (boolean) Turn on debugging output
+         version - (boolean) print the version string and exit
+    """
+    fsrc = LMTConfig.process_configuration(args)
+    catalog = fsrc['catalog']
+    if not args.ttl is None:
+        catalog.ttl = args.ttl
+    if args.verbose == True:
+        catalog.debug()
+    if args.invalidate == True:
+        catalog.invalidate()
+    return(catalog)
+
+#*******************************************************************************
+def do_action(args, catalog):
+    for (oss_id, hostname, ost_id, ost_name) in catalog.topology():
+        print "%6s\t%-16s\t%6s\t%s" % (str(oss_id), hostname, str(ost_id), str(ost_name))
+    for op in catalog.operations():
+        print "%6d\t%s (%s)" % (op['OPERATION_ID'], op['OPERATION_NAME'], op['UNITS'])
+    bins = catalog.bins()
+    for stat in catalog.brwStats():
+        print "%6d\t%s (%s): %s" % (stat['STATS_ID'], stat['STATS_NAME'], stat['UNITS'],
+                                    str(bins.get(stat['STATS_ID'])))
+    if args.verbose == True:
+        print catalog.DebugMessages
+        print "%d catalog queries went to the DB (cache %s)" % (catalog.queries, catalog.path)
+
+#*******************************************************************************
+
+if __name__ == "__main__":
+    """
+    test_Catalog.py <opts>
+    Options include:
+    -c <conf>   Path to configuration file
+    -f <fs>     The dbname for this filesystem in the lmtrc
+    -h          A help message
+    -i <index>  Index of the file system entry in the the config file
+    -I          Invalidate the cached catalog first
+    -t <ttl>    Seconds before a cached entry is stale
+    -v          Print debug messages
+    -V          Print the version and exit
+
+    Rudimentary test for the Catalog module.
+
+    """
+    args = process_args(main=True)
+    catalog = do_main(args)
+    do_action(args, catalog)
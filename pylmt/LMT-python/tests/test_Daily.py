@@ -0,0 +1,113 @@
+#!/bin/env python
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+
+
+import os
+import argparse
+import numpy as np
+from pyLMT import Daily
+
+#*******************************************************************************
+def process_args(main=False):
+    parser = argparse.ArgumentParser(description='The daily summary store')
+    parser.add_argument('-f', '--file', default=None, type=str, help='A daily.data file to copy into the store')
+    parser.add_argument('-s', '--store', default='./test.store', type=str, help='The store file (default ./test.store)')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
+    parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
+    args = parser.parse_args()
+    if main == True:
+        args = validate_args(args)
+    return(args)
+
+#*******************************************************************************
+def validate_args(args):
+    '''
+    The store has to have the .store suffix so Daily.load() knows it
+    from a text file.
+    '''
+    if not Daily.isStore(args.store):
+        print "test_Daily.validate_args(): Error - The store file name needs to end in %s" % Daily.STORE_SUFFIX
+        return(None)
+    return(args)
+
+#*******************************************************************************
+def do_main(args):
+    '''
+    Put the days from the daily.data file (or some made up ones) into
+    a new store, and check that they come back out the same.
+    '''
+    if args.file is None:
+        days = np.zeros(10, dtype=Daily.DAILY_DTYPE)
+        for day in range(len(days)):
+            days[day] = ('"2013-01-%02d' % (day+1), '00:00:00"', 1356998400 + 86400*day,
+                         1024.0*day, 512.0*day, day/86.4, day/172.8)
+    else:
+        days = Daily.load(args.file, Daily.DAILY_DTYPE)
+    if os.path.exists(args.store):
+        os.remove(args.store)
+    store = Daily.Store(args.store, Daily.DAILY_DTYPE)
+    for day in days:
+        store.put(day)
+    # Putting the last day again replaces it rather than adding another
+    store.put(days[-1])
+    rows = Daily.load(args.store, Daily.DAILY_DTYPE)
+    if (len(rows) != len(days)) or np.any(rows != days):
+        print "test_Daily.do_main(): Error - The store has %d days, rather than the %d put in" % (len(rows), len(days))
+        return(None)
+    return(store)
+
+#*******************************************************************************
+def do_action(args, store):
+    print "%s: %d days" % (store.path, store.count())
+    (rows, index) = store.since(0)
+    if args.verbose == True:
+        for row in rows:
+            print row
+
+#*******************************************************************************
+
+
+if __name__ == "__main__":
+    """
+    test_Daily.py <opts>
+    Options include:
+    -f <file>   A daily.data file to copy into the store
+    -h          A help message
+    -s <store>  The store file (default ./test.store)
+    -v          Print debug messages
+    -V          Print the version and exit
+
+    Perform a rudimentary test of the Daily Store object.
+
+    """
+    args = process_args(main=True)
+    if not args is None:
+        store = do_main(args)
+        if not store is None:
+            do_action(args, store)
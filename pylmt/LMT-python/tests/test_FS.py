@@ -108,7 +108,7 @@ fs = test_FS.do_main(args)
     fs = FS.FS(fsrc['name'])
     if args.verbose == True:
         fs.debug()
-    fs.getInfo(fsrc['conn'])
+    fs.getInfo(fsrc['conn'], catalog=fsrc['catalog'])
     (begin_ts, end_ts) = Timestamp.process_timestamps(args, fsrc)
     fs.getData(begin_ts,
                end_ts)
@@ -0,0 +1,107 @@
+#!/bin/env python
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+
+import argparse
+import numpy as np
+import h5py
+from pyLMT import H5LMT
+
+#*******************************************************************************
+def process_args(main=False):
+    parser = argparse.ArgumentParser(description='Reduce the data sets of an h5lmt file')
+    parser.add_argument('-f', '--file', default=None, type=str, help='The h5lmt file to read')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
+    parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
+    args = parser.parse_args()
+    if main == True:
+        args = validate_args(args)
+    return(args)
+
+#*******************************************************************************
+def validate_args(args):
+    if args.file is None:
+        print "test_H5LMT.validate_args(): Error - Please provide an h5lmt file"
+        return(None)
+    return(args)
+
+#*******************************************************************************
+def do_main(args):
+    '''
+    Check index() against a search of the steps, and the OST read sum
+    against adding up the rows one at a time.
+    '''
+    fsFile = h5py.File(args.file, 'r')
+    h5lmt = H5LMT.H5LMT(fsFile)
+    Steps = h5lmt.Steps
+    for sie in range(Steps[0], Steps[-1] + 1, 7):
+        index = np.searchsorted(Steps, sie, side='right') - 1
+        if h5lmt.index(sie) != index:
+            print "test_H5LMT.do_main(): Error - index(%d) is %s rather than %d" % (sie, str(h5lmt.index(sie)), index)
+            return(None)
+    dataSet = h5lmt.getDataSet('OSTBulkReadDataSet')
+    read = np.zeros(len(Steps))
+    for ost_index in range(len(h5lmt.getNames('OSTBulkReadDataSet'))):
+        read += dataSet[ost_index,:]
+    if not np.allclose(read, h5lmt.sum('OSTBulkReadDataSet')):
+        print "test_H5LMT.do_main(): Error - The OST read sum doesn't match"
+        return(None)
+    return(h5lmt)
+
+#*******************************************************************************
+def do_action(args, h5lmt):
+    h5lmt.show()
+    print "read %f MB" % (np.sum(h5lmt.sum('OSTBulkReadDataSet')[1:]*np.diff(h5lmt.Steps))/(1024*1024))
+    print "write %f MB" % (np.sum(h5lmt.sum('OSTBulkWriteDataSet')[1:]*np.diff(h5lmt.Steps))/(1024*1024))
+    if args.verbose == True:
+        print "max OSS CPU utilization per OSS:"
+        print h5lmt.max('OSSCPUDataSet', over='time')
+        (Steps, Hourly) = h5lmt.rollup('OSTBulkReadDataSet', 3600, 'mean', total=True)
+        print "hourly mean read rate (%s):" % str(h5lmt.rollupLevel('OSTBulkReadDataSet', 3600))
+        print Hourly/(1024*1024)
+
+#*******************************************************************************
+
+
+if __name__ == "__main__":
+    """
+    test_H5LMT.py <opts>
+    Options include:
+    -f <file>   The h5lmt file to read
+    -h          A help message
+    -v          Print debug messages
+    -V          Print the version and exit
+
+    Perform a rudimentary test of the H5LMT reader.
+
+    """
+    args = process_args(main=True)
+    if not args is None:
+        h5lmt = do_main(args)
+        if not h5lmt is None:
+            do_action(args, h5lmt)
@@ -48,6 +48,7 @@ def process_args(main=False):
     parser.add_argument('-f', '--fs', default=None, type=str, help='The (db name of the) file system of interest')
     parser.add_argument('-H', '--hilite', default=None, type=str, help='In a -x cross-correlation graph, show the portion of CPU accounted for by <op> (default: "open")')
     parser.add_argument('-i', '--index', default=1, type=int, help='The file system index (# as listed in conf: default = 1) to query for data')
+    parser.add_argument('-k', '--chunk', default=None, type=int, help='Stream the data from the DB this many rows at a time')
     parser.add_argument('-m', '--spectrum', action='store_true', default=False, help='Plot the cross-correlation spectrum')
     parser.add_argument('-M', '--mask', default=None, type=str, help='Filter out samples based on the mask. eg. "left=0.0,right=0.1" only shows the values with CPU utilization up  to 10%. "bottom=0.0,top=0.1" does the same for data rate')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
@@ -83,6 +84,7 @@ def do_main(args):
          end - (string) As above giving the end of the data to be gathered.
          FS - (string) The dbname entry in the config file for the file system of interest.
          index - (int) The index of the file system of interest in the config file
+         chunk - (int) Stream the data from the DB this many rows at a time
          mask - (key=value:keys in {mincpu, maxcpu, minval, maxval}) mask values outside the given range
          plot - (string) The name of the file to which the graph should be saved.
                   'noplot' is allowed if you just want a report.
@@ -102,7 +104,7 @@ def do_main(args):
         mds.debug()
         mds.debug(module="Operation")
         #mds.debug(module="Timestamp")
-    mds.opsFromDB(fsrc['conn'])
+    mds.opsFromDB(fsrc['conn'], operations=fsrc['catalog'].operations())
     if args.show_ops == True:
         mds.showOps()
         return
@@ -113,7 +115,7 @@ def do_main(args):
     if (mds.Steps is None) or (mds.Steps.steps() == 0):
         print "Mds: Warning - No steps from FS %s" % mds.name
         return(None)
-    mds.getData()
+    mds.getData(chunk=args.chunk)
     if (args.cpu == True) or (args.x_correlate == True):
         mds.getCPU()
     return(mds)
@@ -161,6 +163,7 @@ if __name__ == "__main__":
     -H <op>     In a -x cross-correlation graph, show the portion of CPU
                   accounted for by <op> (default: 'open')
     -i <index>  Index of the file system entry in the the config file
+    -k <rows>   Stream the data from the DB this many rows at a time
     -M <mask>   Filter out samples based on this mask
                 <mask> is a string of key=values pairs with keys:
                 left, right, top, bottom
@@ -0,0 +1,111 @@
+#!/bin/env python
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+
+
+import argparse
+import numpy as np
+from pyLMT import Rolling
+
+#*******************************************************************************
+def process_args(main=False):
+    parser = argparse.ArgumentParser(description='Rolling window statistics')
+    parser.add_argument('-l', '--length', default=100, type=int, help='The number of values to put through the window')
+    parser.add_argument('-s', '--state', default=None, type=str, help='Save the window in this file and carry on from it next time')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
+    parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
+    parser.add_argument('-w', '--window', default=31, type=int, help='The number of values in the window')
+    args = parser.parse_args()
+    if main == True:
+        args = validate_args(args)
+    return(args)
+
+#*******************************************************************************
+def validate_args(args):
+    '''
+    The length and window should be positive integers.
+    '''
+    if (args.length <= 0) or (args.window <= 0):
+        print "test_Rolling.validate_args(): Error - The length and window need to be positive integers"
+        return(None)
+    return(args)
+
+#*******************************************************************************
+def do_main(args):
+    '''
+    Put random values through the window, checking its median against
+    np.median() of the same values as we go.
+    '''
+    rolling = None
+    if not args.state is None:
+        state = Rolling.loadState(args.state)
+        if not state is None:
+            rolling = state['rolling']
+    if rolling is None:
+        rolling = Rolling.Rolling(args.window, "random")
+    data = np.random.random_sample(args.length)
+    values = list(rolling.Values)
+    for value in data:
+        rolling.add(value)
+        values = (values + [value])[-args.window:]
+        if not np.isclose(rolling.median(), np.median(values)):
+            print "test_Rolling.do_main(): Error - median %f should be %f" % (rolling.median(), np.median(values))
+            return(None)
+    if not args.state is None:
+        Rolling.saveState(args.state, {'rolling' : rolling})
+    return(rolling)
+
+#*******************************************************************************
+def do_action(args, rolling):
+    rolling.show()
+    if args.verbose == True:
+        for q in (10, 25, 75, 90):
+            print "%d%% = %f" % (q, rolling.percentile(q))
+
+#*******************************************************************************
+
+
+if __name__ == "__main__":
+    """
+    test_Rolling.py <opts>
+    Options include:
+    -h          A help message
+    -l <length> The number of values to put through the window
+    -s <state>  Save the window in this file and carry on from it next time
+    -v          Print debug messages
+    -V          Print the version and exit
+    -w <window> The number of values in the window
+
+    Perform a rudimentary test of the Rolling object.
+
+    """
+    args = process_args(main=True)
+    if not args is None:
+        rolling = do_main(args)
+        if not rolling is None:
+            do_action(args, rolling)
@@ -34,6 +34,7 @@ from pyLMT import Series
 #*******************************************************************************
 def process_args(main=False):
     parser = argparse.ArgumentParser(description='Generic series of values')
+    parser.add_argument('-d', '--dtype', default=None, type=str, help='Keep the values in this floating point type (eg. float32)')
     parser.add_argument('-l', '--length', default=1, type=int, help='The number of values to pu in the Series')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
@@ -57,6 +58,8 @@ def do_main(args):
     '''
     '''
     series = Series.Series("random", "none")
+    if not args.dtype is None:
+        series.setDtype(args.dtype)
     series.setLength(args.length)
     data = np.random.random_sample(args.length)
     for i in range(args.length):
@@ -76,6 +79,7 @@ if __name__ == "__main__":
     Series.py <opts>
     Options include:
     -h          A help message
+    -d <dtype>  Keep the values in this floating point type (eg. float32)
     -l <length> The number of values to pu in the Series
     -v          Print debug messages
     -V          Print the version and exit
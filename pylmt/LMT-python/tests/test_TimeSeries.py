@@ -42,6 +42,7 @@ def process_args(main=False):
     parser.add_argument('-e', '--end', default=None, type=str, help='The end of the time interval to be queried in seconds in epoch (default "now")')
     parser.add_argument('-f', '--fs', default=None, type=str, help='The (db name of the) file system of interest')
     parser.add_argument('-i', '--index', default=1, type=int, help='The file system index (# as listed in conf: default = 1) to query for data')
+    parser.add_argument('-r', '--resample', default=None, type=int, help='Also show the series resampled onto periods of this many seconds')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
     args = parser.parse_args()
@@ -109,6 +110,11 @@ def do_main(args):
 #*******************************************************************************
 def do_action(args, Series):
     Series.show()
+    if not args.resample is None:
+        Resampled = Series.resample(args.resample, how=TimeSeries.RESAMPLE_HOWS)
+        for how in TimeSeries.RESAMPLE_HOWS:
+            print how
+            Resampled[(args.resample, how)].show()
 
 #*******************************************************************************
 
@@ -123,6 +129,7 @@ if __name__ == "__main__":
     -f <fs>     The dbname for this filesystem in the lmtrc
     -h          A help message
     -i <index>  Index of the file system entry in the the config file
+    -r <period> Also show the series resampled onto periods of this many seconds
     -v          Print debug messages
     -V          Print the version and exit
 
@@ -59,6 +59,8 @@ import datetime
 import time
 import h5py
 
+from pyLMT import H5LMT
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -126,16 +128,17 @@ def do_action(args, fsFile):
         return
     bins = ostIosizeReadDataSet.attrs['bins']
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = H5LMT.getIntervals(fsFile)
     readHistpS  = None
     writeHistpS = None
     ost_index = 0
     for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        readpS = ostIosizeReadDataSet[ost_index,:,:]
+        readpS = H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals)
         if readHistpS is None:
             readHistpS = np.zeros_like(readpS)
         #print readpS
         readHistpS += readpS
-        writepS = ostIosizeWriteDataSet[ost_index,:,:]
+        writepS = H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals)
         if writeHistpS is None:
             writeHistpS = np.zeros_like(writepS)
         #print writepS
@@ -58,7 +58,7 @@ import time
 import datetime
 import h5py
 
-from pyLMT import Graph
+from pyLMT import Graph, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -114,39 +114,18 @@ def doMain(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def doAction(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     #print "data from index %d to %d" % (b_index, e_index)
     fs=fsStepsDataSet.attrs['fs']
     # I do this for backward compatability. A few early h5lmt file did not define the host
@@ -154,23 +133,21 @@ def doAction(args, b_sie, e_sie, fsFile):
         host=fsStepsDataSet.attrs['host']
     except:
         host='hopper'
-    read = np.zeros(e_index - b_index + 1)
+    read = h5lmt.sum('OSTBulkReadDataSet', b_index, e_index+1)
     ostReadGroup = fsFile['OSTReadGroup']
     ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    write = np.zeros(e_index - b_index + 1)
+    write = h5lmt.sum('OSTBulkWriteDataSet', b_index, e_index+1)
     ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
     ostIosizeReadDataSet = ostReadGroup['OSTIosizeReadDataSet']
     bins = ostIosizeReadDataSet.attrs['bins']
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = h5lmt.Intervals
     ost_index = 0
     if args.report == True:
         np.set_printoptions(threshold='nan')
     for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        read += ostBulkReadDataSet[ost_index,b_index:e_index+1]
-        write += ostBulkWriteDataSet[ost_index,b_index:e_index+1]
-        readpS = ostIosizeReadDataSet[ost_index,:,b_index:e_index+1]
-        writepS = ostIosizeWriteDataSet[ost_index,:,b_index:e_index+1]
+        readpS = H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals, b_index, e_index+1)
+        writepS = H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals, b_index, e_index+1)
         readIOBytes = np.array(np.matrix(bins)*np.matrix(readpS))
         writeIOBytes = np.array(np.matrix(bins)*np.matrix(writepS))
         read -= readIOBytes[0]
@@ -189,8 +166,8 @@ def doAction(args, b_sie, e_sie, fsFile):
         return
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], read, 'r', label='read', Ave=False)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], write, 'b', label='write', Ave=False)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], read, 'r', label='read', Ave=False)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], write, 'b', label='write', Ave=False)
     (handles, labels) = ax.get_legend_handles_labels()
     plt.xlabel('time')
     plt.ylabel(r'$MiB/sec$')
@@ -40,6 +40,8 @@ import matplotlib.pyplot as plt
 import datetime
 import h5py
 
+from pyLMT import H5LMT
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -92,17 +94,18 @@ def doAction(args, fsFile):
     bins = ostIosizeReadDataSet.attrs['bins']
     ostWriteGroup = fsFile['OSTWriteGroup']
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = H5LMT.getIntervals(fsFile)
     readHistpS  = None
     writeHistpS = None
     ost_index = 0
     # This should probably be done with a sum accross the zeroth axis
     for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        readpS = ostIosizeReadDataSet[ost_index,:,:]
+        readpS = H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals)
         if readHistpS is None:
             readHistpS = np.zeros_like(readpS)
         #print readpS
         readHistpS += readpS
-        writepS = ostIosizeWriteDataSet[ost_index,:,:]
+        writepS = H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals)
         if writeHistpS is None:
             writeHistpS = np.zeros_like(writepS)
         #print writepS
@@ -41,7 +41,7 @@ import time
 import datetime
 import h5py
 
-from pyLMT import Graph
+from pyLMT import Graph, H5LMT
 from ost_map import scratch2_ost2oss, scratch2_oss2ost, scratch2_ost2raid, scratch2_raid2ost
 
 #*******************************************************************************
@@ -102,48 +102,27 @@ def doMain(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def doAction(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
-    stepsDiff = np.zeros_like(fsStepsDataSet[b_index:e_index+1], dtype=np.int32)
-    stepsDiff[1:] = np.diff(fsStepsDataSet[b_index:e_index+1])
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
+    stepsDiff = np.zeros_like(h5lmt.Steps[b_index:e_index+1], dtype=np.int32)
+    stepsDiff[1:] = np.diff(h5lmt.Steps[b_index:e_index+1])
     #print "data from index %d to %d" % (b_index, e_index)
     fs=fsStepsDataSet.attrs['fs']
     try:
         host=fsStepsDataSet.attrs['host']
     except:
         host='hopper'
-    duration = fsStepsDataSet[-1] - fsStepsDataSet[0]
+    duration = h5lmt.Steps[-1] - h5lmt.Steps[0]
     if args.read == True:
         ost_read = {}
         ost_read_indices = {}
@@ -168,11 +147,12 @@ def doAction(args, b_sie, e_sie, fsFile):
         ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
         ost_index = 0
         ost_names = ostBulkReadDataSet.attrs['OSTNames']
+        Read = h5lmt.read('OSTBulkReadDataSet', b_index, e_index+1)
         #ost_names.sort()
         for ost_name in ost_names:
             ost_read_indices[ost_name] = ost_index
             #print "OST %s is on OSS %s" % (ost_name, scratch2_ost2oss[ost_name])
-            bytes = ostBulkReadDataSet[ost_index,b_index:e_index+1]*stepsDiff
+            bytes = Read[ost_index]*stepsDiff
             oss_name = scratch2_ost2oss[ost_name]
             if not oss_name in oss_read_agg:
                 oss_read_agg[oss_name] = bytes
@@ -223,11 +203,12 @@ def doAction(args, b_sie, e_sie, fsFile):
         ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
         ost_index = 0
         ost_names = ostBulkWriteDataSet.attrs['OSTNames']
+        Write = h5lmt.read('OSTBulkWriteDataSet', b_index, e_index+1)
         #ost_names.sort()
         for ost_name in ost_names:
             ost_write_indices[ost_name] = ost_index
             #print "OST %s is on OSS %s" % (ost_name, scratch2_ost2oss[ost_name])
-            bytes = ostBulkWriteDataSet[ost_index,b_index:e_index+1]*stepsDiff
+            bytes = Write[ost_index]*stepsDiff
             oss_name = scratch2_ost2oss[ost_name]
             if not oss_name in oss_write_agg:
                 oss_write_agg[oss_name] = bytes
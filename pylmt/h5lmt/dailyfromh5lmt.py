@@ -56,7 +56,7 @@ import matplotlib.pyplot as plt
 import datetime
 import h5py
 
-from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS
+from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS, Daily, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -69,7 +69,9 @@ def process_args(main=False):
     """
     parser = argparse.ArgumentParser(description='Access an LMT DB')
     parser.add_argument('-f', '--file', default=None, type=str, help='The hdf5 file (default: .')
+    parser.add_argument('-P', '--products', default=None, type=str, help='A comma separated list of the products to make (default: all but osscpu)')
     parser.add_argument('-p', '--progress', action='store_true', default=False, help='Give an indication of progress on the work')
+    parser.add_argument('-s', '--store', default=None, type=str, help='Also add the daily summaries to the daily.store and dailymds.store files in this directory')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
     args = parser.parse_args()
@@ -83,6 +85,14 @@ def validate_args(args):
     if args.file is None:
         print "Please provide a file"
         exit(1)
+    if args.products is None:
+        args.products = DEFAULT_PRODUCTS
+    else:
+        args.products = args.products.split(',')
+    for product in args.products:
+        if not product in PRODUCTS:
+            print "%s is not one of the products: %s" % (product, ", ".join(sorted(PRODUCTS)))
+            return(None)
     return(args)
 
 #*******************************************************************************
@@ -93,7 +103,50 @@ def doMain(args):
 
 #*******************************************************************************
 
-def doRatePlot(args, fsFile):
+def doRead(args, fsFile):
+    """
+    The one pass over the file. Each data set any of the products needs
+    is read once, as a single slab, and the sums across its rows that
+    several of them share are worked out here. The products then work
+    from the 'report' dict this returns and never go back to the file.
+    """
+    h5lmt = H5LMT.H5LMT(fsFile)
+    report = {'Steps' : h5lmt.Steps,
+              'day' : h5lmt.day,
+              'fs' : h5lmt.fs,
+              'host' : h5lmt.host}
+    intervals = np.zeros(len(h5lmt.Steps))
+    intervals[1:] = np.diff(h5lmt.Steps)
+    report['intervals'] = intervals
+    names = []
+    for product in args.products:
+        for name in PRODUCTS[product][1]:
+            if not name in names:
+                names.append(name)
+    for name in names:
+        if args.progress == True:
+            print "Reading %s" % name
+        report[name] = h5lmt.read(name)
+    for (name, total, how) in (('OSTBulkReadDataSet', 'read', 'sum'),
+                               ('OSTBulkWriteDataSet', 'write', 'sum'),
+                               ('OSSCPUDataSet', 'cpu', 'mean'),
+                               ('MDSOpsDataSet', 'mds', 'sum'),
+                               ('FSMissingDataSet', 'missing', 'sum')):
+        if name in report:
+            report[total] = H5LMT.reduceValues(how, report[name], 'rows')
+    return(report)
+
+#*******************************************************************************
+
+def reportPath(args, report, suffix):
+    path  = os.path.dirname(args.file)
+    if path == "":
+        path = "."
+    return(path+'/'+report['host']+'_'+report['fs']+suffix)
+
+#*******************************************************************************
+
+def doRatePlot(args, report):
     """
     The values in the h5lmt arrays are time series of observaitons
     of true rates in in MB/s. In order to aggregate you need to
@@ -103,198 +156,91 @@ def doRatePlot(args, fsFile):
     """
     if args.progress == True:
         print "Rate plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    intervals = np.zeros(len(fsStepsDataSet))
-    intervals[1:] = np.diff(fsStepsDataSet)
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    read = np.zeros(len(fsStepsDataSet))
-    ostReadGroup = fsFile['OSTReadGroup']
-    ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        read += ostBulkReadDataSet[ost_index,:]
-        ost_index += 1
-    read /= (1024*1024)
-    AggregateRead = np.sum(read*intervals)
-    write = np.zeros(len(fsStepsDataSet))
-    ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        write += ostBulkWriteDataSet[ost_index,:]
-        ost_index += 1
-    write /= (1024*1024)
-    AggregateWrite = np.sum(write*intervals)
-    cpu = np.zeros(len(fsStepsDataSet))
-    ossCPUGroup = fsFile['OSSCPUGroup']
-    ossCPUDataSet = ossCPUGroup['OSSCPUDataSet']
-    oss_index = 0
-    for oss_name in ossCPUDataSet.attrs['OSSNames']:
-        cpu += ossCPUDataSet[oss_index,:]
-        oss_index += 1
-    cpu /= oss_index
+    Steps = report['Steps']
+    read = report['read']/(1024*1024)
+    write = report['write']/(1024*1024)
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet, read, 'r', label='read', Ave=True)
-    Graph.timeSeries(ax, fsStepsDataSet, write, 'b', label='write', Ave=True)
+    Graph.timeSeries(ax, Steps, read, 'r', label='read', Ave=True)
+    Graph.timeSeries(ax, Steps, write, 'b', label='write', Ave=True)
     plt.xlabel('time')
     plt.ylabel(r'$MiB/sec$')
-    (handles, labels) = Graph.percent(ax, fsStepsDataSet, cpu, color='k', label='% CPU', Ave=True)
+    (handles, labels) = Graph.percent(ax, Steps, report['cpu'], color='k', label='% CPU', Ave=True)
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s aggregate I/O" % (fsStepsDataSet.attrs['day'],
-                                       fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s aggregate I/O" % (report['day'], report['fs']))
     ax.set_ybound(lower = 0, upper = 50000)
     if (not handles is None) and (not labels is None):
         plt.legend(handles, labels)
     else:
         plt.legend()
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_bulkRateCPU.png")
+    plt.savefig(reportPath(args, report, "_bulkRateCPU.png"))
     plt.cla()
-    return(AggregateRead, AggregateWrite)
+    return
 
 #*******************************************************************************
 
-def doMDSPlot(args, fsFile):
+def doMDSPlot(args, report):
     if args.progress == True:
         print "MDS plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    intervals = np.zeros(len(fsStepsDataSet))
-    intervals[1:] = np.diff(fsStepsDataSet)
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    mds = np.zeros(len(fsStepsDataSet))
-    mdsOpsGroup = fsFile['MDSOpsGroup']
-    mdsOpsDataSet = mdsOpsGroup['MDSOpsDataSet']
-    op_index = 0
-    for op_name in mdsOpsDataSet.attrs['OpNames']:
-        mds += mdsOpsDataSet[op_index,:]
-        op_index += 1
+    Steps = report['Steps']
+    mds = report['mds']
     highVals, = np.where(mds > 100000)
     if len(highVals) > 0:
         print "Warning: Exceedingly high values reported for ", highVals
-        print fsStepsDataSet[mds > 1000000]
+        print Steps[mds > 1000000]
         print mds[mds > 1000000]
-    AggregateOps = np.sum(mds*intervals)
-    cpu = np.zeros(len(fsStepsDataSet))
-    mdsCPUGroup = fsFile['MDSCPUGroup']
-    mdsCPUDataSet = mdsCPUGroup['MDSCPUDataSet']
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet, mds, 'b', label='mds', Ave=True)
+    Graph.timeSeries(ax, Steps, mds, 'b', label='mds', Ave=True)
     plt.xlabel('time')
     plt.ylabel(r'$Ops/sec$')
-    (handles, labels) = Graph.percent(ax, fsStepsDataSet, mdsCPUDataSet, color='k', label='% CPU', Ave=True)
+    (handles, labels) = Graph.percent(ax, Steps, report['MDSCPUDataSet'], color='k', label='% CPU', Ave=True)
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s Metadata Operations" % (fsStepsDataSet.attrs['day'],
-                                             fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s Metadata Operations" % (report['day'], report['fs']))
     ax.set_ybound(lower = 0, upper = 120000)
     if (not handles is None) and (not labels is None):
         plt.legend(handles, labels)
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_MDS+CPU.png")
+    plt.savefig(reportPath(args, report, "_MDS+CPU.png"))
     plt.cla()
-    return(AggregateOps)
+    return
 
 #*******************************************************************************
 
-def doOSSCPUPlot(args, fsFile):
+def doOSSCPUPlot(args, report):
     if args.progress == True:
         print "OSS CPU plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    data = np.zeros(len(fsStepsDataSet))
-    ostReadGroup = fsFile['OSTReadGroup']
-    ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        data += ostBulkReadDataSet[ost_index,:]
-        ost_index += 1
-    ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        data += ostBulkWriteDataSet[ost_index,:]
-        ost_index += 1
-    cpu = np.zeros(len(fsStepsDataSet))
-    ossCPUGroup = fsFile['OSSCPUGroup']
-    ossCPUDataSet = ossCPUGroup['OSSCPUDataSet']
-    oss_index = 0
-    for oss_name in ossCPUDataSet.attrs['OSSNames']:
-        cpu += ossCPUDataSet[oss_index,:]
-        oss_index += 1
-    cpu /= oss_index
+    Steps = report['Steps']
+    data = report['read'] + report['write']
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet, data, 'b', label='read plus write', Ave=True)
+    Graph.timeSeries(ax, Steps, data, 'b', label='read plus write', Ave=True)
     plt.xlabel('time')
     plt.ylabel(r'$MiB/sec$')
-    (handles, labels) = Graph.percent(ax, fsStepsDataSet, cpu, color='k', label='% CPU', Ave=True)
+    (handles, labels) = Graph.percent(ax, Steps, report['cpu'], color='k', label='% CPU', Ave=True)
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s aggregate I/O" % (fsStepsDataSet.attrs['day'],
-                                       fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s aggregate I/O" % (report['day'], report['fs']))
     ax.set_ybound(lower = 0, upper = 50000)
     if (not handles is None) and (not labels is None):
         plt.legend(handles, labels)
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_bulkBothCPU.png")
+    plt.savefig(reportPath(args, report, "_bulkBothCPU.png"))
     plt.cla()
     return
 
 #*******************************************************************************
 
-def doPowerSpectrum(args, fsFile):
+def doPowerSpectrum(args, report):
+    """
+    A histogram of the whole slab is the sum of the per-OST histograms.
+    The empty first bin is left out, as it always was.
+    """
     if args.progress == True:
         print "Power spectrum plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    read = np.zeros(len(fsStepsDataSet))
-    readHist, bins = np.histogram(read, bins=1000, range=(0.0, 2500.0))
-    readHist[0] = 0.0
-    ostReadGroup = fsFile['OSTReadGroup']
-    ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        hist, bins = np.histogram(ostBulkReadDataSet[ost_index,:], bins=1000, range=(0.0, 2500.0))
-        readHist += hist
-        ost_index += 1
-    readHist *= bins[:-1]
-    write = np.zeros(len(fsStepsDataSet))
-    writeHist, bins = np.histogram(write, bins=1000, range=(0.0, 2500.0))
-    writeHist[0] = 0.0
-    ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        hist, bins = np.histogram(ostBulkWriteDataSet[ost_index,:], bins=1000, range=(0.0, 2500.0))
-        writeHist += hist
-        ost_index += 1
-    writeHist *= bins[:-1]
+    readHist, bins = np.histogram(report['OSTBulkReadDataSet'], bins=1000, range=(0.0, 2500.0))
+    readHist[0] = 0
+    readHist = readHist*bins[:-1]
+    writeHist, bins = np.histogram(report['OSTBulkWriteDataSet'], bins=1000, range=(0.0, 2500.0))
+    writeHist[0] = 0
+    writeHist = writeHist*bins[:-1]
     fig = plt.figure()
     ax = fig.add_subplot(111)
     ax.plot(bins[:-1], readHist, 'r-', drawstyle='steps', label='read')
@@ -302,44 +248,23 @@ def doPowerSpectrum(args, fsFile):
     plt.xlabel(r'$MiB$')
     plt.ylabel(r'$MiB$')
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s per-OST Power Spectrum" % (fsStepsDataSet.attrs['day'],
-                                       fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s per-OST Power Spectrum" % (report['day'], report['fs']))
     plt.legend()
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_power.png")
+    plt.savefig(reportPath(args, report, "_power.png"))
     plt.cla()
     return
 
 #*******************************************************************************
 
-def doFourier(args, fsFile):
+def doFourier(args, report):
+    """
+    The transform is linear, so the sum of the per-OST transforms is
+    the transform of the sum.
+    """
     if args.progress == True:
         print "Fourier plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    read = np.zeros(len(fsStepsDataSet))
-    readFft = np.fft.hfft(read)
-    ostReadGroup = fsFile['OSTReadGroup']
-    ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        readFft += np.fft.hfft(ostBulkReadDataSet[ost_index,:])
-        ost_index += 1
-    write = np.zeros(len(fsStepsDataSet))
-    writeFft = np.fft.hfft(write)
-    ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        writeFft += np.fft.hfft(ostBulkWriteDataSet[ost_index,:])
-        ost_index += 1
+    readFft = np.fft.hfft(report['read'])
+    writeFft = np.fft.hfft(report['write'])
     fig = plt.figure()
     x = range(len(readFft))
     ax = fig.add_subplot(111)
@@ -348,13 +273,9 @@ def doFourier(args, fsFile):
     plt.xlabel('frequecy')
     plt.ylabel(r'$count$')
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s Fourier Transform" % (fsStepsDataSet.attrs['day'],
-                                       fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s Fourier Transform" % (report['day'], report['fs']))
     plt.legend()
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_fourier.png")
+    plt.savefig(reportPath(args, report, "_fourier.png"))
     plt.cla()
     return
 
@@ -366,34 +287,15 @@ def autocorr(x):
 
 #*******************************************************************************
 
-def doAutoCorrelation(args, fsFile):
+def doAutoCorrelation(args, report):
     if args.progress == True:
         print "Auto-correlation plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    read = np.zeros(len(fsStepsDataSet))
-    test = autocorr(read)
-    readAutoCorr = np.zeros_like(test)
-    ostReadGroup = fsFile['OSTReadGroup']
-    ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        readAutoCorr += autocorr(ostBulkReadDataSet[ost_index,:])
-        ost_index += 1
-    write = np.zeros(len(fsStepsDataSet))
-    test = autocorr(write)
-    writeAutoCorr = np.zeros_like(test)
-    ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        writeAutoCorr += autocorr(ostBulkWriteDataSet[ost_index,:])
-        ost_index += 1
+    readAutoCorr = np.zeros(len(report['Steps']))
+    for row in report['OSTBulkReadDataSet']:
+        readAutoCorr += autocorr(row)
+    writeAutoCorr = np.zeros(len(report['Steps']))
+    for row in report['OSTBulkWriteDataSet']:
+        writeAutoCorr += autocorr(row)
     fig = plt.figure()
     x = range(len(readAutoCorr))
     ax = fig.add_subplot(111)
@@ -402,117 +304,97 @@ def doAutoCorrelation(args, fsFile):
     plt.xlabel('separation')
     plt.ylabel(r'$correlation$')
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s Autocorreation" % (fsStepsDataSet.attrs['day'],
-                                       fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s Autocorreation" % (report['day'], report['fs']))
     plt.legend()
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_auto-cor.png")
+    plt.savefig(reportPath(args, report, "_auto-cor.png"))
     plt.cla()
     return
 
 #*******************************************************************************
 
-def doDailySummary(args, fsFile, AggregateRead, AggregateWrite):
+def doDailySummary(args, report):
     if args.progress == True:
         print "Daily summary data gathering"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs = fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    interval = fsStepsDataSet[-1] - fsStepsDataSet[0]
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    f = open(path+'/'+host+'_'+fs+'.log', 'w')
-    f.write("\"%s\"\t%s\t%16.4lf\t%16.4lf\t%16.4f\t%16.4f\n" % (fsStepsDataSet.attrs['day']+' 00:00:00',
-                                                              fsStepsDataSet[0],
+    Steps = report['Steps']
+    AggregateRead = np.sum(report['read']/(1024*1024)*report['intervals'])
+    AggregateWrite = np.sum(report['write']/(1024*1024)*report['intervals'])
+    interval = Steps[-1] - Steps[0]
+    f = open(reportPath(args, report, '.log'), 'w')
+    f.write("\"%s\"\t%s\t%16.4lf\t%16.4lf\t%16.4f\t%16.4f\n" % (report['day']+' 00:00:00',
+                                                              Steps[0],
                                                               AggregateRead/1024.0,
                                                               AggregateWrite/1024.0,
                                                               AggregateRead/(1024.0*interval),
                                                               AggregateWrite/(1024.0*interval)))
     f.close()
+    if not args.store is None:
+        store = Daily.Store(os.path.join(args.store, 'daily'+Daily.STORE_SUFFIX), Daily.DAILY_DTYPE)
+        store.put(('"'+report['day'], '00:00:00"', Steps[0],
+                   AggregateRead/1024.0, AggregateWrite/1024.0,
+                   AggregateRead/(1024.0*interval), AggregateWrite/(1024.0*interval)))
     return
 
 #*******************************************************************************
 
-def doDailyMDSSummary(args, fsFile, AggregateOps):
+def doDailyMDSSummary(args, report):
     if args.progress == True:
         print "Daily metadata summary data gathering"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs = fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    interval = fsStepsDataSet[-1] - fsStepsDataSet[0]
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    f = open(path+'/'+host+'_'+fs+'_mds.log', 'w')
-    f.write("\"%s\"\t%s\t%16.4lf\t%16.4f\n" % (fsStepsDataSet.attrs['day']+' 00:00:00',
-                                               fsStepsDataSet[0],
+    Steps = report['Steps']
+    AggregateOps = np.sum(report['mds']*report['intervals'])
+    interval = Steps[-1] - Steps[0]
+    f = open(reportPath(args, report, '_mds.log'), 'w')
+    f.write("\"%s\"\t%s\t%16.4lf\t%16.4f\n" % (report['day']+' 00:00:00',
+                                               Steps[0],
                                                AggregateOps,
                                                AggregateOps/interval))
     f.close()
+    if not args.store is None:
+        store = Daily.Store(os.path.join(args.store, 'dailymds'+Daily.STORE_SUFFIX), Daily.DAILY_MDS_DTYPE)
+        store.put(('"'+report['day'], '00:00:00"', Steps[0],
+                   AggregateOps, AggregateOps/interval))
     return
 
 #*******************************************************************************
 
-def doMissingPackets(args, fsFile):
+def doMissingPackets(args, report):
     if args.progress == True:
         print "Missing packets plot"
-    fsStepsGroup = fsFile['FSStepsGroup']
-    fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    fs=fsStepsDataSet.attrs['fs']
-    try:
-        host=fsStepsDataSet.attrs['host']
-    except:
-        host='hopper'
-    missing = np.zeros(len(fsStepsDataSet))
-    ossCPUGroup = fsFile["OSSCPUGroup"]
-    ossCPUDataSet = ossCPUGroup["OSSCPUDataSet"]
-    fsMissingGroup = fsFile['FSMissingGroup']
-    fsMissingDataSet = fsMissingGroup['FSMissingDataSet']
-    Missing = np.zeros(len(fsStepsDataSet))
-    oss_index = 0
-    for oss_name in ossCPUDataSet.attrs["OSSNames"]:
-        Missing += fsMissingDataSet[oss_index,:]
-        oss_index += 1
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet, Missing, 'r', label='misssing', Ave=False, format='+')
+    Graph.timeSeries(ax, report['Steps'], report['missing'], 'r', label='misssing', Ave=False, format='+')
     plt.xlabel('time')
     plt.ylabel(r'$count$')
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    plt.title("%s %s Missing Packets" % (fsStepsDataSet.attrs['day'],
-                                         fsStepsDataSet.attrs['fs']))
+    plt.title("%s %s Missing Packets" % (report['day'], report['fs']))
     ax.set_ybound(lower = 0, upper = 156)
     plt.legend()
-    path  = os.path.dirname(args.file)
-    if path == "":
-        path = "."
-    plt.savefig(path+'/'+host+'_'+fs+"_Missing.png")
+    plt.savefig(reportPath(args, report, "_Missing.png"))
     plt.cla()
     return
 
 #*******************************************************************************
 
+# Each product of the report, the function that makes it from the
+# report dict, and the data sets doRead() has to read for it. They
+# don't depend on one another, so any of them can be left out.
+PRODUCTS = {'rate' : (doRatePlot, ('OSTBulkReadDataSet', 'OSTBulkWriteDataSet', 'OSSCPUDataSet')),
+            'mds' : (doMDSPlot, ('MDSOpsDataSet', 'MDSCPUDataSet')),
+            'osscpu' : (doOSSCPUPlot, ('OSTBulkReadDataSet', 'OSTBulkWriteDataSet', 'OSSCPUDataSet')),
+            'power' : (doPowerSpectrum, ('OSTBulkReadDataSet', 'OSTBulkWriteDataSet')),
+            'fourier' : (doFourier, ('OSTBulkReadDataSet', 'OSTBulkWriteDataSet')),
+            'autocorr' : (doAutoCorrelation, ('OSTBulkReadDataSet', 'OSTBulkWriteDataSet')),
+            'summary' : (doDailySummary, ('OSTBulkReadDataSet', 'OSTBulkWriteDataSet')),
+            'mdssummary' : (doDailyMDSSummary, ('MDSOpsDataSet',)),
+            'missing' : (doMissingPackets, ('FSMissingDataSet',))}
+# The nightly report, in the order it has always been made
+DEFAULT_PRODUCTS = ['rate', 'mds', 'power', 'fourier', 'autocorr', 'summary', 'mdssummary', 'missing']
+
+#*******************************************************************************
+
 def doAction(args, fsFile):
-    (AggregateRead, AggregateWrite) = doRatePlot(args, fsFile)
-    AggregateOps = doMDSPlot(args, fsFile)
-    #doOSSCPUPlot(args, fsFile)
-    doPowerSpectrum(args, fsFile)
-    doFourier(args, fsFile)
-    doAutoCorrelation(args, fsFile)
-    doDailySummary(args, fsFile, AggregateRead, AggregateWrite)
-    doDailyMDSSummary(args, fsFile, AggregateOps)
-    doMissingPackets(args, fsFile)
+    report = doRead(args, fsFile)
+    for product in args.products:
+        PRODUCTS[product][0](args, report)
 
 #*******************************************************************************
 
@@ -527,6 +409,8 @@ if __name__ == "__main__":
     -f <fs>     The dbname for this filesystem in the lmtrc
     -h          A help message
     -i <index>  Index of the file system entry in the the config file
+    -P <list>   The products to make, eg. rate,mds,summary (default: all but osscpu)
+    -s <dir>    Also add the summaries to the daily.store files in <dir>
     -v          Print debug messages
     -V          Print the version and exit
 
@@ -57,7 +57,7 @@ import datetime
 import time
 import h5py
 
-from pyLMT import Graph
+from pyLMT import Graph, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -118,16 +118,17 @@ def do_action(args, fsFile):
     bins = ostIosizeReadDataSet.attrs['bins']
     ostWriteGroup = fsFile['OSTWriteGroup']
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = H5LMT.getIntervals(fsFile)
     readHistpS  = None
     writeHistpS = None
     ost_index = 0
     for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        readpS = ostIosizeReadDataSet[ost_index,:,:]
+        readpS = H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals)
         if readHistpS is None:
             readHistpS = np.zeros_like(readpS)
         #print readpS
         readHistpS += readpS
-        writepS = ostIosizeWriteDataSet[ost_index,:,:]
+        writepS = H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals)
         if writeHistpS is None:
             writeHistpS = np.zeros_like(writepS)
         #print writepS
@@ -58,7 +58,7 @@ import datetime
 import time
 import h5py
 
-from pyLMT import Graph
+from pyLMT import Graph, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -137,28 +137,6 @@ def do_main(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def doHist(args, histSeries, yhat, fsStepsDataSet):
     """
     histSeries is the aray of observations, its shape is (num_steps, 2*num_bins).
@@ -246,14 +224,15 @@ def doHist(args, histSeries, yhat, fsStepsDataSet):
 def do_action(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     if b_index == None:
         print "brw_stats_model_h5lmt.do_action(): Failed to find timestamp index for %d" % b_sie
         return
@@ -265,29 +244,19 @@ def do_action(args, b_sie, e_sie, fsFile):
         host=fsStepsDataSet.attrs['host']
     except:
         host='hopper'
-    readMBpS = np.zeros(e_index - b_index + 1)
     ostReadGroup = fsFile['OSTReadGroup']
     ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        readMBpS += ostBulkReadDataSet[ost_index,b_index:e_index+1]
-        ost_index += 1
-    readMBpS /= 1024*1024
+    readMBpS = h5lmt.sum('OSTBulkReadDataSet', b_index, e_index+1)/(1024*1024)
     np.set_printoptions(threshold='nan')
-    writeMBpS = np.zeros(e_index - b_index + 1)
     ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        writeMBpS += ostBulkWriteDataSet[ost_index,b_index:e_index+1]
-        ost_index += 1
-    writeMBpS /= 1024*1024
+    writeMBpS = h5lmt.sum('OSTBulkWriteDataSet', b_index, e_index+1)/(1024*1024)
     ostIosizeReadDataSet = ostReadGroup['OSTIosizeReadDataSet']
     if args.stat != ostIosizeReadDataSet.attrs['stat']:
         print "We should only be seeing BRW_IOSIZE statistics not %s" % ostIosizeReadDataSet.attrs['stat']
         return
     bins = ostIosizeReadDataSet.attrs['bins']
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = h5lmt.Intervals
     readHistpS  = None
     writeHistpS = None
     ost_index = 0
@@ -296,12 +265,12 @@ def do_action(args, b_sie, e_sie, fsFile):
     for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
         if args.progress == True:
             print "OST %d: %s" % (ost_index, ost_name)
-        readpS = ostIosizeReadDataSet[ost_index,:,b_index:e_index+1]
+        readpS = H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals, b_index, e_index+1)
         if readHistpS is None:
             readHistpS = np.zeros_like(readpS)
         #print readpS
         readHistpS += readpS
-        writepS = ostIosizeWriteDataSet[ost_index,:,b_index:e_index+1]
+        writepS = H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals, b_index, e_index+1)
         if writeHistpS is None:
             writeHistpS = np.zeros_like(writepS)
         #print writepS
@@ -337,15 +306,15 @@ def do_action(args, b_sie, e_sie, fsFile):
         return
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], readMBpS, 'r', label='read', Ave=False)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], writeMBpS, 'b', label='write', Ave=False)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], readMBpS, 'r', label='read', Ave=False)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], writeMBpS, 'b', label='write', Ave=False)
     plt.xlabel('time')
     plt.ylabel(r'$MiB/sec$')
-    (handles, labels) = Graph.percent(ax, fsStepsDataSet[b_index:e_index+1], yhat, 'k', label='FSU', Ave=False, ybound=200.0)
+    (handles, labels) = Graph.percent(ax, h5lmt.Steps[b_index:e_index+1], yhat, 'k', label='FSU', Ave=False, ybound=200.0)
     if (not handles is None) and (not labels is None):
         plt.legend(handles, labels)
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
-    dayStr = time.strftime("%Y-%m-%d", time.localtime(fsStepsDataSet[0]))
+    dayStr = time.strftime("%Y-%m-%d", time.localtime(h5lmt.Steps[0]))
     plt.title("%s %s File System Utilization" % (dayStr, fs))
     if args.ybound is None:
         ax.set_ybound(lower=0, upper=50000)
@@ -37,9 +37,17 @@ import argparse
 import MySQLdb
 import numpy as np
 import datetime
+import time
 import h5py
 
-from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS
+from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS, Pool, H5LMT
+
+# The data set that keeps the watermark (see H5LMT.advanceWatermark())
+# for each kind of data
+WATERMARKS = {'osts' : ('OSTReadGroup', 'OSTBulkReadDataSet'),
+              'osss' : ('OSSCPUGroup', 'OSSCPUDataSet'),
+              'mds' : ('MDSOpsGroup', 'MDSOpsDataSet'),
+              'iosize' : ('OSTReadGroup', 'OSTIosizeReadDataSet')}
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -56,11 +64,14 @@ def process_args(main=False):
     parser.add_argument('-c', '--config', default=None, type=file, help='The configuration file to use for DB access')
     parser.add_argument('-e', '--end', default=None, type=str, help='The end of the time interval to be queried if not the end of the file')
     parser.add_argument('-f', '--file', default=None, type=str, help='The name of the file previously initialized by h5lmt_init.py')
+    parser.add_argument('-I', '--incremental', action='store_true', default=False, help='Carry on from the watermark in the file up to now, rather than use -b and -e (all the kinds of data if none is given). The OST data and the OSS CPU are each fetched in one query; the MDS ops and CPU take one query each')
     parser.add_argument('-i', '--iosize', action='store_true', default=False, help='Process the BRW_IOSIZE data for the interval')
     parser.add_argument('-m', '--mds', action='store_true', default=False, help='Process the MDS data for the interval')
     parser.add_argument('-o', '--osss', action='store_true', default=False, help='Process the OSS data for the interval')
     parser.add_argument('-O', '--osts', action='store_true', default=False, help='Process the bulk OST data for the interval')
     parser.add_argument('-p', '--progress', action='store_true', default=False, help='Give an indication of progress on the work')
+    parser.add_argument('-r', '--rollup', action='store_true', default=False, help='Update the rollups (see H5LMT.writeRollups()) for the interval')
+    parser.add_argument('-P', '--pool', default=None, type=int, help='Fetch the OST and BRW_IOSIZE data in parallel over this many DB connections')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
     args = parser.parse_args()
@@ -81,12 +92,34 @@ def validate_args(args):
     if args.begin is None:
         args.begin = args.day + ' 00:00:00'
     if args.end is None:
-        args.end = fsStepsDataSet.attrs["nextday"] + '00:00:00'
+        args.end = fsStepsDataSet.attrs["nextday"] + ' 00:00:00'
     args.host = fsStepsDataSet.attrs["host"]
     args.fs = 'filesystem_' + fsStepsDataSet.attrs["fs"]
     # The timestamp processing still want to see the old 'index' value,
     # just subvert it
     args.index = None
+    if args.incremental == True:
+        if not (args.osts or args.osss or args.mds or args.iosize):
+            args.osts = args.osss = args.mds = args.iosize = True
+        # Start from the least far along of the kinds asked for. The
+        # others just get their last few steps written again.
+        first = int(fsStepsDataSet[0])
+        begin = int(fsStepsDataSet[-1])
+        for kind in WATERMARKS:
+            if getattr(args, kind) == False:
+                continue
+            (group, name) = WATERMARKS[kind]
+            watermark = H5LMT.getWatermark(fsFile[group][name])
+            if watermark is None:
+                watermark = first
+            begin = min(begin, watermark)
+        end = min(int(time.time()), int(fsStepsDataSet[-1]))
+        if begin >= end:
+            print "%s is up to date" % args.file
+            fsFile.close()
+            return(None, None)
+        args.begin = str(begin)
+        args.end = str(end)
     return(args, fsFile)
 
 #*******************************************************************************
@@ -102,14 +135,19 @@ def doMain(args):
     Steps = TimeSteps.TimeSteps()
     Steps.getTimeSteps(beginTimestamp, endTimestamp, fsrc['conn'])
     fs = FS.FS(fsrc['name'])
-    fs.getInfo(fsrc['conn'])
+    fs.setDtype(fsrc['dtype'])
+    fs.getInfo(fsrc['conn'], catalog=fsrc['catalog'])
     fs.setSteps(Steps)
     brwfs = BrwFS.BrwFS(fsrc['name'])
-    brwfs.getOSSs(fsrc['conn'])
+    brwfs.getOSSs(fsrc['conn'], topology=fs.Topology)
     iosize_bins = np.array([4096, 8192, 16384, 32768, 65536, 131072, 262144, 524288, 1048576])
     brwfs.setSteps(Steps)
-    brwfs.getBrwStats(fsrc['conn'], stat="BRW_IOSIZE", bins=iosize_bins)
-    return(fs, brwfs)
+    brwfs.getBrwStats(fsrc['conn'], stat="BRW_IOSIZE", bins=iosize_bins,
+                      catalog=fsrc['catalog'])
+    pool = None
+    if not args.pool is None:
+        pool = Pool.Pool(fsrc, args.pool)
+    return(fs, brwfs, pool)
 
 #*******************************************************************************
 
@@ -157,10 +195,36 @@ def doSteps(args, fsFile, fs):
 
 #*******************************************************************************
 
-def doOSTs(args, fsFile, fs, begin_index, end_index):
+def alignSteps(Steps, fileSteps):
+    """
+    Map a series' time steps onto the file's step grid 'fileSteps' (the
+    part of FSStepsDataSet being filled in). Return the pair of index
+    arrays (series, file) with Steps[series] == fileSteps[file], so a
+    whole slab can be filled in with one fancy-indexed assignment.
+    Steps that fall between the grid points are reported and skipped,
+    and grid points with no step are left out.
+    """
+    Steps = np.asarray(Steps)
+    fileSteps = np.asarray(fileSteps)
+    if (len(Steps) == 0) or (len(fileSteps) == 0):
+        return(np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+    file = np.searchsorted(fileSteps, Steps)
+    match = np.zeros(len(Steps), dtype=np.bool_)
+    inside = (file < len(fileSteps))
+    match[inside] = (fileSteps[file[inside]] == Steps[inside])
+    for step in Steps[~match & inside & (Steps > fileSteps[0])]:
+        print "Out of order step at Steps = %d" % step
+    return(np.flatnonzero(match), file[match])
+
+#*******************************************************************************
+
+def doOSTs(args, fsFile, fs, begin_index, end_index, pool=None):
     """
     We may want to introduce partial OST coverage and a progress
-    meter as well
+    meter as well. With a pool all the OSTs are fetched up front, in
+    parallel, rather than one query per OST, and with -I they are
+    fetched up front in one query. The interval is read out of the data
+    sets, filled in, and written back as one slab each.
     """
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
@@ -168,31 +232,26 @@ def doOSTs(args, fsFile, fs, begin_index, end_index):
     ostBulkReadDataSet  = ostReadGroup['OSTBulkReadDataSet']
     ostWriteGroup = fsFile['OSTWriteGroup']
     ostBulkWriteDataSet  = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
+    if not pool is None:
+        fs.Bulk.getData(pool=pool)
+    elif args.incremental == True:
+        fs.Bulk.getData(columnar=True)
+    (series, file) = alignSteps(fs.Steps.Steps, fsStepsDataSet[begin_index:end_index+1])
+    Read = ostBulkReadDataSet[:, begin_index:end_index+1]
+    Write = ostBulkWriteDataSet[:, begin_index:end_index+1]
+    for ost_index, ost_name in enumerate(ostBulkReadDataSet.attrs['OSTNames']):
         if args.progress == True:
             print "%s " % ost_name,
         ost = fs.Bulk.getOST(ost=ost_name)
         # N.B. Data comes back from the pyLMT interface as a time
         # series of observations of true rates in MB/s
-        ost.getData(fs.conn)
-        i = 0
-        for index in range(begin_index, end_index+1):
-            if fs.Steps.Steps[i] == fsStepsDataSet[index]:
-                if ost.Missing[i] == 0:
-                    #print "Missing: ost %d, index %d" % (ost_index, index)
-                    ostBulkReadDataSet[ost_index,index] = ost.Read.Values[i]
-                    ostBulkWriteDataSet[ost_index,index] = ost.Write.Values[i]
-                i += 1
-                continue
-            if fs.Steps.Steps[i] < fsStepsDataSet[index]:
-                print "Out of order step at fs.Steps.Steps = %d" % fs.Steps.Steps[i]
-                i += 1
-                continue
-            # if fs.Steps.Steps[i] > fsStepsDataSet[index]:
-            #     Don't do anything in particular, so i stays the same
-            #     and index is incremented
-        ost_index += 1
+        if (pool is None) and (args.incremental == False):
+            ost.getData(fs.conn)
+        present = (ost.Missing[series] == 0)
+        Read[ost_index, file[present]] = ost.Read.Data[series[present]]
+        Write[ost_index, file[present]] = ost.Write.Data[series[present]]
+    ostBulkReadDataSet[:, begin_index:end_index+1] = Read
+    ostBulkWriteDataSet[:, begin_index:end_index+1] = Write
     if args.progress == True:
         print
     return
@@ -200,35 +259,31 @@ def doOSTs(args, fsFile, fs, begin_index, end_index):
 #*******************************************************************************
 
 def doOSSs(args, fsFile, fs, begin_index, end_index):
+    """
+    With -I the CPU utilization for all the OSSs is fetched up front in
+    one query (see Bulk.getCPU()), rather than one query per OSS.
+    """
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
     ossCPUGroup = fsFile['OSSCPUGroup']
     ossCPUDataSet  = ossCPUGroup['OSSCPUDataSet']
     fsMissingGroup = fsFile['FSMissingGroup']
     fsMissingDataSet = fsMissingGroup['FSMissingDataSet']
-    oss_index = 0
-    for oss_name in ossCPUDataSet.attrs['OSSNames']:
+    if args.incremental == True:
+        fs.Bulk.getCPU()
+    (series, file) = alignSteps(fs.Steps.Steps, fsStepsDataSet[begin_index:end_index+1])
+    CPU = ossCPUDataSet[:, begin_index:end_index+1]
+    # A step the DB doesn't have at all counts as missing too
+    Missing = np.ones(CPU.shape, dtype=np.int32)
+    for oss_index, oss_name in enumerate(ossCPUDataSet.attrs['OSSNames']):
         oss = fs.Bulk.getOSS(oss=oss_name)
-        oss.getCPU()
-        i = 0
-        for index in range(begin_index, end_index+1):
-            #print "data set %s, Steps %d" % (index, i)
-            if fs.Steps.Steps[i] == fsStepsDataSet[index]:
-                if oss.Missing[i] == 1:
-                    #print "Missing: oss %d, index %d" % (oss_index, index)
-                    fsMissingDataSet[oss_index,index] = 1
-                else:
-                    ossCPUDataSet[oss_index,index] = oss.CPU.Values[i]
-                    fsMissingDataSet[oss_index,index] = 0
-                i += 1
-                continue
-            if fs.Steps.Steps[i] < fsStepsDataSet[index]:
-                print "Out of order step at fs.Steps.Steps = %d" % fs.Steps.Steps[i]
-                i += 1
-                continue
-            fsMissingDataSet[oss_index,index] = 1
-            #print "Missing: oss %d, index %d" % (oss_index, index)
-        oss_index += 1
+        if args.incremental == False:
+            oss.getCPU()
+        missing = (oss.Missing[series] == 1)
+        Missing[oss_index, file] = missing
+        CPU[oss_index, file[~missing]] = oss.CPU.Data[series[~missing]]
+    ossCPUDataSet[:, begin_index:end_index+1] = CPU
+    fsMissingDataSet[:, begin_index:end_index+1] = Missing
     return
 
 #*******************************************************************************
@@ -242,42 +297,31 @@ def doMDS(args, fsFile, fs, begin_index, end_index):
     mdsCPUDataSet = mdsCPUGroup["MDSCPUDataSet"]
     fs.MDS.getData()
     fs.MDS.getCPU()
-    op_index = 0
-    for op_name in mdsOpsDataSet.attrs['OpNames']:
-        i = 0
+    (series, file) = alignSteps(fs.Steps.Steps, fsStepsDataSet[begin_index:end_index+1])
+    Ops = mdsOpsDataSet[:, begin_index:end_index+1]
+    for op_index, op_name in enumerate(mdsOpsDataSet.attrs['OpNames']):
         op = fs.MDS.getOp(name=op_name)
         if op is None:
             continue
-        for index in range(begin_index, end_index+1):
-            if fs.Steps.Steps[i] < fsStepsDataSet[index]:
-                print "Out of order step at fs.Steps.Steps = %d" % fs.Steps.Steps[i]
-                while ((fs.Steps.Steps[i] < fsStepsDAtaSet[index]) and (i < len(fs.Steps.Steps))):
-                    i += 1
-            if fs.Steps.Steps[i] == fsStepsDataSet[index]:
-                if op.Missing[i] == 0:
-                    mdsOpsDataSet[op_index, index] = op.Values[i]
-                i += 1
-            # In this case we take no action if we have to skip 'index'
-        op_index += 1
-    i = 0
-    for index in range(begin_index, end_index+1):
-        if fs.Steps.Steps[i] < fsStepsDataSet[index]:
-            while ((fs.Steps.Steps[i] < fsStepsDAtaSet[index]) and (i < len(fs.Steps.Steps))):
-                i += 1
-        if fs.Steps.Steps[i] == fsStepsDataSet[index]:
-            mdsCPUDataSet[index] = fs.MDS.CPU.Values[i]
-            i += 1
-        # In this case we take no action if we have to skip 'index',
-        # and we've alread reported out of order steps.
+        present = (op.Missing[series] == 0)
+        Ops[op_index, file[present]] = op.Data[series[present]]
+    mdsOpsDataSet[:, begin_index:end_index+1] = Ops
+    CPU = mdsCPUDataSet[begin_index:end_index+1]
+    CPU[file] = fs.MDS.CPU.Data[series]
+    mdsCPUDataSet[begin_index:end_index+1] = CPU
     return
 
 
 #*******************************************************************************
 
-def doIosize(args, fsFile, brwfs, begin_index, end_index):
+def doIosize(args, fsFile, brwfs, begin_index, end_index, pool=None):
     """
     We may want to introduce partial OST coverage and a progress
-    meter as well
+    meter as well. With a pool all the OSTs are fetched up front, in
+    parallel, rather than one query per OST. As in doOSTs() the
+    interval goes back into each data set as a single slab. A file made
+    with h5lmt_init.py -C gets the count for each step, and its interval,
+    rather than the rate.
     """
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
@@ -289,52 +333,46 @@ def doIosize(args, fsFile, brwfs, begin_index, end_index):
     ostIosizeReadDataSet  = ostReadGroup['OSTIosizeReadDataSet']
     ostWriteGroup = fsFile['OSTWriteGroup']
     ostIosizeWriteDataSet  = ostWriteGroup['OSTIosizeWriteDataSet']
-    ost_index = 0
-    for ost_name in ostIosizeReadDataSet.attrs['OSTNames']:
+    if not pool is None:
+        brwfs.getData(stat="BRW_IOSIZE", pool=pool)
+    elif args.incremental == True:
+        brwfs.getData(stat="BRW_IOSIZE")
+    counts = H5LMT.isCounts(ostIosizeReadDataSet)
+    (series, file) = alignSteps(Steps, fsStepsDataSet[begin_index+1:end_index+1])
+    Read = ostIosizeReadDataSet[:, :, begin_index+1:end_index+1]
+    Write = ostIosizeWriteDataSet[:, :, begin_index+1:end_index+1]
+    for ost_index, ost_name in enumerate(ostIosizeReadDataSet.attrs['OSTNames']):
         if args.progress == True:
             print "%s " % ost_name,
-        i = 0
         ost = brwfs.getOST(ost=ost_name)
         if ost is None:
             continue
-        ost.getData(conn=brwfs.conn, stat="BRW_IOSIZE")
+        if (pool is None) and (args.incremental == False):
+            ost.getData(conn=brwfs.conn, stat="BRW_IOSIZE")
         id = ost.getStatId("BRW_IOSIZE")
-        Values = ost.Read[id].Values
-        Values = np.diff(Values, axis=1)
-        Values /= stepsDiff
-        Values[np.where(Values.mask==True)] = 0.0
-        for index in range(begin_index+1, end_index+1):
-            if Steps[i] < fsStepsDataSet[index]:
-                print "Out of order step at Steps[%d] = %d, fsStepsDataSet[%d] = %d" % (i, Steps[i], index, fsStepsDataSet[index])
-                while ((Steps[i] < fsStepsDAtaSet[index]) and (i < len(Steps))):
-                    i += 1
-            if Steps[i] == fsStepsDataSet[index]:
-                #print "OST %d: index %d, i %d" % (ost_index, index, i)
-                ostIosizeReadDataSet[ost_index,:,index] = Values[:,i]
-                i += 1
-            # In this case we take no action if we have to skip 'index'
-        Values = ost.Write[id].Values
-        Values = np.diff(Values, axis=1)
-        Values /= stepsDiff
-        Values[np.where(Values.mask==True)] = 0.0
-        i = 0
-        for index in range(begin_index+1, end_index+1):
-            if Steps[i] < fsStepsDataSet[index]:
-                # We already mentioned it above
-                while ((Steps[i] < fsStepsDAtaSet[index]) and (i < len(Steps))):
-                    i += 1
-            if Steps[i] == fsStepsDataSet[index]:
-                ostIosizeWriteDataSet[ost_index,:,index] = Values[:,i]
-                i += 1
-            # In this case we take no action if we have to skip 'index'
-        ost_index += 1
+        for (Slab, Hist) in ((Read, ost.Read[id]), (Write, ost.Write[id])):
+            Values = np.diff(Hist.Values, axis=1)
+            if counts == True:
+                # A counter reset shows up as a negative count
+                Values[Values < 0] = 0.0
+            else:
+                Values /= stepsDiff
+            Values[np.where(Values.mask==True)] = 0.0
+            Slab[ost_index][:, file] = Values[:, series]
+    ostIosizeReadDataSet[:, :, begin_index+1:end_index+1] = Read
+    ostIosizeWriteDataSet[:, :, begin_index+1:end_index+1] = Write
+    if counts == True:
+        fsIntervalsDataSet = fsStepsGroup['FSIntervalsDataSet']
+        Intervals = fsIntervalsDataSet[begin_index+1:end_index+1]
+        Intervals[file] = stepsDiff[series]
+        fsIntervalsDataSet[begin_index+1:end_index+1] = Intervals
     if args.progress == True:
         print
     return
 
 #*******************************************************************************
 
-def doAction(args, fsFile, fs, brwfs):
+def doAction(args, fsFile, fs, brwfs, pool=None):
     """
     We always create the HDF5 file in the context of a 24 hour interval, even if
     a given invocation selects for less than that interval. This will not support
@@ -347,14 +385,32 @@ def doAction(args, fsFile, fs, brwfs):
     (begin_index, end_index) = doSteps(args, fsFile, fs)
     if (begin_index is None) or (end_index is None):
         return
+    first_index = begin_index
+    if args.incremental == True:
+        if end_index <= begin_index:
+            print "Nothing new in the LMT DB since %d" % fs.begin.sie
+            fsFile.close()
+            return
+        # The watermark step is already in the file. It was only
+        # fetched again as the base for the first new rate.
+        first_index = begin_index + 1
     if args.osts == True:
-        doOSTs(args, fsFile, fs, begin_index, end_index)
+        doOSTs(args, fsFile, fs, first_index, end_index, pool)
     if args.osss == True:
-        doOSSs(args, fsFile, fs, begin_index, end_index)
+        doOSSs(args, fsFile, fs, first_index, end_index)
     if args.mds == True:
-        doMDS(args, fsFile, fs, begin_index, end_index)
+        doMDS(args, fsFile, fs, first_index, end_index)
     if args.iosize == True:
-        doIosize(args, fsFile, brwfs, begin_index, end_index)
+        doIosize(args, fsFile, brwfs, begin_index, end_index, pool)
+    fsStepsDataSet = fsFile['FSStepsGroup']['FSStepsDataSet']
+    for kind in WATERMARKS:
+        if getattr(args, kind) == True:
+            (group, name) = WATERMARKS[kind]
+            H5LMT.advanceWatermark(fsFile[group][name], fsStepsDataSet[0],
+                                   fsStepsDataSet[begin_index], fsStepsDataSet[end_index],
+                                   fs.end.ts_id)
+    if args.rollup == True:
+        H5LMT.writeRollups(fsFile, first_index, end_index+1)
     fsFile.close()
     return
 
@@ -371,6 +427,9 @@ if __name__ == "__main__":
     -f <fs>     The dbname for this filesystem in the lmtrc
     -h          A help message
     -i <index>  Index of the file system entry in the the config file
+    -I          Carry on from the watermark in the file up to now
+    -P <n>      Fetch the OST data in parallel over <n> DB connections
+    -r          Update the 1 minute, 15 minute, and 1 hour rollups
     -v          Print debug messages
     -V          Print the version and exit
 
@@ -379,7 +438,9 @@ if __name__ == "__main__":
     """
     (args, fsFile) = process_args(main=True)
     if not ((args is None) or (fsFile is None)):
-        fs, brwfs = doMain(args)
+        fs, brwfs, pool = doMain(args)
         if not ((fs is None) or (brwfs is None)):
-            doAction(args, fsFile, fs, brwfs)
+            doAction(args, fsFile, fs, brwfs, pool)
+        if not pool is None:
+            pool.close()
 
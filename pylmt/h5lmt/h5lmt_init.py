@@ -63,7 +63,7 @@ import datetime
 import time
 import h5py
 
-from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS
+from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -73,14 +73,17 @@ def process_args(main=False):
     those thing required by the __man__ script.
     """
     parser = argparse.ArgumentParser(description='Access an LMT DB')
+    parser.add_argument('-C', '--counts', action='store_true', default=False, help='Store the IOSIZE histograms as uint32 counts per step rather than rates')
     parser.add_argument('-c', '--config', default=None, type=file, help='The configuration file to use for DB access')
     parser.add_argument('-d', '--dir', default=None, type=str, help='The parent directory for the new directory containing the files (default: .')
     parser.add_argument('-D', '--day', default=None, type=str, help='The beginning of the time interval to be queried is at midnight of this day (default: today, format: yyyy-mm-dd')
     parser.add_argument('-f', '--fs', default=None, type=str, help='The host and file system of interest (eg. "hopper_scratch"')
     parser.add_argument('-F', '--force', action='store_true', default=False, help='Noramally we won\'t overwrite an existing file')
     parser.add_argument('-i', '--index', default=1, type=int, help='The file system index (# as listed in conf: default = 1) to query for data')
+    parser.add_argument('-L', '--layout', default=H5LMT.LAYOUT_VERSION, type=int, help='The h5lmt layout version (default: %d, 1 for contiguous, uncompressed data sets)' % H5LMT.LAYOUT_VERSION)
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
+    parser.add_argument('-z', '--compression', default='gzip', type=str, help='Compress the data sets with gzip (default), lzf, or none')
     args = parser.parse_args()
     if main == True:
         args = validate_args(args)
@@ -99,6 +102,13 @@ def validate_args(args):
             return(None)
     if args.dir is None:
         args.dir = '.'
+    if args.compression == 'none':
+        args.compression = None
+    try:
+        H5LMT.datasetOptions((1,), args.layout, args.compression)
+    except H5LMT.H5LMTLayoutError, e:
+        print e
+        return(None)
     args.begin = args.day + ' 00:00:00'
     d2 = d1 + datetime.timedelta(days=1)
     args.end = d2.strftime("%Y-%m-%d 00:00:00")
@@ -118,7 +128,8 @@ def doMain(args):
     beginSie = int(time.mktime(time.strptime(args.begin, "%Y-%m-%d %H:%M:%S" )))
     endSie = int(time.mktime(time.strptime(args.end, "%Y-%m-%d %H:%M:%S" )))
     fs = FS.FS(fsrc['name'])
-    fs.getInfo(fsrc['conn'])
+    fs.setDtype(fsrc['dtype'])
+    fs.getInfo(fsrc['conn'], catalog=fsrc['catalog'])
     return(fs, beginSie, endSie)
 
 #*******************************************************************************
@@ -156,20 +167,34 @@ def doAction(args, fs, beginSie, endSie):
     fsStepsDataSet.attrs['nextday'] = args.end[:10]
     fsStepsDataSet.attrs['host'] = args.host
     fsStepsDataSet.attrs['fs'] = fs.name
+    fsStepsDataSet.attrs['layout'] = args.layout
+    iosize_dtype = np.float64
+    if args.counts == True:
+        # The counts are turned back into rates with the intervals
+        # h5lmt_add.py records here (see H5LMT.iosizeRates())
+        iosize_dtype = H5LMT.IOSIZE_COUNT_DTYPE
+        fsIntervalsDataSet = fsStepsGroup.create_dataset("FSIntervalsDataSet", shape=(num_steps,), dtype=np.int32, **H5LMT.datasetOptions((num_steps,), args.layout, args.compression))
+    # Rates and CPU utilization are stored in the LMTConfig 'dtype', if
+    # there is one, and float64 otherwise.
+    rate_dtype = fs.getDtype()
     ostReadGroup = fsFile.create_group("OSTReadGroup")
-    ostBulkReadDataSet  = ostReadGroup.create_dataset("OSTBulkReadDataSet", shape=(num_osts, num_steps), dtype=np.float64)
-    ostIosizeReadDataSet  = ostReadGroup.create_dataset("OSTIosizeReadDataSet", shape=(num_osts, num_bins, num_steps), dtype=np.float64)
+    ostBulkReadDataSet  = ostReadGroup.create_dataset("OSTBulkReadDataSet", shape=(num_osts, num_steps), dtype=rate_dtype, **H5LMT.datasetOptions((num_osts, num_steps), args.layout, args.compression))
+    ostIosizeReadDataSet  = ostReadGroup.create_dataset("OSTIosizeReadDataSet", shape=(num_osts, num_bins, num_steps), dtype=iosize_dtype, **H5LMT.datasetOptions((num_osts, num_bins, num_steps), args.layout, args.compression))
     ostIosizeReadDataSet.attrs['stat'] = "BRW_IOSIZE"
     ostIosizeReadDataSet.attrs['bins'] = iosize_bins
+    if args.counts == True:
+        ostIosizeReadDataSet.attrs['units'] = H5LMT.IOSIZE_COUNTS
     ostWriteGroup = fsFile.create_group("OSTWriteGroup")
-    ostBulkWriteDataSet  = ostWriteGroup.create_dataset("OSTBulkWriteDataSet", shape=(num_osts, num_steps), dtype=np.float64)
-    ostIosizeWriteDataSet  = ostWriteGroup.create_dataset("OSTIosizeWriteDataSet", shape=(num_osts, num_bins, num_steps), dtype=np.float64)
+    ostBulkWriteDataSet  = ostWriteGroup.create_dataset("OSTBulkWriteDataSet", shape=(num_osts, num_steps), dtype=rate_dtype, **H5LMT.datasetOptions((num_osts, num_steps), args.layout, args.compression))
+    ostIosizeWriteDataSet  = ostWriteGroup.create_dataset("OSTIosizeWriteDataSet", shape=(num_osts, num_bins, num_steps), dtype=iosize_dtype, **H5LMT.datasetOptions((num_osts, num_bins, num_steps), args.layout, args.compression))
     ostIosizeWriteDataSet.attrs['stat'] = "BRW_IOSIZE"
     ostIosizeWriteDataSet.attrs['bins'] = iosize_bins
+    if args.counts == True:
+        ostIosizeWriteDataSet.attrs['units'] = H5LMT.IOSIZE_COUNTS
     ossCPUGroup = fsFile.create_group("OSSCPUGroup")
-    ossCPUDataSet  = ossCPUGroup.create_dataset("OSSCPUDataSet", shape=(num_osss, num_steps), dtype=np.float64)
+    ossCPUDataSet  = ossCPUGroup.create_dataset("OSSCPUDataSet", shape=(num_osss, num_steps), dtype=rate_dtype, **H5LMT.datasetOptions((num_osss, num_steps), args.layout, args.compression))
     fsMissingGroup = fsFile.create_group("FSMissingGroup")
-    fsMissingDataSet = fsMissingGroup.create_dataset("FSMissingDataSet", shape=(num_osss, num_steps), dtype=np.int32)
+    fsMissingDataSet = fsMissingGroup.create_dataset("FSMissingDataSet", shape=(num_osss, num_steps), dtype=np.int32, **H5LMT.datasetOptions((num_osss, num_steps), args.layout, args.compression))
     oss_names = []
     ost_names = []
     oss_index = 0
@@ -190,9 +215,9 @@ def doAction(args, fs, beginSie, endSie):
     ostIosizeWriteDataSet.attrs['OSTNames'] = ost_names
     num_ops = fs.MDS.getNumOps()
     mdsOpsGroup = fsFile.create_group("MDSOpsGroup")
-    mdsOpsDataSet = mdsOpsGroup.create_dataset("MDSOpsDataSet", shape=(num_ops, num_steps), dtype=np.float64)
+    mdsOpsDataSet = mdsOpsGroup.create_dataset("MDSOpsDataSet", shape=(num_ops, num_steps), dtype=rate_dtype, **H5LMT.datasetOptions((num_ops, num_steps), args.layout, args.compression))
     mdsCPUGroup = fsFile.create_group("MDSCPUGroup")
-    mdsCPUDataSet = mdsCPUGroup.create_dataset("MDSCPUDataSet", data=np.zeros(num_steps), dtype=np.float64)
+    mdsCPUDataSet = mdsCPUGroup.create_dataset("MDSCPUDataSet", data=np.zeros(num_steps), dtype=rate_dtype, **H5LMT.datasetOptions((num_steps,), args.layout, args.compression))
     op_index = 0
     op_names = []
     for op in fs.MDS.Ops:
@@ -224,12 +249,19 @@ def doAction(args, fs, beginSie, endSie):
     yesterdayostBulkReadDataSet  = yesterdayostReadGroup["OSTBulkReadDataSet"]
     ostBulkReadDataSet[:,0] = yesterdayostBulkReadDataSet[:,-1]
     yesterdayostIosizeReadDataSet  = yesterdayostReadGroup["OSTIosizeReadDataSet"]
-    ostIosizeReadDataSet[:,:,0] = yesterdayostIosizeReadDataSet[:,:,-1]
+    # Rates and counts don't mix, so the IOSIZE histograms only carry
+    # over from a file that holds the same kind
+    sameIosize = (H5LMT.isCounts(yesterdayostIosizeReadDataSet) == args.counts)
+    if sameIosize == True:
+        ostIosizeReadDataSet[:,:,0] = yesterdayostIosizeReadDataSet[:,:,-1]
+        if args.counts == True:
+            fsIntervalsDataSet[0] = yesterdayStepsGroup["FSIntervalsDataSet"][-1]
     yesterdayostWriteGroup = yesterdayFile["OSTWriteGroup"]
     yesterdayostBulkWriteDataSet  = yesterdayostWriteGroup["OSTBulkWriteDataSet"]
     ostBulkWriteDataSet[:,0] = yesterdayostBulkWriteDataSet[:,-1]
     yesterdayostIosizeWriteDataSet  = yesterdayostWriteGroup["OSTIosizeWriteDataSet"]
-    ostIosizeWriteDataSet[:,:,0] = yesterdayostIosizeWriteDataSet[:,:,-1]
+    if sameIosize == True:
+        ostIosizeWriteDataSet[:,:,0] = yesterdayostIosizeWriteDataSet[:,:,-1]
     yesterdayossCPUGroup = yesterdayFile["OSSCPUGroup"]
     yesterdayossCPUDataSet  = yesterdayossCPUGroup["OSSCPUDataSet"]
     ossCPUDataSet[:,0] = yesterdayossCPUDataSet[:,-1]
@@ -254,13 +286,16 @@ if __name__ == "__main__":
     Produce an HDF5 data file with the day's observations
     Options include:
     -c <conf>   Path to configuration file
+    -C          Store the IOSIZE histograms as uint32 counts per step
     -d <dir>    Directory below which to drop daily directory
     -D <day>    Day for wich to gether data
     -f <fs>     The dbname for this filesystem in the lmtrc
     -h          A help message
     -i <index>  Index of the file system entry in the the config file
+    -L <layout> The h5lmt layout version (1 for contiguous, uncompressed)
     -v          Print debug messages
     -V          Print the version and exit
+    -z <comp>   Compress the data sets with gzip (default), lzf, or none
 
 
 
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# h5lmt_rollup.py
+#*****************************************************************************\
+#*  $Id: Makefile,v 1.9 2013/04/22 auselton Exp $
+#*****************************************************************************
+#*  Copyright (C) 2013 The Regents of the University of California.
+#*  Produced at Lawrence Berkeley National Laboratory (cf, DISCLAIMER).
+#*  Written by Andrew Uselton <acuselton@lbl.gov> as part of LMT:
+#*  Copyright (C) 2007-2010 Lawrence Livermore National Security, LLC.
+#*  This module (re)written by Jim Garlick <garlick@llnl.gov>.
+#*  UCRL-CODE-232438
+#*
+#*  This file is part of Lustre Monitoring Tool, version 2.
+#*  Authors: H. Wartens, P. Spencer, N. O'Neill, J. Long, J. Garlick
+#*  For details, see http://github.com/chaos/lmt.
+#*
+#*  LMT is free software; you can redistribute it and/or modify it under
+#*  the terms of the GNU General Public License (as published by the Free
+#*  Software Foundation) version 2, dated June 1991.
+#*
+#*  LMT is distributed in the hope that it will be useful, but WITHOUT
+#*  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#*  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License
+#*  for more details.
+#*
+#*  You should have received a copy of the GNU General Public License along
+#*  with LMT; if not, write to the Free Software Foundation, Inc.,
+#*  59 Temple Place, Suite 330, Boston, MA  02111-1307  USA.
+#*****************************************************************************/
+#
+#   Write (or bring up to date) the 1 minute, 15 minute, and 1 hour
+# rollups in an existing h5lmt file, as h5lmt_add.py -r does for the
+# interval it adds. See H5LMT.writeRollups().
+
+import argparse
+import h5py
+
+from pyLMT import H5LMT
+
+#*******************************************************************************
+# Support for basic calling conventions
+def process_args(main=False):
+    """
+    On success return the args object with validatated entries for
+    those thing required by the __man__ script.
+    """
+    parser = argparse.ArgumentParser(description='Roll up an h5lmt file')
+    parser.add_argument('-f', '--file', default=None, type=str, help='The h5lmt file to roll up')
+    parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
+    parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
+    args = parser.parse_args()
+    if main == True:
+        args = validate_args(args)
+    return(args)
+
+#*******************************************************************************
+def validate_args(args):
+    if args.file is None:
+        print "Please provide a file"
+        return(None)
+    return(args)
+
+#*******************************************************************************
+
+# callable main function for working interactively
+def doMain(args):
+    try:
+        fsFile = h5py.File(args.file, 'r+')
+    except:
+        print "%s does not appear to exist or can't be written" % args.file
+        return(None)
+    return(fsFile)
+
+#*******************************************************************************
+def doAction(args, fsFile):
+    H5LMT.writeRollups(fsFile)
+    if args.verbose == True:
+        rollupGroup = fsFile[H5LMT.ROLLUP_GROUP]
+        for level in sorted(rollupGroup, key=int):
+            print "%s seconds: %d bins of %s" % (level, len(rollupGroup[level]['Steps']),
+                                                 ", ".join(sorted([name for name in rollupGroup[level] if name in H5LMT.ROLLUP_DATA_SETS])))
+    fsFile.close()
+    return
+
+#*******************************************************************************
+
+if __name__ == "__main__":
+    """
+    h5lmt_rollup.py <opts>
+    Write the rollups into an h5lmt file
+    Options include:
+    -f <file>   The h5lmt file
+    -h          A help message
+    -v          Print debug messages
+    -V          Print the version and exit
+
+    """
+    args = process_args(main=True)
+    if not args is None:
+        fsFile = doMain(args)
+        if not fsFile is None:
+            doAction(args, fsFile)
@@ -40,7 +40,7 @@ import matplotlib.pyplot as plt
 import datetime
 import h5py
 
-from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS
+from pyLMT import LMTConfig, Timestamp, TimeSteps, Graph, FS, BrwFS, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -87,62 +87,33 @@ def doMain(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def doAction(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     fs=fsStepsDataSet.attrs['fs']
     try:
         host=fsStepsDataSet.attrs['host']
     except:
         host='hopper'
-    mds = np.zeros(e_index - b_index + 1)
-    mdsOpsGroup = fsFile['MDSOpsGroup']
-    mdsOpsDataSet = mdsOpsGroup['MDSOpsDataSet']
-    op_index = 0
-    for op_name in mdsOpsDataSet.attrs['OpNames']:
-        mds += mdsOpsDataSet[op_index,b_index:e_index+1]
-        op_index += 1
-    mdsCPUGroup = fsFile['MDSCPUGroup']
-    mdsCPUDataSet = mdsCPUGroup['MDSCPUDataSet']
-    cpu = mdsCPUDataSet[b_index:e_index+1]
+    mds = h5lmt.sum('MDSOpsDataSet', b_index, e_index+1)
+    cpu = h5lmt.read('MDSCPUDataSet', b_index, e_index+1)
     np.set_printoptions(threshold='nan')
     #print "cpu: ", cpu
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], mds, 'g', label='metadata', Ave=True)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], mds, 'g', label='metadata', Ave=True)
     plt.xlabel('time')
     plt.ylabel(r'$ops/sec$')
-    (handles, labels) = Graph.percent(ax, fsStepsDataSet[b_index:e_index+1], cpu, color='k', label='% CPU', Ave=True)
+    (handles, labels) = Graph.percent(ax, h5lmt.Steps[b_index:e_index+1], cpu, color='k', label='% CPU', Ave=True)
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
     plt.title("%s %s Metadata Operations" % (fsStepsDataSet.attrs['day'],
                                              fsStepsDataSet.attrs['fs']))
@@ -53,7 +53,6 @@ import argparse
 import datetime
 import traceback
 import MySQLdb
-import numpy as np
 import numpy.ma as ma
 import matplotlib as mpl
 # If this is run from a cron job it is not a login process and
@@ -76,7 +75,7 @@ import matplotlib.pylab as plb
 from mpl_toolkits.mplot3d import axes3d
 import h5py
 
-from pyLMT import Graph, Timestamp
+from pyLMT import Graph, Timestamp, H5LMT
 
 #*******************************************************************************
 def process_args(main=False):
@@ -127,58 +126,28 @@ def do_main(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def doAction(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     #print b_index, e_index
     fs=fsStepsDataSet.attrs['fs']
     try:
         host=fsStepsDataSet.attrs['host']
     except:
         host='hopper'
-    ossCPUGroup = fsFile["OSSCPUGroup"]
-    ossCPUDataSet = ossCPUGroup["OSSCPUDataSet"]
-    fsMissingGroup = fsFile["FSMissingGroup"]
-    fsMissingDataSet = fsMissingGroup["FSMissingDataSet"]
-    num_steps = e_index - b_index + 1
-    Missing = np.zeros(num_steps)
-    oss_index = 0
-    for oss_name in ossCPUDataSet.attrs["OSSNames"]:
-        Missing += fsMissingDataSet[oss_index,b_index:e_index+1]
-        oss_index += 1
+    Missing = h5lmt.sum('FSMissingDataSet', b_index, e_index+1)
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], Missing, 'r',
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], Missing, 'r',
                      label='missing', Ave=False, format='+')
     plt.xlabel('time')
     plt.ylabel(r'$count$')
@@ -59,7 +59,7 @@ import datetime
 import time
 import h5py
 
-from pyLMT import Graph
+from pyLMT import Graph, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -143,47 +143,26 @@ def do_main(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def do_action(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     if b_index == None:
         print "brw_stats_model_h5lmt.do_action(): Failed to find timestamp index for %d" % b_sie
         return
     if e_index == None:
         print "brw_stats_model_h5lmt.do_action(): Failed to find timestamp index for %d" % e_sie
         return
-    stepsDiff = np.zeros_like(fsStepsDataSet[b_index:e_index+1], dtype=np.int32)
-    stepsDiff[1:] = np.diff(fsStepsDataSet[b_index:e_index+1])
+    stepsDiff = np.zeros_like(h5lmt.Steps[b_index:e_index+1], dtype=np.int32)
+    stepsDiff[1:] = np.diff(h5lmt.Steps[b_index:e_index+1])
     fs=fsStepsDataSet.attrs['fs']
     try:
         host=fsStepsDataSet.attrs['host']
@@ -198,6 +177,7 @@ def do_action(args, b_sie, e_sie, fsFile):
         return
     bins = np.matrix(ostIosizeReadDataSet.attrs['bins'])
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = h5lmt.Intervals
     ostHist  = None
     ContribDS = None
     ost_index = 0
@@ -209,9 +189,9 @@ def do_action(args, b_sie, e_sie, fsFile):
         if args.ost != ost_name:
             ost_index += 1
             continue
-        readpS = np.transpose(np.matrix(ostIosizeReadDataSet[ost_index,:,b_index:e_index+1]))
+        readpS = np.transpose(np.matrix(H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals, b_index, e_index+1)))
         #print readpS
-        writepS = np.transpose(np.matrix(ostIosizeWriteDataSet[ost_index,:,b_index:e_index+1]))
+        writepS = np.transpose(np.matrix(H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals, b_index, e_index+1)))
         #print writepS
         if args.verbose == True:
             print "%d steps" % len(fsStepsDataSet)
@@ -234,13 +214,13 @@ def do_action(args, b_sie, e_sie, fsFile):
     fig = plt.figure()
     ax = fig.add_subplot(111)
     if args.iops == True:
-        Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], readIOs, 'r', label='read', Ave=args.ave)
-        Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], writeIOs, 'b', label='write', Ave=args.ave)
+        Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], readIOs, 'r', label='read', Ave=args.ave)
+        Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], writeIOs, 'b', label='write', Ave=args.ave)
         plt.ylabel('IOPS')
         plt.title('IOPS on OST %s' % theOst)
     else:
-        Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], read, 'r', label='read', Ave=args.ave)
-        Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], write, 'b', label='write', Ave=args.ave)
+        Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], read, 'r', label='read', Ave=args.ave)
+        Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], write, 'b', label='write', Ave=args.ave)
         plt.ylabel('MB/s')
         plt.title('data rate on OST %s' % theOst)
     plt.xlabel('time')
@@ -59,6 +59,8 @@ import datetime
 import time
 import h5py
 
+from pyLMT import H5LMT
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -135,39 +137,18 @@ def do_main(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def do_action(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     if b_index == None:
         print "brw_stats_model_h5lmt.do_action(): Failed to find timestamp index for %d" % b_sie
         return
@@ -188,6 +169,7 @@ def do_action(args, b_sie, e_sie, fsFile):
         return
     bins = ostIosizeReadDataSet.attrs['bins']
     ostIosizeWriteDataSet = ostWriteGroup['OSTIosizeWriteDataSet']
+    Intervals = h5lmt.Intervals
     ostHist  = None
     ContribDS = None
     ost_index = 0
@@ -196,9 +178,9 @@ def do_action(args, b_sie, e_sie, fsFile):
     for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
         if args.progress == True:
             print "OST %d: %s" % (ost_index, ost_name)
-        readpS = ostIosizeReadDataSet[ost_index,:,b_index:e_index+1]
+        readpS = H5LMT.iosizeRates(ostIosizeReadDataSet, ost_index, Intervals, b_index, e_index+1)
         #print readpS
-        writepS = ostIosizeWriteDataSet[ost_index,:,b_index:e_index+1]
+        writepS = H5LMT.iosizeRates(ostIosizeWriteDataSet, ost_index, Intervals, b_index, e_index+1)
         #print writepS
         histSeries = np.transpose(np.vstack((readpS, writepS)))
         if args.verbose == True:
@@ -41,7 +41,7 @@ import time
 import datetime
 import h5py
 
-from pyLMT import Graph
+from pyLMT import Graph, H5LMT
 
 #*******************************************************************************
 # Support for basic calling conventions
@@ -99,75 +99,29 @@ def doMain(args):
 
 #*******************************************************************************
 
-def find_sie(sie, dataSet):
-    first = 0
-    last = len(dataSet) - 1
-    while first < last:
-        mid = int((first+last)/2)
-        if sie == dataSet[mid]:
-            return(mid)
-        if first == last -1:
-            if ((dataSet[first] <= sie) and
-                (dataSet[last] > sie)):
-                return(first)
-            if sie == dataSet[last]:
-                return(last)
-            print "brw_stats_model_h5lmt.find_sie(): Binary seach for %d failed at (%d, %d). Are there outof order timestamp entries?" % (sie, first, last)
-            return(None)
-        if sie < dataSet[mid]:
-            last = mid
-        else:
-            first = mid
-
-#*******************************************************************************
-
 def doAction(args, b_sie, e_sie, fsFile):
     fsStepsGroup = fsFile['FSStepsGroup']
     fsStepsDataSet = fsStepsGroup['FSStepsDataSet']
-    if (b_sie < fsStepsDataSet[0]) or (b_sie > fsStepsDataSet[-1]):
-        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    h5lmt = H5LMT.H5LMT(fsFile)
+    if (b_sie < h5lmt.Steps[0]) or (b_sie > h5lmt.Steps[-1]):
+        print "The beginning timestamp %d is outside the date range from %d to %d" % (b_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    if (e_sie < fsStepsDataSet[0]) or (e_sie > fsStepsDataSet[-1]):
-        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, fsStepsDataSet[0], fsStepsDataSet[-1])
+    if (e_sie < h5lmt.Steps[0]) or (e_sie > h5lmt.Steps[-1]):
+        print "The ending timestamp %d is outside the date range from %d to %d" % (e_sie, h5lmt.Steps[0], h5lmt.Steps[-1])
         return
-    b_index = find_sie(b_sie, fsStepsDataSet)
-    e_index = find_sie(e_sie, fsStepsDataSet)
+    b_index = h5lmt.index(b_sie)
+    e_index = h5lmt.index(e_sie)
     #print "data from index %d to %d" % (b_index, e_index)
     fs=fsStepsDataSet.attrs['fs']
     try:
         host=fsStepsDataSet.attrs['host']
     except:
         host='hopper'
-    read = np.zeros(e_index - b_index + 1)
-    ostReadGroup = fsFile['OSTReadGroup']
-    ostBulkReadDataSet = ostReadGroup['OSTBulkReadDataSet']
-    ost_index = 0
     if args.report == True:
         np.set_printoptions(threshold='nan')
-    for ost_name in ostBulkReadDataSet.attrs['OSTNames']:
-        #print "OST %s" % ost_name
-        read += ostBulkReadDataSet[ost_index,b_index:e_index+1]
-        #print "read:", ostBulkReadDataSet[ost_index,b_index:e_index+1]
-        ost_index += 1
-    read /= (1024*1024)
-    write = np.zeros(e_index - b_index + 1)
-    ostWriteGroup = fsFile['OSTWriteGroup']
-    ostBulkWriteDataSet = ostWriteGroup['OSTBulkWriteDataSet']
-    ost_index = 0
-    for ost_name in ostBulkWriteDataSet.attrs['OSTNames']:
-        #print "OST %s" % ost_name
-        write += ostBulkWriteDataSet[ost_index,b_index:e_index+1]
-        #print "write: ", ostBulkWriteDataSet[ost_index,b_index:e_index+1]
-        ost_index += 1
-    write /= (1024*1024)
-    cpu = np.zeros(e_index - b_index + 1)
-    ossCPUGroup = fsFile['OSSCPUGroup']
-    ossCPUDataSet = ossCPUGroup['OSSCPUDataSet']
-    oss_index = 0
-    for oss_name in ossCPUDataSet.attrs['OSSNames']:
-        cpu += ossCPUDataSet[oss_index,b_index:e_index+1]
-        oss_index += 1
-    cpu /= oss_index
+    read = h5lmt.sum('OSTBulkReadDataSet', b_index, e_index+1)/(1024*1024)
+    write = h5lmt.sum('OSTBulkWriteDataSet', b_index, e_index+1)/(1024*1024)
+    cpu = h5lmt.mean('OSSCPUDataSet', b_index, e_index+1)
     if args.report == True:
         print "read:", read
         print "write: ", write
@@ -176,13 +130,13 @@ def doAction(args, b_sie, e_sie, fsFile):
         return
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], read, 'r', label='read', Ave=args.ave)
-    Graph.timeSeries(ax, fsStepsDataSet[b_index:e_index+1], write, 'b', label='write', Ave=args.ave)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], read, 'r', label='read', Ave=args.ave)
+    Graph.timeSeries(ax, h5lmt.Steps[b_index:e_index+1], write, 'b', label='write', Ave=args.ave)
     (handles, labels) = ax.get_legend_handles_labels()
     plt.xlabel('time')
     plt.ylabel(r'$MiB/sec$')
     if args.cpu == True:
-        (handles, labels) = Graph.percent(ax, fsStepsDataSet[b_index:e_index+1], cpu, color='k', label='% CPU', Ave=args.ave)
+        (handles, labels) = Graph.percent(ax, h5lmt.Steps[b_index:e_index+1], cpu, color='k', label='% CPU', Ave=args.ave)
     plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
     plt.title("%s %s aggregate I/O" % (fsStepsDataSet.attrs['day'],
                                        fsStepsDataSet.attrs['fs']))
@@ -55,6 +55,8 @@ import matplotlib.pyplot as plt
 import datetime
 import time
 
+from pyLMT import Rolling, Daily
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -67,7 +69,7 @@ def process_args(main=False):
     parser = argparse.ArgumentParser(description='Access an LMT DB')
     parser.add_argument('-b', '--begin', default=None, type=str, help='The beginning date for the histogram (yyyy-mm-dd)')
     parser.add_argument('-e', '--end', default=None, type=str, help='The end date for the histogram (yyyy-mm-dd)')
-    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./daily.data)')
+    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./daily.store if there is one, else ./daily.data)')
     parser.add_argument('-H', '--hist', action='store_true', default=False, help='Produce a histogram of the results')
     parser.add_argument('-M', '--median', action='store_true', default=False, help='Produce a grph of the median of the previous 30 days results')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
@@ -84,7 +86,9 @@ def process_args(main=False):
 
 def validate_args(args):
     if args.file is None:
-        args.file = './daily.data'
+        args.file = './daily'+Daily.STORE_SUFFIX
+        if not os.path.exists(args.file):
+            args.file = './daily.data'
     path = os.path.abspath(args.file)
     fs = os.path.dirname(path)
     args.fs = os.path.basename(fs)
@@ -95,11 +99,9 @@ def validate_args(args):
 #*******************************************************************************
 
 def doMain(args):
-    format = np.dtype([('day', 'S11'), ('hour', 'S11'), ('sie', np.uint),
-                       ('read', np.float64), ('write', np.float64),
-                       ('rRate', np.float64), ('wRate', np.float64)])
+    format = Daily.DAILY_DTYPE
     try:
-        daily = np.loadtxt(args.file, dtype=format)
+        daily = Daily.load(args.file, format)
     except:
         print "Failed to load from %s" % args.file
         return(None)
@@ -266,12 +268,14 @@ def doMedian(args, daily):
     dates = np.array(range(int(start_date), int(end_date)))
     readMedian = np.zeros(len(read), dtype=np.float64)
     writeMedian = np.zeros(len(write), dtype=np.float64)
+    # Each day's median is over that day and the Window days before it.
+    readWindow = Rolling.Rolling(Window+1, "read")
+    writeWindow = Rolling.Rolling(Window+1, "write")
     for end in range(len(read)):
-        start = 0
-        if end > Window:
-            start = end - Window
-        readMedian[end] = np.median(read[start:end+1])
-        writeMedian[end] = np.median(write[start:end+1])
+        readWindow.add(read[end])
+        writeWindow.add(write[end])
+        readMedian[end] = readWindow.median()
+        writeMedian[end] = writeWindow.median()
     #readMedian /= MemorySize
     #writeMedian /= MemorySize
     max = np.amax(readMedian)
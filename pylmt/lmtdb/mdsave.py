@@ -54,6 +54,8 @@ import matplotlib.pyplot as plt
 import datetime
 import time
 
+from pyLMT import Rolling, Daily
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -66,7 +68,7 @@ def process_args(main=False):
     parser = argparse.ArgumentParser(description='Access an LMT DB')
     parser.add_argument('-b', '--begin', default=None, type=str, help='The beginning date for the histogram (yyyy-mm-dd)')
     parser.add_argument('-e', '--end', default=None, type=str, help='The end date for the histogram (yyyy-mm-dd)')
-    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./daily.data)')
+    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./dailymds.store if there is one, else ./dailymds.data)')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
     parser.add_argument('-r', '--report', action='store_true', default=False, help='Print out the read and write values')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
@@ -80,7 +82,9 @@ def process_args(main=False):
 
 def validate_args(args):
     if args.file is None:
-        args.file = './dailymds.data'
+        args.file = './dailymds'+Daily.STORE_SUFFIX
+        if not os.path.exists(args.file):
+            args.file = './dailymds.data'
     path = os.path.abspath(args.file)
     fs = os.path.dirname(path)
     args.fs = os.path.basename(fs)
@@ -91,10 +95,9 @@ def validate_args(args):
 #*******************************************************************************
 
 def doMain(args):
-    format = np.dtype([('day', 'S11'), ('hour', 'S11'), ('sie', np.uint),
-                       ('ops', np.float64), ('opsRate', np.float64)])
+    format = Daily.DAILY_MDS_DTYPE
     try:
-        dailyMDS = np.loadtxt(args.file, dtype=format)
+        dailyMDS = Daily.load(args.file, format)
     except:
         print "Failed to load from %s" % args.file
         return(None)
@@ -135,11 +138,11 @@ def doMedian(args, dailyMDS):
     ops = dailyMDS[start:end+1]['ops']
     dates = np.array(range(int(start_date), int(end_date)))
     opsMedian = np.zeros(end-start+1, dtype=np.float64)
-    for index in range(start, end+1):
-        first = 0
-        if index - first > Window:
-            first = index - Window
-        opsMedian[index] = np.median(ops[first:index+1])
+    # Each day's median is over that day and the Window days before it.
+    opsWindow = Rolling.Rolling(Window+1, "ops")
+    for index in range(len(ops)):
+        opsWindow.add(ops[index])
+        opsMedian[index] = opsWindow.median()
     opsMedian /= 1024*1024
     max = np.amax(opsMedian)
     scale = 100
@@ -55,6 +55,11 @@ import matplotlib.pyplot as plt
 import datetime
 import time
 
+from pyLMT import Rolling, Daily
+
+# The median is over the day and the Window days before it.
+Window = 30
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -66,8 +71,9 @@ def process_args(main=False):
     """
     parser = argparse.ArgumentParser(description='Access an LMT DB')
     parser.add_argument('-d', '--day', default=None, type=str, help='The date for the figure (yyyy-mm-dd)')
-    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./daily.data)')
+    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./daily.store if there is one, else ./daily.data)')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
+    parser.add_argument('-s', '--state', default=None, type=str, help='Keep where the last run got to in this file and only read the recent days each run')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
     args = parser.parse_args()
@@ -79,7 +85,9 @@ def process_args(main=False):
 
 def validate_args(args):
     if args.file is None:
-        args.file = './daily.data'
+        args.file = './daily'+Daily.STORE_SUFFIX
+        if not os.path.exists(args.file):
+            args.file = './daily.data'
     path = os.path.abspath(args.file)
     fs = os.path.dirname(path)
     args.fs = os.path.basename(fs)
@@ -90,11 +98,11 @@ def validate_args(args):
 #*******************************************************************************
 
 def doMain(args):
-    format = np.dtype([('day', 'S11'), ('hour', 'S11'), ('sie', np.uint),
-                       ('read', np.float64), ('write', np.float64),
-                       ('rRate', np.float64), ('wRate', np.float64)])
+    format = Daily.DAILY_DTYPE
+    if not args.state is None:
+        return(doRolling(args, format))
     try:
-        daily = np.loadtxt(args.file, dtype=format)
+        daily = Daily.load(args.file, format)
     except:
         print "Failed to load from %s" % args.file
         return(None)
@@ -102,6 +110,36 @@ def doMain(args):
 
 #*******************************************************************************
 
+def doRolling(args, format):
+    """
+    Rather than reload the whole daily.data file, fill the rolling
+    windows with just the last Window+1 days (up to args.day, if given).
+    See Rolling.recentRows(), which uses the state file to find them in
+    a text file. The returned state stands in for the 'daily' array.
+    """
+    path = os.path.abspath(args.file)
+    state = Rolling.loadState(args.state)
+    if (state is None) or (state.get('file') != path):
+        state = {'file' : path}
+    try:
+        recent = Rolling.recentRows(path, format, Window+1, state, until=args.day)
+    except (IOError, ValueError, Daily.DailyError):
+        print "Failed to load from %s" % args.file
+        return(None)
+    if len(recent) == 0:
+        print "No days in %s" % args.file
+        return(None)
+    state['read'] = Rolling.Rolling(Window+1, "read")
+    state['write'] = Rolling.Rolling(Window+1, "write")
+    for row in recent:
+        state['read'].add(row['read'], key=int(row['sie']))
+        state['write'].add(row['write'], key=int(row['sie']))
+    state['last'] = {'day' : recent[-1]['day'], 'read' : recent[-1]['read'], 'write' : recent[-1]['write']}
+    Rolling.saveState(args.state, state)
+    return(state)
+
+#*******************************************************************************
+
 def doMedian(args, daily):
     """
     Calculate and graph the 30 day running median for amounts of data
@@ -109,11 +147,17 @@ def doMedian(args, daily):
     memory (212 TB) with a y2 scale for size of file system (1 PB for each of
     scratch and scratch2).
     """
-    Window = 30
     # MemorySize in GB
     MemorySize = 212*1024
     # FileSystemSize in GB
     FileSystemSize = 1024*1024
+    if not args.state is None:
+        plotMedian(args, daily['last']['day'][1:],
+                   daily['last']['read']/MemorySize,
+                   daily['last']['write']/MemorySize,
+                   daily['read'].median()/MemorySize,
+                   daily['write'].median()/MemorySize)
+        return
     days = np.empty(len(daily), dtype=str)
     days = daily[:]['day']
     read = np.zeros(len(daily), dtype=np.float64)
@@ -138,6 +182,11 @@ def doMedian(args, daily):
     writeDay = write[end]/MemorySize
     readMedian = np.median(read[start:end+1])/MemorySize
     writeMedian = np.median(write[start:end+1])/MemorySize
+    plotMedian(args, days[end][1:], readDay, writeDay, readMedian, writeMedian)
+
+#*******************************************************************************
+
+def plotMedian(args, day, readDay, writeDay, readMedian, writeMedian):
     max = readDay
     if writeDay > max:
         max = writeDay
@@ -158,7 +207,7 @@ def doMedian(args, daily):
     ax.bar([1.25], [writeDay], width=0.25, color=blue, label="today's writes")
     ax.bar([1.50], [writeMedian], width=0.25, color=darkblue, label="30 day median")
     ax.set_ylabel('fraction of memory')
-    ax.set_title('%s %s %s data moved\nand median (30 day window)' % (args.host, args.fs, days[end][1:]) )
+    ax.set_title('%s %s %s data moved\nand median (30 day window)' % (args.host, args.fs, day) )
     ax.get_xaxis().set_ticks([])
     ax.set_xbound(lower=0.0, upper=2.0)
     #plt.setp( ax.get_xticklabels(), rotation=30, horizontalalignment='right')
@@ -204,8 +253,9 @@ if __name__ == "__main__":
     median.py <opts>
     Options include:
     -d <day>    The date for the figure (yyyy-mm-dd)
-    -f <file>   The daily.data file to use
+    -f <file>   The daily.store or daily.data file to use
     -p <plot>   the file to save the plot in
+    -s <state>  Keep where the last run got to in this file and only read the recent days each run
     -h          A help message
     -v          Print debug messages
     -V          Print the version and exit
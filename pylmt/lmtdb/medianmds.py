@@ -55,6 +55,11 @@ import matplotlib.pyplot as plt
 import datetime
 import time
 
+from pyLMT import Rolling, Daily
+
+# The median is over the day and the Window days before it.
+Window = 30
+
 #*******************************************************************************
 # Support for basic calling conventions
 def process_args(main=False):
@@ -66,8 +71,9 @@ def process_args(main=False):
     """
     parser = argparse.ArgumentParser(description='Access an LMT DB')
     parser.add_argument('-d', '--day', default=None, type=str, help='The date for the figure (yyyy-mm-dd)')
-    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./dailymds.data)')
+    parser.add_argument('-f', '--file', default=None, type=str, help='The file to use (default ./dailymds.store if there is one, else ./dailymds.data)')
     parser.add_argument('-p', '--plot', default=None, type=str, help='The name of the file to save the plot in')
+    parser.add_argument('-s', '--state', default=None, type=str, help='Keep where the last run got to in this file and only read the recent days each run')
     parser.add_argument('-v', '--verbose', action='store_true', default=False, help='Print out extra details')
     parser.add_argument('-V', '--version', action='version', version='%(prog)s 0.2')
     args = parser.parse_args()
@@ -79,7 +85,9 @@ def process_args(main=False):
 
 def validate_args(args):
     if args.file is None:
-        args.file = './dailymds.data'
+        args.file = './dailymds'+Daily.STORE_SUFFIX
+        if not os.path.exists(args.file):
+            args.file = './dailymds.data'
     path = os.path.abspath(args.file)
     fs = os.path.dirname(path)
     args.fs = os.path.basename(fs)
@@ -90,10 +98,11 @@ def validate_args(args):
 #*******************************************************************************
 
 def doMain(args):
-    format = np.dtype([('day', 'S11'), ('hour', 'S11'), ('sie', np.uint),
-                       ('ops', np.float64), ('opsRate', np.float64)])
+    format = Daily.DAILY_MDS_DTYPE
+    if not args.state is None:
+        return(doRolling(args, format))
     try:
-        dailyMDS = np.loadtxt(args.file, dtype=format)
+        dailyMDS = Daily.load(args.file, format)
     except:
         print "Failed to load from %s" % args.file
         return(None)
@@ -101,6 +110,33 @@ def doMain(args):
 
 #*******************************************************************************
 
+def doRolling(args, format):
+    """
+    As in median.py, fill the rolling window with just the last Window+1
+    days (up to args.day, if given). The returned state stands in for
+    'dailyMDS'.
+    """
+    path = os.path.abspath(args.file)
+    state = Rolling.loadState(args.state)
+    if (state is None) or (state.get('file') != path):
+        state = {'file' : path}
+    try:
+        recent = Rolling.recentRows(path, format, Window+1, state, until=args.day)
+    except (IOError, ValueError, Daily.DailyError):
+        print "Failed to load from %s" % args.file
+        return(None)
+    if len(recent) == 0:
+        print "No days in %s" % args.file
+        return(None)
+    state['ops'] = Rolling.Rolling(Window+1, "ops")
+    for row in recent:
+        state['ops'].add(row['ops'], key=int(row['sie']))
+    state['last'] = {'day' : recent[-1]['day'], 'ops' : recent[-1]['ops']}
+    Rolling.saveState(args.state, state)
+    return(state)
+
+#*******************************************************************************
+
 def doMedian(args, dailyMDS):
     """
     Calculate and graph the 30 day running median for amounts of data
@@ -108,7 +144,11 @@ def doMedian(args, dailyMDS):
     memory (212 TB) with a y2 scale for size of file system (1 PB for each of
     scratch and scratch2).
     """
-    Window = 30
+    if not args.state is None:
+        plotMedian(args, dailyMDS['last']['day'][1:],
+                   dailyMDS['last']['ops']/(1024*1024),
+                   dailyMDS['ops'].median()/(1024*1024))
+        return
     days = np.empty(len(dailyMDS), dtype=str)
     days = dailyMDS[:]['day']
     ops = np.zeros(len(dailyMDS), dtype=np.float64)
@@ -128,6 +168,11 @@ def doMedian(args, dailyMDS):
     end_date = mpl.dates.date2num(datetime.datetime.strptime(days[end][1:], "%Y-%m-%d")) + 1
     opsDay = ops[end]/(1024*1024)
     opsMedian = np.median(ops[start:end+1])/(1024*1024)
+    plotMedian(args, days[end][1:], opsDay, opsMedian)
+
+#*******************************************************************************
+
+def plotMedian(args, day, opsDay, opsMedian):
     scale = 100
     max = opsDay
     if opsMedian > max:
@@ -142,7 +187,7 @@ def doMedian(args, dailyMDS):
     ax.bar([0.25], [opsDay], width=0.25, color=green, label="today's ops")
     ax.bar([0.50], [opsMedian], width=0.25, color=darkgreen, label="30 day median")
     ax.set_ylabel('MDS Gig-Ops $(10^9)$')
-    ax.set_title('%s %s %s metadata ops\nand median (30 day window)' % (args.host, args.fs, days[end][1:]) )
+    ax.set_title('%s %s %s metadata ops\nand median (30 day window)' % (args.host, args.fs, day) )
     ax.get_xaxis().set_ticks([])
     ax.set_xbound(lower=0.0, upper=1.0)
     ax.set_ybound(lower=0.0, upper=scale)
@@ -187,8 +232,9 @@ if __name__ == "__main__":
     medianmds.py <opts>
     Options include:
     -d <day>    The date for the figure (yyyy-mm-dd)
-    -f <file>   The daily.data file to use
+    -f <file>   The dailymds.store or dailymds.data file to use
     -p <plot>   the file to save the plot in
+    -s <state>  Keep where the last run got to in this file and only read the recent days each run
     -h          A help message
     -v          Print debug messages
     -V          Print the version and exit
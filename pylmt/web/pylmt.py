@@ -140,7 +140,7 @@ def get_bulk(args):
     if type(fsrc) is str:
         return(fsrc)
     bulk = Bulk.Bulk(fsrc['name'])
-    bulk.getOSSs(fsrc['conn'])
+    bulk.getOSSs(fsrc['conn'], topology=fsrc['catalog'].topology())
     (begin_ts, end_ts) = Timestamp.process_timestamps(args, fsrc)
     bulk.getQuickData(begin_ts,
                          end_ts,
@@ -188,7 +188,7 @@ def get_metadata(args):
     if fsrc is None:
         return(None)
     metadata = MDS.MDS(host=fsrc['host'], fs=fsrc['name'])
-    metadata.opsFromDB(fsrc['conn'])
+    metadata.opsFromDB(fsrc['conn'], operations=fsrc['catalog'].operations())
     (begin_ts, end_ts) = Timestamp.process_timestamps(args, fsrc)
     metadata.getQuickData(begin_ts,
                          end_ts,